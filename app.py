@@ -1,6 +1,6 @@
 import os
 import razorpay
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, send_file, session, jsonify
 # Add this import for CORS handling
 from flask_cors import CORS
 
@@ -8,13 +8,14 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 load_dotenv()
 import pandas as pd
-import PyPDF2
 import openpyxl
-from openpyxl.chart import PieChart, LineChart, Reference, BarChart
+from openpyxl.chart import PieChart, LineChart, BarChart, AreaChart
 from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.styles import PatternFill, Font, Alignment
 from werkzeug.utils import secure_filename
 import json
+import itertools
+import tempfile
+import uuid
 from datetime import datetime, timedelta
 import re
 import hashlib
@@ -24,18 +25,21 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.header import Header
-
-# Try to import OCR libraries
-try:
-    import pytesseract
-except ImportError:
-    pytesseract = None
-
-try:
-    from PIL import Image
-except ImportError:
-    Image = None
-
+from job_queue import JobQueue, JOB_COMPLETED
+from upload_intake import stream_upload_to_disk, UploadRejected
+from pdf_extraction import iter_pdf_pages, extract_page_images
+from ocr_engine import ocr_available, ocr_image_file, ocr_image_bytes
+from statement_parser import iter_transactions, StatementParser
+from bank_layouts import fingerprint_layout, describe_fingerprint, layout_registry
+from tabular_ingest import open_excel_transactions, open_csv_transactions, extract_transactions_from_docx, iter_docx_table_rows
+from structured_statements import extract_transactions_from_ofx, extract_transactions_from_mt940
+from transaction_table import TransactionTable, CATEGORY_NAMES, CATEGORY_CODES, as_transaction_table
+from transaction_summary import StatementSummary, summarize
+from categorizer import category_rules, category_memo, categorize_descriptions, build_override_index
+from excel_report import report_template, sheet_name_for, sheet_reference, read_category_view
+from report_cache import ReportCache
+
+# Try to import document libraries
 try:
     import docx
 except ImportError:
@@ -89,11 +93,42 @@ else:
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 'xls', 'xlsx'}
+ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 'xls', 'xlsx', 'csv', 'ofx', 'qfx', 'mt940', 'sta'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+# Upload size limits per subscription plan (in MB)
+DEFAULT_UPLOAD_LIMIT_MB = int(os.environ.get('DEFAULT_UPLOAD_LIMIT_MB', 10))
+PLAN_UPLOAD_LIMITS_MB = {
+    'monthly': int(os.environ.get('MONTHLY_UPLOAD_LIMIT_MB', 10)),
+    'two_months': int(os.environ.get('TWO_MONTHS_UPLOAD_LIMIT_MB', 15)),
+    'annual': int(os.environ.get('ANNUAL_UPLOAD_LIMIT_MB', 25))
+}
+# Allowance for the multipart envelope and form fields around the file
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+# Hard cap enforced by Werkzeug while reading any request body
+app.config['MAX_CONTENT_LENGTH'] = max(DEFAULT_UPLOAD_LIMIT_MB, *PLAN_UPLOAD_LIMITS_MB.values()) * 1024 * 1024 + UPLOAD_FORM_OVERHEAD
+
+RESULTS_FOLDER = os.path.join(UPLOAD_FOLDER, 'results')
+
 # Create upload folder if it doesn't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(RESULTS_FOLDER, exist_ok=True)
+
+# Reports are rendered on first download and cached by analysis and rules version
+REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', os.path.join(UPLOAD_FOLDER, 'reports'))
+REPORT_CACHE_MAX_MB = int(os.environ.get('REPORT_CACHE_MAX_MB', 1024))
+report_cache = ReportCache(REPORT_CACHE_DIR, REPORT_CACHE_MAX_MB * 1024 * 1024)
+
+# Background job queue for statement analysis
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+job_queue = JobQueue(max_workers=JOB_WORKERS)
+
+# Statements with at least this many transactions are categorized in one vectorized batch
+BATCH_CATEGORIZE_ROWS = int(os.environ.get('BATCH_CATEGORIZE_ROWS', 500))
+# Rows sent per INSERT when saving category overrides
+OVERRIDE_UPSERT_ROWS = int(os.environ.get('OVERRIDE_UPSERT_ROWS', 1000))
+# Longest normalized description an override can be saved for
+OVERRIDE_KEY_LENGTH = 255
 
 # MySQL Database Configuration
 DB_CONFIG = {
@@ -198,6 +233,42 @@ def init_db():
                 file_name VARCHAR(255) NOT NULL,
                 excel_file_path VARCHAR(500) NOT NULL,
                 pdf_file_path VARCHAR(500),
+                content_hash CHAR(64),
+                data_file_path VARCHAR(500),
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+        """)
+        
+        # Check if content_hash column exists, if not add it
+        try:
+            cursor.execute("ALTER TABLE bank_statement_analyses ADD COLUMN content_hash CHAR(64)")
+            print("Added content_hash column to bank_statement_analyses table")
+        except Error as e:
+            # Column already exists or other error, continue
+            if e.errno != 1060:  # 1060 = Duplicate column name
+                print(f"Note: {e}")
+        
+        # Check if data_file_path column exists, if not add it
+        # (analyses with one keep their parsed transactions there and render reports on demand)
+        try:
+            cursor.execute("ALTER TABLE bank_statement_analyses ADD COLUMN data_file_path VARCHAR(500)")
+            print("Added data_file_path column to bank_statement_analyses table")
+        except Error as e:
+            # Column already exists or other error, continue
+            if e.errno != 1060:  # 1060 = Duplicate column name
+                print(f"Note: {e}")
+        
+        # Create content hash index so repeat uploads can reuse earlier analysis artifacts
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS statement_content_index (
+                user_id INT NOT NULL,
+                content_hash CHAR(64) NOT NULL,
+                result_file_path VARCHAR(500) NOT NULL,
+                excel_file_path VARCHAR(500) NOT NULL,
+                pdf_file_path VARCHAR(500),
+                transaction_count INT DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, content_hash),
                 FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
             )
         """)
@@ -256,6 +327,18 @@ def init_db():
             )
         """)
         
+        # Create per-user category overrides, keyed by normalized description
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS category_overrides (
+                user_id INT NOT NULL,
+                description_key VARCHAR(255) NOT NULL,
+                category VARCHAR(50) NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, description_key),
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+        """)
+        
         # Create password reset tokens table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS password_reset_tokens (
@@ -275,6 +358,7 @@ def init_db():
             "CREATE INDEX idx_subscriptions_end_date ON subscriptions(end_date)",
             "CREATE INDEX idx_analyses_user_id ON bank_statement_analyses(user_id)",
             "CREATE INDEX idx_analyses_date ON bank_statement_analyses(analysis_date)",
+            "CREATE INDEX idx_analyses_content_hash ON bank_statement_analyses(content_hash)",
             "CREATE INDEX idx_notifications_user_id ON notifications(user_id)",
             "CREATE INDEX idx_notifications_created_at ON notifications(created_at)",
             "CREATE INDEX idx_communication_user_id ON communication_history(user_id)",
@@ -403,6 +487,37 @@ def has_active_subscription(user_id):
         if connection and connection.is_connected():
             connection.close()
 
+def get_active_plan(user_id):
+    """Return the plan of the user's active subscription, or None if there is none"""
+    connection = get_db_connection()
+    if connection is None:
+        return None
+    
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT plan FROM subscriptions 
+            WHERE user_id = %s AND end_date > NOW()
+            ORDER BY end_date DESC
+            LIMIT 1
+        """, (user_id,))
+        
+        subscription_row = cursor.fetchone()
+        return subscription_row[0] if subscription_row else None
+    except Error as e:
+        print(f"Error checking subscription plan: {e}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if connection and connection.is_connected():
+            connection.close()
+
+def get_upload_limit(plan):
+    """Return the largest accepted upload size in bytes for a subscription plan"""
+    return PLAN_UPLOAD_LIMITS_MB.get(plan, DEFAULT_UPLOAD_LIMIT_MB) * 1024 * 1024
+
 def has_any_subscription(user_id):
     """Check if user has any subscription (active or expired)"""
     connection = get_db_connection()
@@ -473,26 +588,32 @@ def is_subscription_expired(user_id):
         if connection and connection.is_connected():
             connection.close()
 
-def extract_text_from_pdf(filepath):
-    """Extract text from PDF file"""
-    text = ""
+def iter_pdf_text(filepath, parallel=None):
+    """Yield the text of each PDF page, running OCR on scanned pages that have no text layer"""
+    for index, page in enumerate(iter_pdf_pages(filepath, parallel=parallel)):
+        if not page.strip() and ocr_available():
+            try:
+                page = "\n".join(ocr_image_bytes(data) for data in extract_page_images(filepath, index))
+            except Exception as e:
+                print(f"Error running OCR on PDF page {index + 1}: {e}")
+        yield page
+
+def extract_text_from_pdf(filepath, parallel=None):
+    """Extract text from PDF file, splitting long statements across the process pool"""
     try:
-        with open(filepath, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+        # Join once in page order instead of growing one string page by page
+        return "".join(page + "\n" for page in iter_pdf_text(filepath, parallel=parallel))
     except Exception as e:
         print(f"Error reading PDF: {e}")
-    return text
+        return ""
 
 def extract_text_from_image(filepath):
-    """Extract text from image file using OCR"""
+    """Extract text from image file using OCR, split into frames and bands across the process pool"""
     try:
         # Check if required libraries are available
-        if pytesseract is None or Image is None:
+        if not ocr_available():
             raise ImportError("pytesseract or PIL is not installed")
-        text = pytesseract.image_to_string(Image.open(filepath))
-        return text
+        return ocr_image_file(filepath)
     except Exception as e:
         print(f"Error reading image: {e}")
         return ""
@@ -504,10 +625,11 @@ def extract_text_from_doc(filepath):
         if docx is None:
             raise ImportError("python-docx is not installed")
         doc = docx.Document(filepath)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
+        lines = [paragraph.text for paragraph in doc.paragraphs]
+        # Table rows become one line each, cells separated like columns in a PDF
+        for table in doc.tables:
+            lines.extend("  ".join(cells) for cells in iter_docx_table_rows(table))
+        return "".join(line + "\n" for line in lines)
     except Exception as e:
         print(f"Error reading DOC file: {e}")
         return ""
@@ -522,479 +644,182 @@ def extract_text_from_excel(filepath):
         print(f"Error reading Excel file: {e}")
         return ""
 
+def iter_text_from_file(filepath):
+    """Yield the text of an uploaded file in chunks (one per page for PDFs), picking the extractor by file extension"""
+    lower_path = filepath.lower()
+    if lower_path.endswith('.pdf'):
+        try:
+            for page in iter_pdf_text(filepath):
+                yield page + "\n"
+        except Exception as e:
+            print(f"Error reading PDF: {e}")
+    elif lower_path.endswith(('.png', '.jpg', '.jpeg', '.gif')):
+        yield extract_text_from_image(filepath)
+    elif lower_path.endswith(('.doc', '.docx')):
+        yield extract_text_from_doc(filepath)
+    elif lower_path.endswith(('.xls', '.xlsx')):
+        yield extract_text_from_excel(filepath)
+    else:
+        # For other file types, try to read as text
+        try:
+            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                yield f.read()
+        except:
+            yield "Could not extract text from file"
+
+def extract_text_from_file(filepath):
+    """Extract text from an uploaded file, picking the extractor by file extension"""
+    return "".join(iter_text_from_file(filepath))
+
+# Readers that build transactions straight from a file's structure, by extension.
+# Each returns None when the file's layout is not recognized.
+DIRECT_TRANSACTION_READERS = {
+    '.csv': open_csv_transactions,
+    '.ofx': extract_transactions_from_ofx,
+    '.qfx': extract_transactions_from_ofx,
+    '.mt940': extract_transactions_from_mt940,
+    '.sta': extract_transactions_from_mt940,
+    '.xls': open_excel_transactions,
+    '.xlsx': open_excel_transactions,
+    '.docx': extract_transactions_from_docx,
+}
+
+def iter_file_transactions(filepath, bank_name=None):
+    """
+    Yield transactions from an uploaded file, reading structured formats, spreadsheet
+    columns and DOCX tables directly where the layout allows
+    
+    Text statements are fingerprinted from their first page (with `bank_name` as a
+    hint) so layouts seen before go straight to the parser shape they matched.
+    
+    A direct reader that fails before its first transaction falls back to text
+    extraction; later, malformed rows are skipped by the reader itself.
+    """
+    extension = os.path.splitext(filepath.lower())[1]
+    reader = DIRECT_TRANSACTION_READERS.get(extension)
+    if reader is not None:
+        try:
+            transactions = reader(filepath)
+            if transactions is not None:
+                transactions = iter(transactions)
+                first = next(transactions, None)
+        except Exception as e:
+            print(f"Error reading {extension} file directly, falling back to text extraction: {e}")
+            transactions = None
+        if transactions is not None:
+            if first is not None:
+                yield first
+                yield from transactions
+            return
+    
+    # Extraction yields page by page and the parser consumes pages as they arrive
+    pages = iter_text_from_file(filepath)
+    first_page = next(pages, '')
+    fingerprint = fingerprint_layout(first_page, bank_name)
+    parser = StatementParser(preferred_shape=layout_registry.lookup(fingerprint))
+    yield from parser.parse(itertools.chain([first_page], pages))
+    layout_registry.remember(fingerprint, parser.shape)
+    print(f"Parsed {os.path.basename(filepath)} ({describe_fingerprint(fingerprint)}) as "
+          f"{parser.shape or 'no known statement layout'}{' from the layout cache' if parser.used_preferred else ''}")
+
 def extract_data_from_text(text):
     """Extract transaction data from text with enhanced pattern matching"""
-    transactions = []
+    return list(iter_transactions([text]))
+
+def categorize_description(description):
+    """Return the category name for a transaction description, based on its keywords"""
+    return category_rules.engine().categorize(description)
+
+def categorize_transactions(transactions, batch=None, overrides=None):
+    """
+    Categorize transactions based on description with enhanced categories
     
-    # Split text into lines for better processing
-    lines = text.split('\n')
+    Args:
+        transactions (list): Transaction dicts
+        batch (bool): Categorize all descriptions in one vectorized pass; by default
+            used for statements of BATCH_CATEGORIZE_ROWS transactions or more
+        overrides (dict): The user's category overrides, from load_category_overrides
     
-    # Parse the structured format in the PDF by looking for transaction blocks
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        
-        # Look for transaction date pattern
-        if re.match(r'\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4}', line) and i + 4 < len(lines):
-            # Check if this looks like a transaction block
-            # Date should be followed by description, type, amount, balance
-            try:
-                date = line.strip()
-                description = lines[i + 1].strip()
-                trans_type = lines[i + 2].strip()
-                amount_raw = lines[i + 3].strip()
-                balance_raw = lines[i + 4].strip()
-                
-                # Validate that this is actually a transaction
-                # Check if type is Credit or Debit and amount looks like money
-                if trans_type in ['Credit', 'Debit'] and re.search(r'[\d,]+\.?\d{0,2}', amount_raw):
-                    # Clean up amount and balance
-                    amount = re.sub(r'[^\d\.]', '', amount_raw) if amount_raw else '0'
-                    balance = re.sub(r'[^\d\.]', '', balance_raw) if balance_raw else '0'
-                    
-                    # Handle parentheses for debits
-                    if '(' in amount_raw and ')' in amount_raw:
-                        trans_type = 'Debit'
-                        amount = amount.replace('(', '').replace(')', '')
-                    
-                    if float(amount) > 0:
-                        transactions.append({
-                            'date': date,
-                            'description': description,
-                            'amount': amount,
-                            'balance': balance,
-                            'type': trans_type
-                        })
-                    
-                    i += 5  # Move to next potential transaction
-                    continue
-            except (IndexError, ValueError):
-                # Not a valid transaction block, continue
-                pass
-        
-        i += 1
+    Returns:
+        dict: Category name to list of transactions, for every category
+    """
+    transactions = list(transactions)
+    if batch is None:
+        batch = len(transactions) >= BATCH_CATEGORIZE_ROWS
+    
+    # One rulebook version for the whole statement, even if the rules file changes meanwhile
+    names = categorize_descriptions(category_rules.engine(),
+                                    pd.Series([t['description'] for t in transactions], dtype=object),
+                                    category_memo, batch, overrides)
+    
+    categories = {category: [] for category in CATEGORY_NAMES}
+    for transaction, category in zip(transactions, names):
+        categories[category].append(transaction)
+    return categories
+
+def categorize_table(table, overrides=None, engine=None):
+    """Return the transaction table with its category code column filled in"""
+    names = categorize_descriptions(engine or category_rules.engine(), table.frame['description'], category_memo,
+                                    overrides=overrides)
+    return table.with_categories(names.map(CATEGORY_CODES).to_numpy())
+
+def create_excel_report(transactions, filename, summary=None):
+    """
+    Create Excel report from categorized transactions with enhanced analytics dashboard
     
-    # If no transactions found with the structured approach, try the previous regex patterns
-    if not transactions:
-        # Enhanced regex patterns for different bank statement formats
-        # Pattern 1: Date, Description, Amount, Balance (common format)
-        pattern1 = r'(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})\s+([^$]*?)\s+\$?([\d,]+\.?\d{0,2})\s+\$?([\d,]+\.?\d{0,2})'
-        
-        # Pattern 2: Date, Description, Debit, Credit, Balance
-        pattern2 = r'(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})\s+([^$]*?)\s+\(?[\$]?([\d,]+\.?\d{0,2})\)?\s+\(?[\$]?([\d,]+\.?\d{0,2})\)?\s+\$?([\d,]+\.?\d{0,2})'
-        
-        # Pattern 3: Generic pattern for transactions
-        pattern3 = r'(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})\s+([^$]*?)\s+\(?[\$]?([\d,]+\.?\d{0,2})\)?'
-        
-        # Try pattern 1 first (most common format)
-        matches = re.findall(pattern1, text, re.IGNORECASE)
-        for match in matches:
-            date, description, amount, balance = match
-            # Clean up amount and balance
-            amount = re.sub(r'[^\d\.]', '', amount) if amount else '0'
-            balance = re.sub(r'[^\d\.]', '', balance) if balance else '0'
-            
-            if amount and float(amount) > 0:
-                # Determine transaction type based on context
-                desc_lower = description.lower()
-                if 'deposit' in desc_lower or 'credited' in desc_lower or 'cr' in desc_lower or 'salary' in desc_lower:
-                    trans_type = 'Credit'
-                elif 'withdrawal' in desc_lower or 'debited' in desc_lower or 'dr' in desc_lower or 'atm' in desc_lower:
-                    trans_type = 'Debit'
-                else:
-                    # Default heuristic
-                    trans_type = 'Credit' if 'cr' in desc_lower else 'Debit'
-                
-                transactions.append({
-                    'date': date,
-                    'description': description.strip(),
-                    'amount': amount,
-                    'balance': balance,
-                    'type': trans_type
-                })
-        
-        # If no transactions found with pattern 1, try pattern 2
-        if not transactions:
-            matches = re.findall(pattern2, text, re.IGNORECASE)
-            for match in matches:
-                date, description, debit, credit, balance = match
-                # Clean up values
-                debit = re.sub(r'[^\d\.\(\)]', '', debit) if debit else '0'
-                credit = re.sub(r'[^\d\.\(\)]', '', credit) if credit else '0'
-                balance = re.sub(r'[^\d\.]', '', balance) if balance else '0'
-                
-                # Remove parentheses and handle negative values
-                if '(' in debit and ')' in debit:
-                    debit = debit.replace('(', '').replace(')', '')
-                    trans_type = 'Debit'
-                    amount = debit
-                elif '(' in credit and ')' in credit:
-                    credit = credit.replace('(', '').replace(')', '')
-                    trans_type = 'Credit'
-                    amount = credit
-                elif credit and float(credit) > 0:
-                    trans_type = 'Credit'
-                    amount = credit
-                elif debit and float(debit) > 0:
-                    trans_type = 'Debit'
-                    amount = debit
-                else:
-                    trans_type = 'Debit'
-                    amount = '0'
-                
-                transactions.append({
-                    'date': date,
-                    'description': description.strip(),
-                    'amount': amount,
-                    'balance': balance,
-                    'type': trans_type
-                })
-        
-        # If still no transactions, try pattern 3 (generic)
-        if not transactions:
-            matches = re.findall(pattern3, text, re.IGNORECASE)
-            for match in matches:
-                date, description, amount = match
-                # Clean up amount
-                amount = re.sub(r'[^\d\.]', '', amount) if amount else '0'
-                
-                if amount and float(amount) > 0:
-                    # Determine transaction type based on description
-                    desc_lower = description.lower()
-                    if 'deposit' in desc_lower or 'credited' in desc_lower or 'cr' in desc_lower or 'salary' in desc_lower:
-                        trans_type = 'Credit'
-                    elif 'interest' in desc_lower:
-                        trans_type = 'Interest'
-                    elif 'transfer' in desc_lower or 'trf' in desc_lower or 'wire' in desc_lower:
-                        trans_type = 'Transfers'
-                    elif 'loan' in desc_lower or 'mortgage' in desc_lower:
-                        trans_type = 'Loans'
-                    elif 'fee' in desc_lower or 'charge' in desc_lower or 'commission' in desc_lower or 'service' in desc_lower:
-                        trans_type = 'Fees'
-                    elif 'withdrawal' in desc_lower or 'atm' in desc_lower or 'cash' in desc_lower:
-                        trans_type = 'Cash'
-                    elif 'investment' in desc_lower or 'stock' in desc_lower or 'mutual fund' in desc_lower or 'shares' in desc_lower:
-                        trans_type = 'Investments'
-                    elif 'refund' in desc_lower or 'returned' in desc_lower or 'credit' in desc_lower:
-                        trans_type = 'Refunds'
-                    elif 'insurance' in desc_lower or 'premium' in desc_lower:
-                        trans_type = 'Insurance'
-                    elif 'tax' in desc_lower or 'irs' in desc_lower or 'revenue' in desc_lower:
-                        trans_type = 'Taxes'
-                    elif 'payment' in desc_lower or 'pay' in desc_lower or 'bill' in desc_lower or 'credit card' in desc_lower or 'grocery' in desc_lower or 'electricity' in desc_lower or 'store' in desc_lower:
-                        trans_type = 'Payments'
-                    elif 'debit' in desc_lower or 'debited' in desc_lower:
-                        trans_type = 'Withdrawals'
-                    else:
-                        trans_type = 'Debit'
-                    
-                    transactions.append({
-                        'date': date,
-                        'description': description.strip(),
-                        'amount': amount,
-                        'balance': '0',  # No balance available
-                        'type': trans_type
-                    })
+    The workbook is written in one streaming pass; styles, widths, the logo and
+    the charts are declared with each sheet, so the file is never re-opened.
     
-    # Remove duplicates based on date, description, and amount
-    seen = set()
-    unique_transactions = []
-    for transaction in transactions:
-        key = (transaction['date'], transaction['description'], transaction['amount'])
-        if key not in seen:
-            seen.add(key)
-            unique_transactions.append(transaction)
-    
-    return unique_transactions
-
-def categorize_transactions(transactions):
-    """Categorize transactions based on description and amount with enhanced categories"""
-    categories = {
-        'Deposits': [],
-        'Withdrawals': [],
-        'Loans': [],
-        'Interest': [],
-        'Fees': [],
-        'Transfers': [],
-        'Payments': [],
-        'Cash': [],
-        'Investments': [],
-        'Refunds': [],
-        'Insurance': [],
-        'Taxes': [],
-        'UPI Transfers': [],
-        'ATM Deposits': [],
-        'ATM Withdrawals': [],
-        'Utility Bills': [],
-        'EMI/Loan Repayments': [],
-        'NEFT/RTGS': [],
-        'Other': []
-    }
+    Args:
+        transactions: Categorized TransactionTable, or a category name to transaction list mapping
+        filename (str): Output Excel filename
+        summary (StatementSummary): Totals of the transactions, computed here if not given
     
-    for transaction in transactions:
-        desc = transaction['description'].lower()
-        amount = float(transaction['amount'].replace(',', ''))
-        
-        # Categorize based on keywords in description
-        if any(keyword in desc for keyword in ['deposit', 'salary', 'income', 'payroll']) and 'atm' not in desc:
-            categories['Deposits'].append(transaction)
-        elif any(keyword in desc for keyword in ['interest']):
-            categories['Interest'].append(transaction)
-        elif any(keyword in desc for keyword in ['transfer', 'trf', 'wire']) and 'neft' not in desc and 'rtgs' not in desc and 'upi' not in desc:
-            categories['Transfers'].append(transaction)
-        elif any(keyword in desc for keyword in ['loan', 'mortgage']) and 'emi' not in desc and 'repayment' not in desc:
-            categories['Loans'].append(transaction)
-        elif any(keyword in desc for keyword in ['fee', 'charge', 'commission', 'service']):
-            categories['Fees'].append(transaction)
-        elif any(keyword in desc for keyword in ['withdrawal']) and 'atm' not in desc:
-            categories['Withdrawals'].append(transaction)
-        elif any(keyword in desc for keyword in ['atm']):
-            if 'deposit' in desc or 'cr' in desc:
-                categories['ATM Deposits'].append(transaction)
-            else:
-                categories['ATM Withdrawals'].append(transaction)
-        elif any(keyword in desc for keyword in ['investment', 'stock', 'mutual fund', 'shares']):
-            categories['Investments'].append(transaction)
-        elif any(keyword in desc for keyword in ['refund', 'returned', 'credit']):
-            categories['Refunds'].append(transaction)
-        elif any(keyword in desc for keyword in ['insurance', 'premium']):
-            categories['Insurance'].append(transaction)
-        elif any(keyword in desc for keyword in ['tax', 'irs', 'revenue']):
-            categories['Taxes'].append(transaction)
-        elif any(keyword in desc for keyword in ['payment', 'pay', 'bill']) and any(keyword in desc for keyword in ['electricity', 'tv', 'mobile', 'recharge', 'phone', 'dth', 'broadband', 'water', 'gas']):
-            categories['Utility Bills'].append(transaction)
-        elif any(keyword in desc for keyword in ['emi', 'loan repayment', 'loan emi']):
-            categories['EMI/Loan Repayments'].append(transaction)
-        elif any(keyword in desc for keyword in ['upi']):
-            categories['UPI Transfers'].append(transaction)
-        elif any(keyword in desc for keyword in ['neft', 'rtgs']):
-            categories['NEFT/RTGS'].append(transaction)
-        elif any(keyword in desc for keyword in ['cash']):
-            categories['Cash'].append(transaction)
-        elif any(keyword in desc for keyword in ['debit', 'debited']) and 'atm' not in desc:
-            categories['Withdrawals'].append(transaction)
-        else:
-            categories['Other'].append(transaction)
-            
-    return categories
+    Returns:
+        StatementSummary: The totals shown in the report
+    """
+    table = as_transaction_table(transactions)
+    if summary is None:
+        summary = summarize(table)
+    
+    report = report_template.new_report(filename)
+    
+    # Create detailed summary sheet by category (this will show all categories including those with 0 transactions)
+    detailed_rows = summary.detailed_summary_rows()
+    report.add_sheet('Detailed Summary', list(detailed_rows[0]), (tuple(row.values()) for row in detailed_rows),
+                     highlight_negative=True, branded=True)
+    
+    # Write every transaction once, with a per-category index into the list
+    report.add_category_views(table)
+    
+    # Create analytics dashboard
+    create_enhanced_analytics_dashboard(report, summary)
+    
+    report.save()
+    return summary
 
-def create_excel_report(categories, filename):
-    """Create Excel report from categorized transactions with enhanced analytics dashboard"""
-    # Calculate totals for each category
-    category_totals = {}
-    total_credit = 0
-    total_debit = 0
-    
-    # Calculate totals for each category
-    for category, transactions in categories.items():
-        transaction_count = len(transactions)
-        total_amount = sum(float(t['amount'].replace(',', '')) for t in transactions)
-        
-        # Calculate credit and debit amounts
-        credit_amount = sum(float(t['amount'].replace(',', '')) for t in transactions if t['type'] == 'Credit')
-        debit_amount = sum(float(t['amount'].replace(',', '')) for t in transactions if t['type'] == 'Debit')
-        
-        category_totals[category] = {
-            'count': transaction_count,
-            'total': round(total_amount, 2),
-            'credit': round(credit_amount, 2),
-            'debit': round(debit_amount, 2)
-        }
-        
-        total_credit += credit_amount
-        total_debit += debit_amount
-    
-    # Create Excel writer
-    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-        # Create detailed summary sheet by category (this will show all categories including those with 0 transactions)
-        detailed_summary = []
-        # Define all categories to ensure they're all included
-        all_categories = [
-            'Deposits', 'Withdrawals', 'Loans', 'Interest', 'Fees', 
-            'Transfers', 'Payments', 'Cash', 'Investments', 'Refunds', 
-            'Insurance', 'Taxes', 'UPI Transfers', 'ATM Deposits', 
-            'ATM Withdrawals', 'Utility Bills', 'EMI/Loan Repayments', 
-            'NEFT/RTGS', 'Other'
-        ]
-        
-        for category in all_categories:
-            transactions = categories.get(category, [])
-            if transactions:  # Category has transactions
-                transaction_count = len(transactions)
-                total_amount = sum(float(t['amount'].replace(',', '')) for t in transactions)
-                credit_amount = sum(float(t['amount'].replace(',', '')) for t in transactions if t['type'] == 'Credit')
-                debit_amount = sum(float(t['amount'].replace(',', '')) for t in transactions if t['type'] == 'Debit')
-                
-                detailed_summary.append({
-                    'Category': category,
-                    'Transaction Count': transaction_count,
-                    'Total Amount': round(total_amount, 2),
-                    'Credit Amount': round(credit_amount, 2),
-                    'Debit Amount': round(debit_amount, 2),
-                    'Net Amount': round(credit_amount - debit_amount, 2)
-                })
-            else:
-                # Include categories with no transactions but show 0 values
-                detailed_summary.append({
-                    'Category': category,
-                    'Transaction Count': 0,
-                    'Total Amount': 0,
-                    'Credit Amount': 0,
-                    'Debit Amount': 0,
-                    'Net Amount': 0
-                })
-        
-        # Add overall totals to detailed summary
-        detailed_summary.append({
-            'Category': 'TOTAL',
-            'Transaction Count': sum(len(transactions) for transactions in categories.values()),
-            'Total Amount': round(total_credit + total_debit, 2),
-            'Credit Amount': round(total_credit, 2),
-            'Debit Amount': round(total_debit, 2),
-            'Net Amount': round(total_credit - total_debit, 2)
-        })
-        
-        detailed_summary_df = pd.DataFrame(detailed_summary)
-        detailed_summary_df.to_excel(writer, sheet_name='Detailed Summary', index=False)
-        
-        # Create sheets for ALL categories (even those with 0 transactions)
-        for category in all_categories:
-            transactions = categories.get(category, [])
-            # Create a sheet for every category, even if it has no transactions
-            df = pd.DataFrame(transactions)
-            # If no transactions, create an empty DataFrame with appropriate columns
-            if df.empty:
-                # Create empty DataFrame with standard columns
-                df = pd.DataFrame(columns=['date', 'description', 'amount', 'type', 'balance'])
-            
-            # Reorder columns for better presentation
-            column_order = ['date', 'description', 'amount', 'type']
-            if 'balance' in df.columns:
-                column_order.append('balance')
-            # Only reorder if columns exist in the DataFrame
-            if all(col in df.columns for col in column_order):
-                df = df[column_order]
-            # Sanitize category name for use as sheet name (remove invalid characters)
-            sanitized_category = category.replace('/', ' ').replace('\\', ' ').replace('?', ' ').replace('*', ' ').replace('[', ' ').replace(']', ' ').replace(':', ' ')
-            # Truncate to 31 characters (Excel limit)
-            sheet_name = sanitized_category[:31]
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            
-            # Format the worksheet
-            try:
-                worksheet = writer.sheets[sheet_name]
-                # Auto-adjust column widths
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = (max_length + 2)
-                    worksheet.column_dimensions[column_letter].width = min(adjusted_width, 50)
-            except:
-                # If we can't access the worksheet, continue without formatting
-                pass
-        
-        # Create analytics dashboard
-        create_enhanced_analytics_dashboard(writer, categories, total_credit, total_debit, category_totals)
+def summary_path_for(excel_file_path):
+    """Return where the totals of a report are kept, next to its Excel file"""
+    return os.path.splitext(excel_file_path)[0] + '.summary.json'
+
+def load_report_summary(excel_file_path):
+    """
+    Load the totals of an Excel report
     
-    # Re-open the file to add charts and styling
-    try:
-        from openpyxl import load_workbook
-        from openpyxl.drawing.image import Image as ExcelImage
-        from openpyxl.styles import PatternFill, Font, Alignment
-        workbook = load_workbook(filename)
-        
-        # Add styling to summary sheets
-        # Header styling
-        header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        header_font = Font(color='FFFFFF', bold=True)
-        
-        # Style Enhanced Summary sheet
-        if 'Enhanced Summary' in workbook.sheetnames:
-            summary_sheet = workbook['Enhanced Summary']
-            for cell in summary_sheet[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center')
-            
-            # Highlight negative values in red
-            for row in summary_sheet.iter_rows(min_row=2, max_row=summary_sheet.max_row):
-                for cell in row:
-                    if isinstance(cell.value, (int, float)) and cell.value < 0:
-                        cell.font = Font(color='FF0000')  # Red color for negative values
-        
-        # Style Detailed Summary sheet with company logo and attractive background
-        if 'Detailed Summary' in workbook.sheetnames:
-            detailed_sheet = workbook['Detailed Summary']
-            
-            # Style header row (A1-F1) similar to other sheets without violet background
-            # Skip N1 and O1 cells as they contain logo and text
-            for col in range(1, min(16, detailed_sheet.max_column + 1)):  # Columns A-P (1-16)
-                if col != 14 and col != 15:  # Skip columns N (14) and O (15)
-                    cell = detailed_sheet.cell(row=1, column=col)
-                    cell.fill = header_fill  # Standard header fill from other sheets
-                    cell.font = header_font  # Standard header font from other sheets
-                    cell.alignment = Alignment(horizontal='center')
-            
-            # Highlight negative values in red
-            for row in detailed_sheet.iter_rows(min_row=2, max_row=detailed_sheet.max_row):
-                for cell in row:
-                    if isinstance(cell.value, (int, float)) and cell.value < 0:
-                        cell.font = Font(color='FF0000')  # Red color for negative values
-            
-            # Add company logo in cell N1 and text in cell O1 (without header background color)
-            logo_path = 'static/images/logo.png'  # Default logo path
-            if os.path.exists(logo_path):
-                try:
-                    # Add logo to cell N1 (14th column, 1st row) with smaller size
-                    logo = ExcelImage(logo_path)
-                    logo.width = 80  # Smaller size
-                    logo.height = 80
-                    detailed_sheet.add_image(logo, 'N1')  # Position logo at N1
-                    
-                    # Add company title in cell O1 (15th column, 1st row) with smaller size
-                    title_cell = detailed_sheet['O1']
-                    title_cell.value = "E-Faws Tech Pvt Limited"
-                    title_cell.font = Font(bold=True, size=10, color='800080')  # Smaller purple color text
-                    title_cell.alignment = Alignment(horizontal='left')
-                    
-                    # Add subtitle in cell O11
-                    subtitle_cell = detailed_sheet['O2']
-                    subtitle_cell.value = "Bank Statement Analyzer"
-                    subtitle_cell.font = Font(bold=True, size=10, color='800080')  # Purple color
-                    subtitle_cell.alignment = Alignment(horizontal='left')
-                except Exception as e:
-                    print(f"Warning: Could not add logo to Excel report: {e}")
-            else:
-                print(f"Note: Logo file not found at {logo_path}")
-        
-        # Style category sheets
-        for category in categories.keys():
-            if category in workbook.sheetnames:
-                worksheet = workbook[category]
-                # Header styling
-                for cell in worksheet[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal='center')
-                
-                # Highlight debit transactions in red (if we can find the right columns)
-                # This is more complex without knowing the exact column structure
-        
-        # Save the styled workbook
-        workbook.save(filename)
-    except Exception as e:
-        print(f"Error styling Excel workbook: {e}")
-        # If styling fails, the file is still usable without styling
+    Reports saved before totals were written alongside them are read from
+    their 'Detailed Summary' sheet instead.
+    
+    Returns:
+        StatementSummary: Totals of the report
+    """
+    summary_path = summary_path_for(excel_file_path)
+    if os.path.exists(summary_path):
+        return StatementSummary.load(summary_path)
+    return StatementSummary.from_detailed_summary(pd.read_excel(excel_file_path, sheet_name='Detailed Summary'))
 
 # Function to save analysis to database
-def save_analysis_to_db(user_id, name, bank_name, customer_number, file_name, excel_file_path, pdf_file_path=None):
-    """Save bank statement analysis to database"""
+def save_analysis_to_db(user_id, name, bank_name, customer_number, file_name, excel_file_path, pdf_file_path=None, content_hash=None, data_file_path=None):
+    """Save bank statement analysis to database and return the new analysis id (False on failure)"""
     connection = get_db_connection()
     if connection is None:
         return False
@@ -1004,11 +829,11 @@ def save_analysis_to_db(user_id, name, bank_name, customer_number, file_name, ex
         cursor = connection.cursor()
         cursor.execute("""
             INSERT INTO bank_statement_analyses 
-            (user_id, name, bank_name, customer_number, file_name, excel_file_path, pdf_file_path) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (user_id, name, bank_name, customer_number, file_name, excel_file_path, pdf_file_path))
+            (user_id, name, bank_name, customer_number, file_name, excel_file_path, pdf_file_path, content_hash, data_file_path) 
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (user_id, name, bank_name, customer_number, file_name, excel_file_path, pdf_file_path, content_hash, data_file_path))
         connection.commit()
-        return True
+        return cursor.lastrowid
     except Error as e:
         print(f"Error saving analysis to database: {e}")
         return False
@@ -1018,6 +843,74 @@ def save_analysis_to_db(user_id, name, bank_name, customer_number, file_name, ex
         if connection and connection.is_connected():
             connection.close()
 
+def find_indexed_statement(user_id, content_hash):
+    """Return the artifacts of an earlier analysis of the same file bytes, or None"""
+    connection = get_db_connection()
+    if connection is None:
+        return None
+    
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT result_file_path, excel_file_path, pdf_file_path, transaction_count
+            FROM statement_content_index 
+            WHERE user_id = %s AND content_hash = %s
+        """, (user_id, content_hash))
+        
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        
+        indexed = {
+            "result_file_path": row[0],
+            "excel_file_path": row[1],
+            "pdf_file_path": row[2],
+            "transaction_count": row[3] or 0
+        }
+        # The parsed result may have been cleaned up from disk since it was indexed
+        if not os.path.exists(indexed["result_file_path"]):
+            return None
+        return indexed
+    except Error as e:
+        print(f"Error looking up content hash index: {e}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if connection and connection.is_connected():
+            connection.close()
+
+def index_statement_content(user_id, content_hash, result_file_path, excel_file_path, pdf_file_path, transaction_count):
+    """Record the artifacts produced for a file's bytes so repeat uploads can reuse them"""
+    connection = get_db_connection()
+    if connection is None:
+        return False
+    
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            INSERT INTO statement_content_index 
+            (user_id, content_hash, result_file_path, excel_file_path, pdf_file_path, transaction_count) 
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE 
+                result_file_path = VALUES(result_file_path),
+                excel_file_path = VALUES(excel_file_path),
+                pdf_file_path = VALUES(pdf_file_path),
+                transaction_count = VALUES(transaction_count)
+        """, (user_id, content_hash, result_file_path, excel_file_path, pdf_file_path, transaction_count))
+        connection.commit()
+        return True
+    except Error as e:
+        print(f"Error saving content hash index: {e}")
+        return False
+    finally:
+        if cursor:
+            cursor.close()
+        if connection and connection.is_connected():
+            connection.close()
+
 def get_user_analyses(user_id, filter_date=None, filter_day=None):
     """Get all analyses for a user with optional date/day filtering"""
     connection = get_db_connection()
@@ -1113,7 +1006,10 @@ def delete_analysis(analysis_id, user_id):
             WHERE id = %s AND user_id = %s
         """, (analysis_id, user_id))
         connection.commit()
-        return cursor.rowcount > 0
+        if cursor.rowcount > 0:
+            report_cache.remove(analysis_id)
+            return True
+        return False
     except Error as e:
         print(f"Error deleting analysis: {e}")
         return False
@@ -1123,22 +1019,13 @@ def delete_analysis(analysis_id, user_id):
         if connection and connection.is_connected():
             connection.close()
 
-def create_analytics_dashboard(writer, categories, total_credit, total_debit):
+def create_analytics_dashboard(writer, summary):
     """Create analytics dashboard with charts"""
-    # Prepare data for charts
-    cashflow_data = []
-    
-    for category, transactions in categories.items():
-        credit_amount = sum(float(t['amount'].replace(',', '')) for t in transactions if t['type'] == 'Credit')
-        debit_amount = sum(float(t['amount'].replace(',', '')) for t in transactions if t['type'] == 'Debit')
-        
-        # Only include categories with significant amounts
-        if credit_amount > 0 or debit_amount > 0:
-            cashflow_data.append({
-                'Category': category,
-                'Credit': round(credit_amount, 2),
-                'Debit': round(debit_amount, 2)
-            })
+    total_credit = summary.total_credit
+    total_debit = summary.total_debit
+    
+    # Only include categories with significant amounts
+    cashflow_data = [row for row in summary.cashflow_rows() if row['Credit'] > 0 or row['Debit'] > 0]
     
     # Create cashflow summary sheet
     cashflow_df = pd.DataFrame(cashflow_data)
@@ -1178,35 +1065,45 @@ def create_analytics_dashboard(writer, categories, total_credit, total_debit):
     daily_balance_df = pd.DataFrame(daily_balance_data)
     daily_balance_df.to_excel(writer, sheet_name='Daily Average Balance', index=False)
 
-def create_enhanced_analytics_dashboard(writer, categories, total_credit, total_debit, category_totals):
+def build_cashflow_charts(category_count):
+    """Declare the charts of the 'Cashflow Summary' sheet, which lists category_count categories"""
+    # 1. Cashflow Summary Pie Chart
+    pie_chart = PieChart()
+    pie_chart.title = "Cashflow Summary by Category"
+    pie_chart.add_data(sheet_reference('Cashflow Summary', 3, 1, category_count+1), titles_from_data=True)
+    pie_chart.set_categories(sheet_reference('Cashflow Summary', 1, 2, category_count+1))
+    
+    # 2. Enhanced Bar Chart for Credits vs Debits by Category
+    bar_chart = BarChart()
+    bar_chart.title = "Credits vs Debits by Category"
+    bar_chart.x_axis.title = "Category"
+    bar_chart.y_axis.title = "Amount"
+    bar_chart.grouping = "clustered"
+    bar_chart.add_data(sheet_reference('Cashflow Summary', 2, 1, category_count+1), titles_from_data=True)
+    bar_chart.add_data(sheet_reference('Cashflow Summary', 3, 1, category_count+1), titles_from_data=True)
+    bar_chart.set_categories(sheet_reference('Cashflow Summary', 1, 2, category_count+1))
+    
+    return [(pie_chart, "F2"), (bar_chart, "F15")]
+
+def build_balance_charts(sheet_name, label, row_count):
+    """Declare the area chart of a monthly or daily average balance sheet"""
+    area_chart = AreaChart()
+    area_chart.title = f"{sheet_name.split()[0]} Average Balance Trend"
+    area_chart.x_axis.title = label
+    area_chart.y_axis.title = "Balance"
+    area_chart.style = 13  # Attractive style
+    area_chart.add_data(sheet_reference(sheet_name, 2, 1, row_count+1), titles_from_data=True)
+    area_chart.set_categories(sheet_reference(sheet_name, 1, 2, row_count+1))
+    
+    return [(area_chart, "D2")]
+
+def create_enhanced_analytics_dashboard(report, summary):
     """Create enhanced analytics dashboard with attractive charts and visualizations"""
-    # Prepare data for charts
-    cashflow_data = []
-    
-    # Define all categories to ensure they're all included
-    all_categories = [
-        'Deposits', 'Withdrawals', 'Loans', 'Interest', 'Fees', 
-        'Transfers', 'Payments', 'Cash', 'Investments', 'Refunds', 
-        'Insurance', 'Taxes', 'UPI Transfers', 'ATM Deposits', 
-        'ATM Withdrawals', 'Utility Bills', 'EMI/Loan Repayments', 
-        'NEFT/RTGS', 'Other'
-    ]
-    
-    for category in all_categories:
-        transactions = categories.get(category, [])
-        credit_amount = sum(float(t['amount'].replace(',', '')) for t in transactions if t.get('type') == 'Credit')
-        debit_amount = sum(float(t['amount'].replace(',', '')) for t in transactions if t.get('type') == 'Debit')
-        
-        # Include all categories, even those with 0 amounts
-        cashflow_data.append({
-            'Category': category,
-            'Credit': round(credit_amount, 2),
-            'Debit': round(debit_amount, 2)
-        })
+    total_credit = summary.total_credit
+    total_debit = summary.total_debit
     
-    # Create cashflow summary sheet
-    cashflow_df = pd.DataFrame(cashflow_data)
-    cashflow_df.to_excel(writer, sheet_name='Cashflow Summary', index=False)
+    # Prepare data for charts, including all categories even those with 0 amounts
+    cashflow_data = summary.cashflow_rows()
     
     # Create monthly average balance data (simulated for demonstration)
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
@@ -1226,9 +1123,6 @@ def create_enhanced_analytics_dashboard(writer, categories, total_credit, total_
             'Average Balance': max(0, round(base_balance, 2))
         })
     
-    monthly_balance_df = pd.DataFrame(monthly_balance_data)
-    monthly_balance_df.to_excel(writer, sheet_name='Monthly Average Balance', index=False)
-    
     # Create daily average balance data (simulated for demonstration)
     days = [f'Day {i+1}' for i in range(30)]
     daily_balance_data = []
@@ -1249,188 +1143,28 @@ def create_enhanced_analytics_dashboard(writer, categories, total_credit, total_
             'Average Balance': max(0, round(daily_base_balance, 2))
         })
     
-    daily_balance_df = pd.DataFrame(daily_balance_data)
-    daily_balance_df.to_excel(writer, sheet_name='Daily Average Balance', index=False)
+    # Charts are defined once per worker and copied into each report
+    report.add_sheet('Cashflow Summary', ['Category', 'Credit', 'Debit'],
+                     ((row['Category'], row['Credit'], row['Debit']) for row in cashflow_data),
+                     charts=report_template.charts(('Cashflow Summary', len(cashflow_data)),
+                                                   lambda: build_cashflow_charts(len(cashflow_data))))
+    
+    for sheet_name, label, data in (('Monthly Average Balance', 'Month', monthly_balance_data),
+                                    ('Daily Average Balance', 'Day', daily_balance_data)):
+        report.add_sheet(sheet_name, [label, 'Average Balance'],
+                         ((row[label], row['Average Balance']) for row in data),
+                         charts=report_template.charts((sheet_name, len(data)),
+                                                       lambda: build_balance_charts(sheet_name, label, len(data))))
     
     # Add chart data sheet
     chart_data = []
     for item in cashflow_data:
         if item['Credit'] > 0:
-            chart_data.append({'Type': f"{item['Category']} (Credit)", 'Amount': item['Credit']})
+            chart_data.append((f"{item['Category']} (Credit)", item['Credit']))
         if item['Debit'] > 0:
-            chart_data.append({'Type': f"{item['Category']} (Debit)", 'Amount': item['Debit']})
-    
-    chart_df = pd.DataFrame(chart_data)
-    chart_df.to_excel(writer, sheet_name='Chart Data', index=False)
-    
-    # Create category-specific sheets for ALL categories (even those with 0 transactions)
-    for category in all_categories:
-        transactions = categories.get(category, [])
-        # Create a sheet for every category, even if it has no transactions
-        df = pd.DataFrame(transactions)
-        # If no transactions, create an empty DataFrame with appropriate columns
-        if df.empty:
-            # Create empty DataFrame with standard columns
-            df = pd.DataFrame(columns=['date', 'description', 'amount', 'type', 'balance'])
-        
-        # Reorder columns for better presentation
-        column_order = ['date', 'description', 'amount', 'type']
-        if 'balance' in df.columns:
-            column_order.append('balance')
-        # Only reorder if columns exist in the DataFrame
-        if all(col in df.columns for col in column_order):
-            df = df[column_order]
-        
-        # Sanitize category name for use as sheet name (remove invalid characters)
-        sanitized_category = category.replace('/', ' ').replace('\\', ' ').replace('?', ' ').replace('*', ' ').replace('[', ' ').replace(']', ' ').replace(':', ' ')
-        # Truncate to 31 characters (Excel limit)
-        sheet_name = sanitized_category[:31]
-        
-        df.to_excel(writer, sheet_name=f"{sheet_name} Details", index=False)
-
-        # If no transactions, create an empty DataFrame with appropriate columns
-        if df.empty:
-            # Create empty DataFrame with standard columns
-            df = pd.DataFrame(columns=['date', 'description', 'amount', 'type', 'balance'])
-        
-        # Reorder columns for better presentation
-        column_order = ['date', 'description', 'amount', 'type']
-        if 'balance' in df.columns:
-            column_order.append('balance')
-        # Only reorder if columns exist in the DataFrame
-        if all(col in df.columns for col in column_order):
-            df = df[column_order]
-        
-        # Sanitize category name for use as sheet name (remove invalid characters)
-        sanitized_category = category.replace('/', ' ').replace('\\', ' ').replace('?', ' ').replace('*', ' ').replace('[', ' ').replace(']', ' ').replace(':', ' ')
-        # Truncate to 31 characters (Excel limit)
-        sheet_name = sanitized_category[:31]
-        
-        df.to_excel(writer, sheet_name=f"{sheet_name} Details", index=False)
-    
-    # Access the workbook and add charts
-    workbook = writer.book
-    
-    # Style the dashboard sheets
-    from openpyxl.styles import PatternFill, Font, Alignment
-    header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-    header_font = Font(color='FFFFFF', bold=True)
-    
-    # Style cashflow summary sheet
-    if 'Cashflow Summary' in workbook.sheetnames:
-        cashflow_sheet = workbook['Cashflow Summary']
-        for cell in cashflow_sheet[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
-    
-    # Style monthly average balance sheet
-    if 'Monthly Average Balance' in workbook.sheetnames:
-        monthly_sheet = workbook['Monthly Average Balance']
-        for cell in monthly_sheet[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
-    
-    # Style daily average balance sheet
-    if 'Daily Average Balance' in workbook.sheetnames:
-        daily_sheet = workbook['Daily Average Balance']
-        for cell in daily_sheet[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
-    
-    # 1. Cashflow Summary Pie Chart
-    if 'Cashflow Summary' in workbook.sheetnames:
-        cashflow_sheet = workbook['Cashflow Summary']
-        
-        # Create pie chart for cashflow summary
-        pie_chart = PieChart()
-        pie_chart.title = "Cashflow Summary by Category"
-        
-        # Data for the chart (excluding the total row)
-        categories_ref = Reference(cashflow_sheet, min_col=1, min_row=2, max_row=len(cashflow_data)+1)
-        credit_values = Reference(cashflow_sheet, min_col=3, min_row=1, max_row=len(cashflow_data)+1)
-        
-        # Add data to chart
-        pie_chart.add_data(credit_values, titles_from_data=True)
-        pie_chart.set_categories(categories_ref)
-        
-        # Position the chart
-        cashflow_sheet.add_chart(pie_chart, "F2")
-    
-    # 2. Monthly Average Balance Area Chart
-    if 'Monthly Average Balance' in workbook.sheetnames:
-        monthly_sheet = workbook['Monthly Average Balance']
-        
-        # Create area chart for monthly average balance
-        from openpyxl.chart import AreaChart
-        area_chart_monthly = AreaChart()
-        area_chart_monthly.title = "Monthly Average Balance Trend"
-        area_chart_monthly.x_axis.title = "Month"
-        area_chart_monthly.y_axis.title = "Balance"
-        area_chart_monthly.style = 13  # Attractive style
-        
-        # Data for the chart
-        months_data = Reference(monthly_sheet, min_col=1, min_row=2, max_row=len(monthly_balance_data)+1)
-        balance_values = Reference(monthly_sheet, min_col=2, min_row=1, max_row=len(monthly_balance_data)+1)
-        
-        # Add data to chart
-        area_chart_monthly.add_data(balance_values, titles_from_data=True)
-        area_chart_monthly.set_categories(months_data)
-        
-        # Position the chart
-        monthly_sheet.add_chart(area_chart_monthly, "D2")
-    
-    # 3. Daily Average Balance Area Chart
-    if 'Daily Average Balance' in workbook.sheetnames:
-        daily_sheet = workbook['Daily Average Balance']
-        
-        # Create area chart for daily average balance
-        from openpyxl.chart import AreaChart
-        area_chart_daily = AreaChart()
-        area_chart_daily.title = "Daily Average Balance Trend"
-        area_chart_daily.x_axis.title = "Day"
-        area_chart_daily.y_axis.title = "Balance"
-        area_chart_daily.style = 13  # Attractive style
-        
-        # Data for the chart
-        days_data = Reference(daily_sheet, min_col=1, min_row=2, max_row=len(daily_balance_data)+1)
-        daily_balance_values = Reference(daily_sheet, min_col=2, min_row=1, max_row=len(daily_balance_data)+1)
-        
-        # Add data to chart
-        area_chart_daily.add_data(daily_balance_values, titles_from_data=True)
-        area_chart_daily.set_categories(days_data)
-        
-        # Position the chart
-        daily_sheet.add_chart(area_chart_daily, "D2")
-    
-    # 4. Enhanced Bar Chart for Credits vs Debits by Category
-    if 'Cashflow Summary' in workbook.sheetnames:
-        cashflow_sheet = workbook['Cashflow Summary']
-        
-        # Create bar chart
-        from openpyxl.chart import BarChart
-        bar_chart = BarChart()
-        bar_chart.title = "Credits vs Debits by Category"
-        bar_chart.x_axis.title = "Category"
-        bar_chart.y_axis.title = "Amount"
-        bar_chart.grouping = "clustered"
-        
-        # Data for credits and debits
-        categories_ref = Reference(cashflow_sheet, min_col=1, min_row=2, max_row=len(cashflow_data)+1)
-        credit_values = Reference(cashflow_sheet, min_col=2, min_row=1, max_row=len(cashflow_data)+1)
-        debit_values = Reference(cashflow_sheet, min_col=3, min_row=1, max_row=len(cashflow_data)+1)
-        
-        # Add data to chart
-        bar_chart.add_data(credit_values, titles_from_data=True)
-        bar_chart.add_data(debit_values, titles_from_data=True)
-        bar_chart.set_categories(categories_ref)
-        
-        # Position the chart
-        cashflow_sheet.add_chart(bar_chart, "F15")
+            chart_data.append((f"{item['Category']} (Debit)", item['Debit']))
+    report.add_sheet('Chart Data', ['Type', 'Amount'] if chart_data else [], chart_data, filled_header=False)
 
-        
 @app.route('/')
 def index():
     # Always go to the index page
@@ -2098,99 +1832,363 @@ def bank_statement_history():
     user_name = get_user_name(session['user_id'])
     return render_template('bank_statement_history.html', analyses=analyses, filter_date=filter_date, filter_day=filter_day, user_name=user_name)
 
+def load_category_overrides(user_id):
+    """
+    Load all of a user's category overrides in one query
+    
+    Returns:
+        dict: Normalized description to category name (empty if there are none
+            or the database is unavailable)
+    """
+    connection = get_db_connection()
+    if connection is None:
+        return {}
+    
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT description_key, category
+            FROM category_overrides 
+            WHERE user_id = %s
+        """, (user_id,))
+        # Categories may have been renamed since an override was saved
+        return {key: category for key, category in cursor.fetchall() if category in CATEGORY_CODES}
+    except Error as e:
+        print(f"Error loading category overrides: {e}")
+        return {}
+    finally:
+        if cursor:
+            cursor.close()
+        if connection and connection.is_connected():
+            connection.close()
+
+def save_category_overrides(user_id, overrides):
+    """
+    Insert or update a user's category overrides in bulk
+    
+    Args:
+        user_id (int): Owner of the overrides
+        overrides (dict): Normalized description to category name
+    
+    Returns:
+        bool: True if every override was saved
+    """
+    connection = get_db_connection()
+    if connection is None:
+        return False
+    
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        rows = [(user_id, key, category) for key, category in overrides.items()]
+        for start in range(0, len(rows), OVERRIDE_UPSERT_ROWS):
+            cursor.executemany("""
+                INSERT INTO category_overrides (user_id, description_key, category) 
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE category = VALUES(category)
+            """, rows[start:start + OVERRIDE_UPSERT_ROWS])
+        connection.commit()
+        return True
+    except Error as e:
+        print(f"Error saving category overrides: {e}")
+        connection.rollback()
+        return False
+    finally:
+        if cursor:
+            cursor.close()
+        if connection and connection.is_connected():
+            connection.close()
+
+def rules_version_for(engine, overrides):
+    """Return the version of the rules a user's transactions are categorized with: the rulebook plus their overrides"""
+    if not overrides:
+        return engine.version
+    digest = hashlib.sha256(json.dumps(sorted(overrides.items())).encode('utf-8')).hexdigest()
+    return f"{engine.version}-u{digest[:12]}"
+
+def load_analysis_table(data_file_path, engine, overrides):
+    """Load the persisted transactions of an analysis and categorize them"""
+    with open(data_file_path, 'r', encoding='utf-8') as f:
+        table = TransactionTable.from_records(json.load(f))
+    return categorize_table(table, overrides, engine)
+
+def statement_account_info(name, bank_name, customer_number):
+    """Account info shown on the PDF report"""
+    # Account info can be extracted from the document or provided by user
+    return {
+        "bank_name": bank_name if bank_name else "Bank Statement Analyzer",
+        "account_number": customer_number if customer_number else "Extracted from document",
+        "account_holder": name if name else "Client",
+        "statement_period": "Analysis Period",
+        "opening_balance": "$0.00",
+        "closing_balance": "$0.00"
+    }
+
+def render_analysis_report(analysis, kind):
+    """
+    Open a report of an analysis, rendering it from the persisted transactions on first request
+    
+    Reports are cached by analysis and rules version, so they are rebuilt only
+    after the rulebook or the user's category overrides change.
+    
+    Args:
+        analysis (dict): id, user_id, data_file_path, name, bank_name and customer_number of the analysis
+        kind (str): 'xlsx', 'pdf' or 'summary.json'
+    
+    Returns:
+        file: The report, open in binary mode; the caller closes it
+    """
+    # One rulebook version for the whole report, even if the rules file changes meanwhile
+    engine = category_rules.engine()
+    overrides = load_category_overrides(analysis['user_id'])
+    
+    def render(path):
+        table = load_analysis_table(analysis['data_file_path'], engine, overrides)
+        summary = summarize(table)
+        if kind == 'xlsx':
+            create_excel_report(table, path, summary)
+        elif kind == 'pdf':
+            from enhanced_pdf_generator import create_professional_bank_statement
+            account_info = statement_account_info(analysis['name'], analysis['bank_name'], analysis['customer_number'])
+            create_professional_bank_statement(table, path, account_info, summary)
+        else:
+            summary.save(path)
+        print(f"Rendered {kind} report of analysis {analysis['id']} ({len(table)} transactions)")
+    
+    return report_cache.open_or_render(analysis['id'], rules_version_for(engine, overrides), kind, render)
+
+def send_analysis_report(analysis, kind, download_name):
+    """Send the Excel or PDF report of an analysis as an attachment, rendering it first if needed"""
+    if analysis.get('data_file_path'):
+        if not os.path.exists(analysis['data_file_path']):
+            return "File not found", 404
+        try:
+            # Sent from the open file, so cache eviction cannot remove it first
+            report = render_analysis_report(analysis, kind)
+        except Exception as e:
+            print(f"Error rendering {kind} report: {e}")
+            return "Failed to build report", 500
+        return send_file(report, as_attachment=True, download_name=download_name)
+    
+    # Analyses from before on-demand rendering kept their reports as files
+    report_path = analysis['excel_file_path'] if kind == 'xlsx' else analysis.get('pdf_file_path')
+    if not report_path or not os.path.exists(report_path):
+        return "File not found", 404
+    return send_file(report_path, as_attachment=True, download_name=download_name)
+
+def process_bank_statement(job, user_id, name, bank_name, customer_number, filename, filepath, content_hash=None):
+    """
+    Run the analysis pipeline for an uploaded statement inside a background job
+    
+    The upload page downloads the Excel report as soon as the job completes, so
+    it is rendered into the report cache here, off the request path. The PDF
+    report is rendered from the persisted transactions when first downloaded.
+    """
+    # Reuse the parsed result of an earlier upload of the same bytes
+    if content_hash:
+        indexed = find_indexed_statement(user_id, content_hash)
+        if indexed:
+            job.update(progress=90, stage='Reusing previous analysis')
+            # The bytes are already on disk from the earlier upload
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+            analysis_id = save_analysis_to_db(
+                user_id, 
+                name if name else 'User', 
+                bank_name if bank_name else 'Unknown Bank', 
+                customer_number if customer_number else 'N/A', 
+                filename, 
+                '', 
+                None,
+                content_hash,
+                indexed['result_file_path']
+            )
+            analysis = {
+                'id': analysis_id or f"job-{job.id}",
+                'user_id': user_id,
+                'data_file_path': indexed['result_file_path'],
+                'name': name,
+                'bank_name': bank_name,
+                'customer_number': customer_number
+            }
+            # A new analysis id, so its Excel report is not cached yet
+            job.update(progress=95, stage='Building Excel report')
+            render_analysis_report(analysis, 'xlsx').close()
+            return {
+                'analysis_id': analysis_id or None,
+                'file_name': filename,
+                'transaction_count': indexed['transaction_count'],
+                'reused': True,
+                'analysis': analysis
+            }
+    
+    job.update(progress=10, stage='Extracting transactions')
+    transactions = list(iter_file_transactions(filepath, bank_name))
+    
+    # Persist the parsed result: reports are rendered from it, and repeat uploads skip extraction
+    # Keyed per user like the content index, and replaced atomically since other analyses may be reading it
+    result_filepath = os.path.join(RESULTS_FOLDER, f"{user_id}_{content_hash or job.id}.json")
+    fd, temp_path = tempfile.mkstemp(dir=RESULTS_FOLDER, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(transactions, f)
+        os.replace(temp_path, result_filepath)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    
+    # Convert once to the typed table every later stage shares
+    table = TransactionTable.from_records(transactions)
+    transaction_count = len(table)
+    del transactions
+    
+    # Categorize transactions, the user's own overrides first
+    job.update(progress=55, stage='Categorizing transactions')
+    engine = category_rules.engine()
+    overrides = load_category_overrides(user_id)
+    table = categorize_table(table, overrides, engine)
+    print(f"Categorized {transaction_count} transactions with {len(overrides)} overrides "
+          f"(category memo hit rate {category_memo.hit_rate:.1%})")
+    summary = summarize(table)
+    
+    # Save analysis to database
+    job.update(progress=90, stage='Saving analysis')
+    analysis_id = save_analysis_to_db(
+        user_id, 
+        name if name else 'User', 
+        bank_name if bank_name else 'Unknown Bank', 
+        customer_number if customer_number else 'N/A', 
+        filename, 
+        '', 
+        None,
+        content_hash,
+        result_filepath
+    )
+    
+    if content_hash:
+        index_statement_content(user_id, content_hash, result_filepath, '', None, transaction_count)
+    
+    analysis = {
+        'id': analysis_id or f"job-{job.id}",
+        'user_id': user_id,
+        'data_file_path': result_filepath,
+        'name': name,
+        'bank_name': bank_name,
+        'customer_number': customer_number
+    }
+    # The totals are ready now, so the analysis page never has to categorize again
+    rules_version = rules_version_for(engine, overrides)
+    report_cache.open_or_render(analysis['id'], rules_version, 'summary.json', summary.save).close()
+    
+    # Build the Excel report the upload page is about to download, from the table already in memory
+    job.update(progress=95, stage='Building Excel report')
+    report_cache.open_or_render(analysis['id'], rules_version, 'xlsx',
+                                lambda path: create_excel_report(table, path, summary)).close()
+    
+    return {
+        'analysis_id': analysis_id or None,
+        'file_name': filename,
+        'transaction_count': transaction_count,
+        'reused': False,
+        'analysis': analysis
+    }
+
+@app.errorhandler(413)
+def request_entity_too_large(error):
+    return jsonify({'success': False, 'error': 'The uploaded file is too large'}), 413
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if not is_logged_in():
         return redirect(url_for('login'))
     
-    if not has_active_subscription(session['user_id']):
+    plan = get_active_plan(session['user_id'])
+    if plan is None:
         return redirect(url_for('subscription'))
     
+    # Reject oversized uploads from the Content-Length header before reading the body
+    max_bytes = get_upload_limit(plan)
+    if request.content_length is not None and request.content_length > max_bytes + UPLOAD_FORM_OVERHEAD:
+        return jsonify({'success': False, 'error': f'The uploaded file exceeds the {max_bytes // (1024 * 1024)} MB limit for your plan'}), 413
+    
     # Get user info from form
     name = request.form.get('name', '')
     bank_name = request.form.get('bank_name', '')
     customer_number = request.form.get('customer_number', '')
     
     if 'file' not in request.files:
-        flash('No file selected')
-        return redirect(request.url)
+        return jsonify({'success': False, 'error': 'No file selected'}), 400
     
     file = request.files['file']
     
     if file.filename == '':
-        flash('No file selected')
-        return redirect(request.url)
+        return jsonify({'success': False, 'error': 'No file selected'}), 400
     
     if file and file.filename and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Process the file based on its type
-        if filename.lower().endswith('.pdf'):
-            text = extract_text_from_pdf(filepath)
-        elif filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
-            text = extract_text_from_image(filepath)
-        elif filename.lower().endswith(('.doc', '.docx')):
-            text = extract_text_from_doc(filepath)
-        elif filename.lower().endswith(('.xls', '.xlsx')):
-            text = extract_text_from_excel(filepath)
-        else:
-            # For other file types, try to read as text
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    text = f.read()
-            except:
-                text = "Could not extract text from file"
-        
-        # Extract transactions from text
-        transactions = extract_data_from_text(text)
-        
-        # Categorize transactions
-        categories = categorize_transactions(transactions)
-        
-        # Create Excel report
-        excel_filename = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        excel_filepath = os.path.join(app.config['UPLOAD_FOLDER'], excel_filename)
-        create_excel_report(categories, excel_filepath)
-        
-        # Create PDF report
-        pdf_filename = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        pdf_filepath = os.path.join(app.config['UPLOAD_FOLDER'], pdf_filename)
-        
-        # Account info can be extracted from the document or provided by user
-        account_info = {
-            "bank_name": bank_name if bank_name else "Bank Statement Analyzer",
-            "account_number": customer_number if customer_number else "Extracted from document",
-            "account_holder": name if name else "Client",
-            "statement_period": "Analysis Period",
-            "opening_balance": "$0.00",
-            "closing_balance": "$0.00"
-        }
-        
-        # Import the PDF generator function
+        # Prefix stored uploads so concurrent jobs never overwrite each other's files
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex[:12]}_{filename}")
+        extension = file.filename.rsplit('.', 1)[1].lower()
         try:
-            from enhanced_pdf_generator import create_professional_bank_statement
-            create_professional_bank_statement(categories, pdf_filepath, account_info)
-        except ImportError:
-            print("PDF generation module not found")
-        
-        # Save analysis to database
-        save_analysis_to_db(
-            session['user_id'], 
-            name if name else 'User', 
-            bank_name if bank_name else 'Unknown Bank', 
-            customer_number if customer_number else 'N/A', 
-            filename, 
-            excel_filepath, 
-            pdf_filepath
+            content_hash, _ = stream_upload_to_disk(file.stream, filepath, extension, max_bytes)
+        except UploadRejected as e:
+            return jsonify({'success': False, 'error': e.message}), e.status_code
+        
+        # Hand the heavy lifting to the background worker pool
+        job = job_queue.submit(
+            session['user_id'],
+            process_bank_statement,
+            session['user_id'], name, bank_name, customer_number, filename, filepath, content_hash,
+            description=filename
         )
         
-        # Return the Excel file for download
-        return send_file(excel_filepath, as_attachment=True)
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'status_url': url_for('get_job_status', job_id=job.id)
+        }), 202
+    
+    return jsonify({'success': False, 'error': 'Invalid file type'}), 400
+
+@app.route('/api/jobs/<job_id>')
+def get_job_status(job_id):
+    if not is_logged_in():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
     
-    flash('Invalid file type')
-    return redirect(url_for('bank_statement_analyzer'))
+    job = job_queue.get(job_id)
+    if job is None or job.user_id != session['user_id']:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    data = job.to_dict()
+    data['success'] = True
+    if job.status == JOB_COMPLETED:
+        data['analysis_id'] = job.result.get('analysis_id')
+        data['transaction_count'] = job.result.get('transaction_count')
+        data['reused'] = job.result.get('reused', False)
+        data['result_url'] = url_for('download_job_result', job_id=job.id)
+    
+    return jsonify(data)
+
+@app.route('/api/jobs/<job_id>/result')
+def download_job_result(job_id):
+    if not is_logged_in():
+        return redirect(url_for('login'))
+    
+    job = job_queue.get(job_id)
+    if job is None or job.user_id != session['user_id']:
+        return "Job not found", 404
+    
+    if job.status != JOB_COMPLETED:
+        return "Job has not completed", 409
+    
+    file_name = os.path.splitext(job.result['file_name'])[0]
+    return send_analysis_report(job.result['analysis'], 'xlsx', f"{file_name}_analysis.xlsx")
 
 @app.route('/analysis-details/<int:analysis_id>')
 def analysis_details(analysis_id):
@@ -2237,45 +2235,69 @@ def analysis_details(analysis_id):
         if connection and connection.is_connected():
             connection.close()
 
-@app.route('/download-excel/<int:analysis_id>')
-def download_excel(analysis_id):
-    if not is_logged_in():
-        return redirect(url_for('login'))
+def get_analysis_for_download(analysis_id, user_id):
+    """
+    Look up what is needed to send an analysis' reports
     
-    # Get analysis details
+    Returns:
+        tuple: (analysis dict or None, error response or None)
+    """
     connection = get_db_connection()
     if connection is None:
-        return "Database connection failed", 500
+        return None, ("Database connection failed", 500)
     
     cursor = None
     try:
         cursor = connection.cursor()
         cursor.execute("""
-            SELECT excel_file_path, file_name 
+            SELECT id, user_id, name, bank_name, customer_number, file_name, excel_file_path, pdf_file_path, data_file_path
             FROM bank_statement_analyses 
             WHERE id = %s AND user_id = %s
-        """, (analysis_id, session['user_id']))
+        """, (analysis_id, user_id))
         
         result = cursor.fetchone()
-        if result:
-            # Convert database results to strings
-            excel_file_path = str(result[0]) if result[0] else ""
-            file_name = str(result[1]) if result[1] else "analysis"
-            if os.path.exists(excel_file_path):
-                return send_file(excel_file_path, as_attachment=True, download_name=f"{file_name}_analysis.xlsx")
-            else:
-                return "File not found", 404
-        else:
-            return "Analysis not found", 404
+        if result is None:
+            return None, ("Analysis not found", 404)
+        return {
+            "id": result[0],
+            "user_id": result[1],
+            "name": result[2],
+            "bank_name": result[3],
+            "customer_number": result[4],
+            "file_name": str(result[5]) if result[5] else "analysis",
+            "excel_file_path": str(result[6]) if result[6] else "",
+            "pdf_file_path": result[7],
+            "data_file_path": result[8]
+        }, None
     except Error as e:
         print(f"Error retrieving analysis: {e}")
-        return "Error retrieving analysis", 500
+        return None, ("Error retrieving analysis", 500)
     finally:
         if cursor:
             cursor.close()
         if connection and connection.is_connected():
             connection.close()
 
+@app.route('/download-excel/<int:analysis_id>')
+def download_excel(analysis_id):
+    if not is_logged_in():
+        return redirect(url_for('login'))
+    
+    analysis, error = get_analysis_for_download(analysis_id, session['user_id'])
+    if error:
+        return error
+    return send_analysis_report(analysis, 'xlsx', f"{analysis['file_name']}_analysis.xlsx")
+
+@app.route('/download-pdf/<int:analysis_id>')
+def download_pdf(analysis_id):
+    if not is_logged_in():
+        return redirect(url_for('login'))
+    
+    analysis, error = get_analysis_for_download(analysis_id, session['user_id'])
+    if error:
+        return error
+    return send_analysis_report(analysis, 'pdf', f"{analysis['file_name']}_statement.pdf")
+
 @app.route('/delete-analysis/<int:analysis_id>', methods=['POST'])
 def delete_analysis_route(analysis_id):
     if not is_logged_in():
@@ -2303,77 +2325,33 @@ def get_analysis_data(analysis_id):
     try:
         cursor = connection.cursor()
         cursor.execute("""
-            SELECT excel_file_path
+            SELECT excel_file_path, data_file_path, user_id, name, bank_name, customer_number
             FROM bank_statement_analyses 
             WHERE id = %s AND user_id = %s
         """, (analysis_id, session['user_id']))
         
         result = cursor.fetchone()
         if result:
-            excel_file_path = result[0]
+            excel_file_path, data_file_path = result[0], result[1]
             
             # Check if file exists
-            if not os.path.exists(excel_file_path):
+            if not os.path.exists(data_file_path or excel_file_path):
                 return jsonify({'success': False, 'error': 'Analysis file not found'}), 404
             
-            # Read the Excel file to extract data
+            # Load the totals, from the cache for analyses rendered on demand or saved with the report
             try:
-                # Read the enhanced summary sheet
-                summary_df = pd.read_excel(excel_file_path, sheet_name='Enhanced Summary')
-                
-                # Read the detailed summary sheet
-                detailed_df = pd.read_excel(excel_file_path, sheet_name='Detailed Summary')
-                
-                # Extract key metrics
-                total_credits = 0
-                total_debits = 0
-                net_cashflow = 0
-                total_transactions = 0
-                
-                # Get total credits from the enhanced summary
-                total_credits_row = summary_df[summary_df['Metric'] == 'Total Credits']
-                if not total_credits_row.empty:
-                    total_credits = total_credits_row['Value'].iloc[0]
-                
-                # Get net cashflow
-                net_cashflow_row = summary_df[summary_df['Metric'] == 'NET CASHFLOW']
-                if not net_cashflow_row.empty:
-                    net_cashflow = net_cashflow_row['Value'].iloc[0]
-                
-                # Get total transactions
-                total_transactions_row = summary_df[summary_df['Metric'] == 'NET CASHFLOW']
-                if not total_transactions_row.empty:
-                    total_transactions = int(total_transactions_row['Count'].iloc[0])
-                
-                # Calculate total debits
-                total_debits = total_credits - net_cashflow
-                
-                # Extract category data
-                category_data = {}
-                for _, row in detailed_df.iterrows():
-                    category = row['Category']
-                    if category != 'TOTAL':
-                        category_data[category] = {
-                            'count': int(row['Transaction Count']),
-                            'total_amount': float(row['Total Amount']),
-                            'credit_amount': float(row['Credit Amount']),
-                            'debit_amount': float(row['Debit Amount']),
-                            'net_amount': float(row['Net Amount'])
-                        }
-                
-                # Prepare response data
-                data = {
-                    'success': True,
-                    'totalCredits': float(total_credits),
-                    'totalDebits': float(total_debits),
-                    'netCashflow': float(net_cashflow),
-                    'totalTransactions': total_transactions,
-                    'categories': category_data
-                }
-                
+                if data_file_path:
+                    analysis = {'id': analysis_id, 'data_file_path': data_file_path, 'user_id': result[2],
+                                'name': result[3], 'bank_name': result[4], 'customer_number': result[5]}
+                    with render_analysis_report(analysis, 'summary.json') as f:
+                        summary = StatementSummary.from_dict(json.load(f))
+                else:
+                    summary = load_report_summary(excel_file_path)
+                data = {'success': True}
+                data.update(summary.to_dict())
                 return jsonify(data)
             except Exception as e:
-                print(f"Error reading Excel file: {e}")
+                print(f"Error reading analysis summary: {e}")
                 return jsonify({'success': False, 'error': 'Failed to read analysis data'}), 500
         else:
             return jsonify({'success': False, 'error': 'Analysis not found'}), 404
@@ -2387,6 +2365,48 @@ def get_analysis_data(analysis_id):
             connection.close()
 
 
+@app.route('/api/category-overrides')
+def get_category_overrides():
+    """List the user's category overrides"""
+    if not is_logged_in():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    
+    overrides = load_category_overrides(session['user_id'])
+    return jsonify({
+        'success': True,
+        'overrides': [{'description': key, 'category': category} for key, category in sorted(overrides.items())]
+    })
+
+@app.route('/api/category-overrides', methods=['POST'])
+def update_category_overrides():
+    """
+    Save category overrides in bulk
+    
+    Expects JSON {"overrides": [{"description": ..., "category": ...}, ...]}; descriptions
+    are normalized, so one override covers every reference number of the same payee.
+    """
+    if not is_logged_in():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    items = data.get('overrides')
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'error': 'No overrides provided'}), 400
+    
+    try:
+        overrides = build_override_index(
+            ((item.get('description'), item.get('category')) for item in items if isinstance(item, dict)),
+            CATEGORY_NAMES
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid override: {e}'}), 400
+    if len(overrides) == 0 or any(len(key) > OVERRIDE_KEY_LENGTH for key in overrides):
+        return jsonify({'success': False, 'error': f'Descriptions must be 1 to {OVERRIDE_KEY_LENGTH} characters'}), 400
+    
+    if save_category_overrides(session['user_id'], overrides):
+        return jsonify({'success': True, 'saved': len(overrides)})
+    return jsonify({'success': False, 'error': 'Failed to save overrides'}), 500
+
 @app.route('/api/analysis-transactions/<int:analysis_id>/<path:category>')
 def get_analysis_transactions(analysis_id, category):
     if not is_logged_in():
@@ -2401,17 +2421,17 @@ def get_analysis_transactions(analysis_id, category):
     try:
         cursor = connection.cursor()
         cursor.execute("""
-            SELECT excel_file_path
+            SELECT excel_file_path, data_file_path
             FROM bank_statement_analyses 
             WHERE id = %s AND user_id = %s
         """, (analysis_id, session['user_id']))
         
         result = cursor.fetchone()
         if result:
-            excel_file_path = result[0]
+            excel_file_path, data_file_path = result[0], result[1]
             
             # Check if file exists
-            if not os.path.exists(excel_file_path):
+            if not os.path.exists(data_file_path or excel_file_path):
                 return jsonify({'success': False, 'error': 'Analysis file not found'}), 404
             
             # Read the Excel file to extract data
@@ -2421,33 +2441,52 @@ def get_analysis_transactions(analysis_id, category):
                 decoded_category = urllib.parse.unquote(category)
                 
                 # Sanitize category name for sheet name (replace special characters)
-                sanitized_category = decoded_category.replace('/', ' ').replace('\\', ' ').replace('?', ' ').replace('*', ' ').replace('[', ' ').replace(']', ' ').replace(':', ' ')
-                sheet_name = sanitized_category[:31]
+                sheet_name = sheet_name_for(decoded_category)
                 
                 # Debug logging
                 print(f"Looking for category: {decoded_category}")
                 print(f"Sanitized sheet name: {sheet_name}")
                 
-                # Try to read the category details sheet
+                if data_file_path:
+                    # Categorize the persisted transactions, so the Excel report need not exist yet
+                    table = load_analysis_table(data_file_path, category_rules.engine(),
+                                                load_category_overrides(session['user_id']))
+                    if decoded_category not in CATEGORY_CODES:
+                        transactions_df = pd.DataFrame(columns=['date', 'description', 'amount', 'type', 'balance'])
+                    else:
+                        transactions_df = table.category(decoded_category).record_frame()
+                        transactions_df['balance'] = transactions_df['balance'].replace('N/A', '')
+                    return jsonify({
+                        'success': True,
+                        'category': decoded_category,
+                        'transactions': transactions_df.to_dict('records'),
+                        'count': len(transactions_df)
+                    })
+                
+                # Read the category's block of the consolidated transaction list
                 try:
-                    sheet_name_with_details = f"{sheet_name} Details"
-                    print(f"Trying to read sheet: {sheet_name_with_details}")
-                    transactions_df = pd.read_excel(excel_file_path, sheet_name=sheet_name_with_details)
-                except Exception as e1:
-                    print(f"Failed to read '{sheet_name} Details' sheet: {e1}")
-                    # If category details sheet doesn't exist, try the main category sheet
+                    transactions_df = read_category_view(excel_file_path, decoded_category)
+                except ValueError:
+                    # Reports written before the consolidated layout have one sheet per category
                     try:
-                        print(f"Trying to read sheet: {decoded_category}")
-                        transactions_df = pd.read_excel(excel_file_path, sheet_name=decoded_category)
-                    except Exception as e2:
-                        print(f"Failed to read '{decoded_category}' sheet: {e2}")
-                        # If neither sheet exists, return empty data
-                        return jsonify({
-                            'success': True,
-                            'category': decoded_category,
-                            'transactions': [],
-                            'count': 0
-                        })
+                        sheet_name_with_details = f"{sheet_name} Details"
+                        print(f"Trying to read sheet: {sheet_name_with_details}")
+                        transactions_df = pd.read_excel(excel_file_path, sheet_name=sheet_name_with_details)
+                    except Exception as e1:
+                        print(f"Failed to read '{sheet_name} Details' sheet: {e1}")
+                        # If category details sheet doesn't exist, try the main category sheet
+                        try:
+                            print(f"Trying to read sheet: {decoded_category}")
+                            transactions_df = pd.read_excel(excel_file_path, sheet_name=decoded_category)
+                        except Exception as e2:
+                            print(f"Failed to read '{decoded_category}' sheet: {e2}")
+                            # If neither sheet exists, return empty data
+                            return jsonify({
+                                'success': True,
+                                'category': decoded_category,
+                                'transactions': [],
+                                'count': 0
+                            })
                 
                 # Convert DataFrame to list of dictionaries
                 transactions = []
@@ -2887,7 +2926,7 @@ We noticed you haven't subscribed to our bank statement analysis services yet.
 We'd be happy to help you get started with analyzing your financial documents.
 
 Our services include:
-- Multi-format document processing (PDF, PNG, JPG, GIF, DOC, DOCX, XLS, XLSX)
+- Multi-format document processing (PDF, PNG, JPG, GIF, DOC, DOCX, XLS, XLSX, CSV, OFX/QFX, MT940)
 - Smart transaction categorization
 - Financial insights and spending pattern analysis
 - Comprehensive Excel exports with charts and visualizations
@@ -2987,7 +3026,7 @@ We noticed you haven't subscribed to our bank statement analysis services yet.
 We'd be happy to help you get started with analyzing your financial documents.
 
 Our services include:
-- Multi-format document processing (PDF, PNG, JPG, GIF, DOC, DOCX, XLS, XLSX)
+- Multi-format document processing (PDF, PNG, JPG, GIF, DOC, DOCX, XLS, XLSX, CSV, OFX/QFX, MT940)
 - Smart transaction categorization
 - Financial insights and spending pattern analysis
 - Comprehensive Excel exports with charts and visualizations
@@ -3339,6 +3378,20 @@ def admin_star_notification(notification_id):
         if connection and connection.is_connected():
             connection.close()
 
+# Cache statistics routes
+@app.route('/admin/cache-stats')
+def admin_cache_stats():
+    """Report the hit rates of the in-process caches, for tuning their sizes"""
+    if not is_logged_in() or not session.get('is_admin'):
+        return jsonify({'success': False, 'error': 'Unauthorized'})
+    
+    return jsonify({
+        'success': True,
+        'category_memo': category_memo.stats(),
+        'report_cache': report_cache.stats(),
+        'layout_registry': {'hits': layout_registry.hits, 'misses': layout_registry.misses}
+    })
+
 # History tracking routes
 @app.route('/admin/history/registrations')
 def admin_get_registration_history():
@@ -0,0 +1,171 @@
+"""
+Bank layout fingerprinting for Convector Bank Statement Analyzer
+Identifies the bank and statement layout from the first page of a statement
+(bank name and IFSC in the header, column labels and line layout) and remembers
+which parser shape each layout matched, so later statements with the same
+layout go straight to the right parser instead of trying every shape
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+from tabular_ingest import classify_label
+
+# Lines of the first page searched for the bank identity and column header
+FINGERPRINT_LINES = 60
+
+# Layout decisions kept in memory, least recently used first out
+LAYOUT_CACHE_SIZE = 512
+
+DATE_ONLY_LINE_RE = re.compile(r'^\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4}$')
+HEADER_WORD_RE = re.compile(r'[A-Za-z][A-Za-z./]*')
+
+
+class BankProfile:
+    """A bank the fingerprint can recognize, with the names and IFSC prefix it appears under"""
+
+    def __init__(self, bank_id, name, aliases, ifsc_prefix):
+        self.bank_id = bank_id
+        self.name = name
+        self.name_pattern = re.compile(r'\b(?:' + '|'.join(re.escape(alias) for alias in aliases) + r')\b', re.IGNORECASE)
+        self.ifsc_pattern = re.compile(rf'\b{ifsc_prefix}0[A-Z0-9]{{6}}\b')
+
+    def matches_name(self, text):
+        """Return True if any of the bank's names appears in the text as whole words"""
+        return self.name_pattern.search(text) is not None
+
+
+BANK_PROFILES = [
+    BankProfile('sbi', 'State Bank of India', ['state bank of india', 'sbi'], 'SBIN'),
+    BankProfile('hdfc', 'HDFC Bank', ['hdfc bank', 'hdfc'], 'HDFC'),
+    BankProfile('icici', 'ICICI Bank', ['icici bank', 'icici'], 'ICIC'),
+    BankProfile('axis', 'Axis Bank', ['axis bank'], 'UTIB'),
+    BankProfile('kotak', 'Kotak Mahindra Bank', ['kotak mahindra', 'kotak'], 'KKBK'),
+    BankProfile('pnb', 'Punjab National Bank', ['punjab national bank', 'pnb'], 'PUNB'),
+    BankProfile('bob', 'Bank of Baroda', ['bank of baroda'], 'BARB'),
+    BankProfile('canara', 'Canara Bank', ['canara bank'], 'CNRB'),
+    BankProfile('union', 'Union Bank of India', ['union bank of india'], 'UBIN'),
+    BankProfile('idfc', 'IDFC FIRST Bank', ['idfc first', 'idfc'], 'IDFB'),
+    BankProfile('yes', 'Yes Bank', ['yes bank'], 'YESB'),
+    BankProfile('indusind', 'IndusInd Bank', ['indusind'], 'INDB'),
+]
+
+
+def identify_bank(header_text, bank_name=None):
+    """
+    Identify the bank a statement comes from
+
+    The statement header is trusted first: an IFSC code, then the bank's
+    name. The bank name the user entered is only used when the header has
+    neither, since transaction lines often name other banks.
+
+    Args:
+        header_text (str): Text of the statement header (before the column labels)
+        bank_name (str): Bank name entered by the user, if any
+
+    Returns:
+        str: Bank id from BANK_PROFILES, or None if the bank is not recognized
+    """
+    for profile in BANK_PROFILES:
+        if profile.ifsc_pattern.search(header_text):
+            return profile.bank_id
+
+    for text in (header_text, bank_name or ''):
+        for profile in BANK_PROFILES:
+            if profile.matches_name(text):
+                return profile.bank_id
+    return None
+
+
+def header_roles(line):
+    """Return the column roles named in a line, in order, with repeats collapsed"""
+    roles = []
+    for word in HEADER_WORD_RE.findall(line):
+        role = classify_label(word.lower().strip('./'))
+        if role and (not roles or roles[-1] != role):
+            roles.append(role)
+    return roles
+
+
+def fingerprint_layout(first_page, bank_name=None):
+    """
+    Fingerprint the layout of a statement from its first page of text
+
+    The fingerprint combines the bank, the column labels of the transaction
+    table header and whether transactions are laid out one field per line.
+
+    Returns:
+        tuple: (bank id, column roles, block layout flag), or None if the page
+            carries too little to tell layouts apart
+    """
+    lines = [line.strip() for line in first_page.split('\n')[:FINGERPRINT_LINES]]
+
+    columns = ()
+    header_end = len(lines)
+    for index, line in enumerate(lines):
+        roles = header_roles(line)
+        if len(set(roles)) >= 3 and 'date' in roles:
+            columns = tuple(roles)
+            header_end = index
+            break
+
+    bank_id = identify_bank('\n'.join(lines[:header_end]), bank_name)
+    block_layout = sum(1 for line in lines if DATE_ONLY_LINE_RE.match(line)) >= 2
+
+    if bank_id is None and not columns:
+        return None
+    return (bank_id, columns, block_layout)
+
+
+def describe_fingerprint(fingerprint):
+    """Render a fingerprint for log messages"""
+    if fingerprint is None:
+        return 'unknown layout'
+    bank_id, columns, block_layout = fingerprint
+    return f"{bank_id or 'unknown bank'} [{'/'.join(columns) or 'no header'}]{' blocks' if block_layout else ''}"
+
+
+class LayoutRegistry:
+    """
+    Remembers which parser shape each statement layout matched
+
+    Thread-safe and bounded; the least recently used layouts are forgotten
+    first once LAYOUT_CACHE_SIZE is exceeded.
+    """
+
+    def __init__(self, max_entries=LAYOUT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._shapes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, fingerprint):
+        """Return the shape remembered for a layout, or None"""
+        if fingerprint is None:
+            return None
+        with self._lock:
+            shape = self._shapes.get(fingerprint)
+            if shape is None:
+                self.misses += 1
+                return None
+            self._shapes.move_to_end(fingerprint)
+            self.hits += 1
+            return shape
+
+    def remember(self, fingerprint, shape):
+        """Record the shape a layout matched; a layout that matched nothing is forgotten"""
+        if fingerprint is None:
+            return
+        with self._lock:
+            if shape is None:
+                self._shapes.pop(fingerprint, None)
+                return
+            self._shapes[fingerprint] = shape
+            self._shapes.move_to_end(fingerprint)
+            while len(self._shapes) > self.max_entries:
+                self._shapes.popitem(last=False)
+
+
+layout_registry = LayoutRegistry()
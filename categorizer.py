@@ -0,0 +1,446 @@
+"""
+Transaction categorization engine for Convector Bank Statement Analyzer
+Compiles the keyword rulebook (priorities and exclusions included) into one
+multi-pattern matcher, so each description is scanned once for every keyword
+and the category is picked from the set of keywords found, instead of running
+dozens of substring searches per transaction. The rulebook lives in a versioned
+JSON file that is recompiled only when the file changes
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from transaction_table import CATEGORY_NAMES
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class CategoryRule:
+    """
+    One keyword rule of the rulebook
+
+    A description matches when it contains any of `any_of`, none of `none_of`
+    and, if `requires_any` is given, at least one of those as well. Keywords
+    match anywhere in the lowercased description, as substrings.
+    """
+
+    def __init__(self, category, any_of, none_of=(), requires_any=()):
+        self.category = category
+        self.any_of = tuple(any_of)
+        self.none_of = tuple(none_of)
+        self.requires_any = tuple(requires_any)
+
+    def keywords(self):
+        return self.any_of + self.none_of + self.requires_any
+
+
+# Rulebook file; rules are listed in priority order, the first matching rule decides the category
+CATEGORY_RULES_FILE = os.environ.get('CATEGORY_RULES_FILE',
+                                     os.path.join(os.path.dirname(os.path.abspath(__file__)), 'category_rules.json'))
+
+# Seconds between checks of the rulebook file for changes
+RULES_CHECK_INTERVAL = float(os.environ.get('RULES_CHECK_INTERVAL', 5))
+
+DEFAULT_CATEGORY = 'Other'
+
+# Normalized descriptions whose category is remembered per worker, least recently used first out
+CATEGORY_MEMO_SIZE = int(os.environ.get('CATEGORY_MEMO_SIZE', 50000))
+
+# Reference numbers, account numbers and dates vary between otherwise identical descriptions
+DIGIT_RUN_PATTERN = re.compile(r'\d+')
+
+MASK_WORD_BITS = 63
+MASK_WORD = (1 << MASK_WORD_BITS) - 1
+
+
+class KeywordScanner:
+    """
+    Finds every keyword contained in a text in a single pass
+
+    Uses an Aho-Corasick automaton when pyahocorasick is installed. Otherwise
+    a compiled regex tries the keywords longest first at each position; the
+    shorter keywords starting at the same position are exactly the prefixes of
+    the longest one, so they are added from a precomputed table.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = sorted(set(keywords), key=lambda keyword: (-len(keyword), keyword))
+        self.bits = {keyword: 1 << index for index, keyword in enumerate(self.keywords)}
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for index, keyword in enumerate(self.keywords):
+                self._automaton.add_word(keyword, index)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            self._pattern = re.compile('(?=(' + '|'.join(re.escape(keyword) for keyword in self.keywords) + '))')
+            self._prefixes = {
+                keyword: [index for index, other in enumerate(self.keywords) if keyword.startswith(other)]
+                for keyword in self.keywords
+            }
+            self._prefix_bits = {keyword: sum(1 << index for index in indices)
+                                 for keyword, indices in self._prefixes.items()}
+
+    def mask(self, keywords):
+        """Combine keyword names into a bit mask"""
+        result = 0
+        for keyword in keywords:
+            result |= self.bits[keyword]
+        return result
+
+    def scan(self, text):
+        """Return the bit mask of every keyword contained in the text"""
+        found = 0
+        if self._automaton is not None:
+            if self.keywords:
+                for _, index in self._automaton.iter(text):
+                    found |= 1 << index
+            return found
+        for match in self._pattern.finditer(text):
+            found |= self._prefix_bits[match.group(1)]
+        return found
+
+    def scan_all(self, texts):
+        """
+        Find the keywords of many texts in one pass over them joined together
+
+        Keywords never contain a newline, so no match spans two texts.
+
+        Returns:
+            tuple: (row, keyword index) numpy arrays, one entry per keyword found in a row
+        """
+        texts = list(texts)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)) + 1
+        starts = np.cumsum(lengths) - lengths
+        joined = '\n'.join(texts)
+
+        if self._automaton is not None:
+            found = list(self._automaton.iter(joined)) if self.keywords else []
+        else:
+            found = [(match.start(), index) for match in self._pattern.finditer(joined)
+                     for index in self._prefixes[match.group(1)]]
+        found = np.array(found, dtype=np.int64).reshape(-1, 2)
+
+        rows = np.searchsorted(starts, found[:, 0], side='right') - 1
+        return rows, found[:, 1]
+
+
+class CategoryEngine:
+    """
+    Categorizes transaction descriptions with a compiled rulebook
+
+    The keywords of every rule are compiled into one KeywordScanner and each
+    rule into bit masks, so a description costs one scan plus a few integer
+    tests per rule.
+    """
+
+    def __init__(self, rules, default=DEFAULT_CATEGORY, version=None):
+        self.rules = list(rules)
+        self.default = default
+        self.version = version
+        self.scanner = KeywordScanner(keyword for rule in self.rules for keyword in rule.keywords())
+        self._compiled = [
+            (self.scanner.mask(rule.any_of), self.scanner.mask(rule.none_of),
+             self.scanner.mask(rule.requires_any), rule.category)
+            for rule in self.rules
+        ]
+
+    def categorize(self, description):
+        """Return the category of a transaction description"""
+        found = self.scanner.scan(description.lower())
+        if found:
+            for any_of, none_of, requires_any, category in self._compiled:
+                if found & any_of and not found & none_of and (not requires_any or found & requires_any):
+                    return category
+        return self.default
+
+    def categorize_series(self, descriptions):
+        """
+        Categorize a whole column of descriptions at once
+
+        The column is scanned into keyword bit masks, then every rule is
+        evaluated as a vectorized mask over all rows and applied lowest
+        priority first with masked assignment, so higher-priority rules
+        overwrite lower ones.
+
+        Args:
+            descriptions (pd.Series): Transaction descriptions
+
+        Returns:
+            pd.Series: Category name of each description, with the same index
+        """
+        rows, indices = self.scanner.scan_all(descriptions.fillna('').astype(str).str.lower().tolist())
+        count = len(descriptions)
+        # Keyword masks of every row, split into 63-bit words so they fit numpy integers
+        words = []
+        for first in range(0, max(len(self.scanner.keywords), 1), MASK_WORD_BITS):
+            in_word = (indices >= first) & (indices < first + MASK_WORD_BITS)
+            column = np.zeros(count, dtype=np.int64)
+            np.bitwise_or.at(column, rows[in_word], np.left_shift(1, indices[in_word] - first))
+            words.append(column)
+
+        def rows_matching(mask):
+            hit = np.zeros(count, dtype=bool)
+            for index, column in enumerate(words):
+                part = (mask >> (index * MASK_WORD_BITS)) & MASK_WORD
+                if part:
+                    hit |= (column & part) != 0
+            return hit
+
+        result = np.full(count, self.default, dtype=object)
+        for any_of, none_of, requires_any, category in reversed(self._compiled):
+            hit = rows_matching(any_of) & ~rows_matching(none_of)
+            if requires_any:
+                hit &= rows_matching(requires_any)
+            result[hit] = category
+        return pd.Series(result, index=descriptions.index)
+
+
+def _keyword_list(rule, field):
+    keywords = rule.get(field, [])
+    if not isinstance(keywords, list) or not all(isinstance(keyword, str) for keyword in keywords):
+        raise ValueError(f"'{field}' of the {rule.get('category')} rule must be a list of strings")
+    for keyword in keywords:
+        if (not keyword.strip() or keyword != keyword.lower() or '\n' in keyword
+                or '#' in keyword or DIGIT_RUN_PATTERN.search(keyword)):
+            raise ValueError(f"Invalid keyword {keyword!r} in the {rule.get('category')} rule: "
+                             "keywords are lowercase, non-blank, on one line and contain no digits or '#'")
+    return keywords
+
+
+def parse_rulebook(text, categories=None):
+    """
+    Compile the JSON text of a rulebook
+
+    Args:
+        text (str): Rulebook with 'version', 'default' and 'rules' in priority order
+        categories: Category names the rules may use, or None to allow any
+
+    Returns:
+        CategoryEngine: The compiled rulebook, versioned as '<version>-<content digest>'
+
+    Raises:
+        ValueError: If the rulebook is malformed
+    """
+    config = json.loads(text)
+    if not isinstance(config, dict) or not isinstance(config.get('rules'), list):
+        raise ValueError("The rulebook must be an object with a 'rules' list")
+
+    default = config.get('default', DEFAULT_CATEGORY)
+    rules = []
+    for rule in config['rules']:
+        if not isinstance(rule, dict) or not isinstance(rule.get('category'), str):
+            raise ValueError(f"Every rule needs a 'category': {rule!r}")
+        any_of = _keyword_list(rule, 'any_of')
+        if not any_of:
+            raise ValueError(f"The {rule['category']} rule has no 'any_of' keywords")
+        rules.append(CategoryRule(rule['category'], any_of,
+                                  none_of=_keyword_list(rule, 'none_of'),
+                                  requires_any=_keyword_list(rule, 'requires_any')))
+
+    if categories is not None:
+        unknown = sorted({rule.category for rule in rules} - set(categories) | ({default} - set(categories)))
+        if unknown:
+            raise ValueError(f"Unknown categories in the rulebook: {', '.join(unknown)}")
+
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+    return CategoryEngine(rules, default, version=f"{config.get('version', 0)}-{digest}")
+
+
+class RulebookWatcher:
+    """
+    Keeps the compiled rulebook in step with its file
+
+    The file is compiled once when the watcher is created. Afterwards it is
+    checked at most every `check_interval` seconds and recompiled only when its
+    modification time or size changed. A file that fails to compile is reported
+    and the previous rules stay in use.
+    """
+
+    def __init__(self, path, categories=None, check_interval=RULES_CHECK_INTERVAL):
+        self.path = path
+        self.categories = categories
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self._engine = self._compile()
+        self._checked_at = time.monotonic()
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _compile(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return parse_rulebook(f.read(), self.categories)
+
+    def engine(self):
+        """Return the current compiled rulebook, recompiling it first if the file changed"""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return self._engine
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self.check_interval:
+                self._checked_at = time.monotonic()
+                try:
+                    stamp = self._file_stamp()
+                    if stamp != self._stamp:
+                        self._engine = self._compile()
+                        self._stamp = stamp
+                        print(f"Reloaded category rules version {self._engine.version}")
+                except (OSError, ValueError) as e:
+                    print(f"Error reloading category rules, keeping version {self._engine.version}: {e}")
+            return self._engine
+
+
+def normalize_description(description):
+    """
+    Reduce a description to the merchant text that decides its category
+
+    Lowercases it and replaces every run of digits with '#'. Keywords never
+    contain digits or '#', so a normalized description always gets the same
+    category as the original.
+    """
+    return DIGIT_RUN_PATTERN.sub('#', description.lower())
+
+
+def build_override_index(overrides, categories=None):
+    """
+    Build the lookup dict of a user's category overrides
+
+    Args:
+        overrides (iterable): (description, category) pairs; descriptions may be
+            raw or already normalized
+        categories (list): Category names the overrides may use, or None for any
+
+    Returns:
+        dict: Normalized description to category name
+    """
+    index = {}
+    for description, category in overrides:
+        if not isinstance(description, str) or not description.strip():
+            raise ValueError("override descriptions must be non-empty strings")
+        if categories is not None and category not in categories:
+            raise ValueError(f"unknown category {category!r}")
+        index[normalize_description(description)] = category
+    return index
+
+
+class CategoryMemo:
+    """
+    Remembers the category of normalized descriptions
+
+    Thread-safe and bounded; entries are keyed by rulebook version so a
+    reloaded rulebook never serves categories from the previous rules.
+    """
+
+    def __init__(self, max_entries=CATEGORY_MEMO_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._categories = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, version, descriptions):
+        """Return the remembered categories of normalized descriptions, as a dict"""
+        found = {}
+        with self._lock:
+            for description in descriptions:
+                key = (version, description)
+                category = self._categories.get(key)
+                if category is None:
+                    self.misses += 1
+                    continue
+                self._categories.move_to_end(key)
+                self.hits += 1
+                found[description] = category
+        return found
+
+    def put_many(self, version, categories):
+        """Remember the categories of normalized descriptions"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for description, category in categories.items():
+                self._categories[(version, description)] = category
+                self._categories.move_to_end((version, description))
+            while len(self._categories) > self.max_entries:
+                self._categories.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """Return the memo's size and hit counters"""
+        return {
+            'entries': len(self._categories),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hit_rate, 4)
+        }
+
+
+def categorize_descriptions(engine, descriptions, memo=None, batch=True, overrides=None):
+    """
+    Categorize descriptions, evaluating the rules once per distinct merchant text
+
+    Descriptions are normalized, then each distinct normalized description is
+    looked up in the user's overrides and then in the memo; only the ones
+    neither knows go through the rules.
+
+    Args:
+        engine (CategoryEngine): Compiled rulebook
+        descriptions (pd.Series): Transaction descriptions
+        memo (CategoryMemo): Memo shared across statements, or None
+        batch (bool): Evaluate the unseen descriptions with the vectorized batch mode
+        overrides (dict): The user's normalized description to category index, or None
+
+    Returns:
+        pd.Series: Category name of each description, with the same index
+    """
+    texts = descriptions.fillna('').astype(str).tolist()
+    # Normalize the whole column in one pass, unless a description holds the separator itself
+    joined = '\x00'.join(texts)
+    normalized = normalize_description(joined).split('\x00') if joined.count('\x00') == len(texts) - 1 else None
+    if normalized is None or len(normalized) != len(texts):
+        normalized = [normalize_description(text) for text in texts]
+    codes, distinct = pd.factorize(pd.Series(normalized, dtype=object))
+    distinct = list(distinct)
+    # Overrides belong to one user, so they are never stored in the shared memo
+    overridden = {description: overrides[description] for description in distinct
+                  if description in overrides} if overrides else {}
+    remaining = [description for description in distinct if description not in overridden]
+    known = memo.get_many(engine.version, remaining) if memo is not None else {}
+    known.update(overridden)
+
+    unseen = [description for description in remaining if description not in known]
+    if unseen:
+        if batch:
+            categories = engine.categorize_series(pd.Series(unseen, dtype=object)).tolist()
+        else:
+            categories = [engine.categorize(description) for description in unseen]
+        computed = dict(zip(unseen, categories))
+        if memo is not None:
+            memo.put_many(engine.version, computed)
+        known.update(computed)
+
+    categories = np.array([known[description] for description in distinct] or [engine.default], dtype=object)
+    return pd.Series(categories[codes], index=descriptions.index)
+
+
+category_rules = RulebookWatcher(CATEGORY_RULES_FILE, CATEGORY_NAMES)
+category_memo = CategoryMemo()
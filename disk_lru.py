@@ -0,0 +1,129 @@
+"""
+On-disk LRU bookkeeping for Convector Bank Statement Analyzer
+Shared by the OCR and report caches: entries are files one folder below the
+cache directory, written atomically and evicted least recently used first once
+the cache grows past its size limit
+"""
+
+import os
+import tempfile
+import threading
+
+
+class DiskLru:
+    """
+    Size-limited set of cache files with least-recently-used eviction
+
+    A file's modification time records its last use. Entries are opened and
+    evicted under one lock, so a file handed out by `open` or `store` stays
+    readable even if it is evicted right afterwards.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+
+    def open(self, path, mode='rb', **kwargs):
+        """Open an entry and mark it as recently used; returns None if it is not cached"""
+        with self._lock:
+            try:
+                f = open(path, mode, **kwargs)
+            except OSError:
+                return None
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return f
+
+    def store(self, path, write, mode=None, **kwargs):
+        """
+        Add an entry, evicting old entries if the cache is over its size limit
+
+        Args:
+            path (str): Where the entry is kept
+            write (callable): Writes the entry to the temporary file path it is given
+            mode (str): If given, the entry is also opened with this mode before
+                anything is evicted, and the open file is returned
+
+        Returns:
+            file: The open entry, or None if no `mode` was given
+        """
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        os.close(fd)
+        try:
+            write(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        written = os.path.getsize(path)
+
+        with self._lock:
+            f = open(path, mode, **kwargs) if mode else None
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += written
+            if self._size > self.max_bytes:
+                self._evict()
+        return f
+
+    def discard(self, path):
+        """Delete one entry"""
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            if self._size is not None:
+                self._size -= size
+
+    def forget_size(self):
+        """Rescan the cache size on the next store, after entries were deleted directly"""
+        with self._lock:
+            self._size = None
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for folder in os.scandir(self.directory):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        # Evict down to 90% of the limit so the scan does not run on every store
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._size = total
@@ -10,22 +10,30 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from datetime import datetime
 import os
 
-def create_professional_bank_statement(categories, filename="professional_bank_statement.pdf", account_info=None):
+from transaction_table import CATEGORY_NAMES, as_transaction_table
+from transaction_summary import summarize
+
+def create_professional_bank_statement(transactions, filename="professional_bank_statement.pdf", account_info=None, summary=None):
     """
     Create a professional bank statement PDF from categorized transactions
     
     Args:
-        categories (dict): Dictionary of categorized transactions
+        transactions: Categorized TransactionTable, or a dictionary of categorized transactions
         filename (str): Output PDF filename
         account_info (dict): Account information (account number, name, etc.)
+        summary (StatementSummary): Totals of the transactions, computed here if not given
     
     Returns:
         str: Path to the generated PDF file
     """
+    table = as_transaction_table(transactions)
+    if summary is None:
+        summary = summarize(table)
+    
     # Create a PDF document
     doc = SimpleDocTemplate(filename, pagesize=A4)
     styles = getSampleStyleSheet()
@@ -105,38 +113,25 @@ def create_professional_bank_statement(categories, filename="professional_bank_s
     story.append(Paragraph("Transaction Summary", styles['Heading2']))
     story.append(Spacer(1, 12))
     
-    # Calculate summary data
+    # Summary data, only showing categories with transactions
     summary_data = [['Category', 'Count', 'Credits', 'Debits', 'Net']]
-    total_credit = 0
-    total_debit = 0
-    total_count = 0
-    
-    for category, transactions in categories.items():
-        if transactions:  # Only show categories with transactions
-            count = len(transactions)
-            credit_amount = sum(float(t['amount'].replace(',', '')) for t in transactions if t['type'] == 'Credit')
-            debit_amount = sum(float(t['amount'].replace(',', '')) for t in transactions if t['type'] == 'Debit')
-            net_amount = credit_amount - debit_amount
-            
-            total_credit += credit_amount
-            total_debit += debit_amount
-            total_count += count
-            
+    for category, totals in summary.categories.items():
+        if totals['count']:
             summary_data.append([
                 category,
-                str(count),
-                f"${credit_amount:,.2f}",
-                f"(${debit_amount:,.2f})",
-                f"${net_amount:,.2f}"
+                str(totals['count']),
+                f"${totals['credit']:,.2f}",
+                f"(${totals['debit']:,.2f})",
+                f"${totals['net']:,.2f}"
             ])
     
     # Add totals row
     summary_data.append([
         'TOTAL',
-        str(total_count),
-        f"${total_credit:,.2f}",
-        f"(${total_debit:,.2f})",
-        f"${total_credit - total_debit:,.2f}"
+        str(summary.total_count),
+        f"${summary.total_credit:,.2f}",
+        f"(${summary.total_debit:,.2f})",
+        f"${summary.net_cashflow:,.2f}"
     ])
     
     # Create summary table
@@ -165,38 +160,31 @@ def create_professional_bank_statement(categories, filename="professional_bank_s
     story.append(Spacer(1, 30))
     
     # Add detailed transactions for each category
-    for category, transactions in categories.items():
-        if transactions:  # Only show categories with transactions
+    for category in CATEGORY_NAMES:
+        view = table.category(category)
+        if len(view):  # Only show categories with transactions
             story.append(Paragraph(f"{category} Transactions", styles['Heading2']))
             story.append(Spacer(1, 12))
             
             # Prepare transaction data
             transaction_data = [['Date', 'Description', 'Type', 'Amount', 'Balance']]
             
-            # Sort transactions by date
-            sorted_transactions = sorted(transactions, key=lambda x: datetime.strptime(x['date'], '%m/%d/%Y'))
+            # Sort transactions by date; dates in unknown layouts go last
+            rows = view.frame.sort_values('date', kind='stable', na_position='last')
             
-            for transaction in sorted_transactions:
+            for date, description, transaction_type, amount_paise, balance_paise in zip(
+                    rows['date_text'], rows['description'], rows['type'], rows['amount_paise'], rows['balance_paise']):
                 # Format amount based on transaction type
-                amount = float(transaction['amount'].replace(',', ''))
-                formatted_amount = f"${amount:,.2f}" if transaction['type'] == 'Credit' else f"(${amount:,.2f})"
+                amount = amount_paise / 100
+                formatted_amount = f"${amount:,.2f}" if transaction_type == 'Credit' else f"(${amount:,.2f})"
                 
                 # Add balance if available, otherwise show N/A
-                balance = transaction.get('balance', 'N/A')
-                if isinstance(balance, str) and balance.startswith('$'):
-                    formatted_balance = balance
-                elif balance != 'N/A':
-                    try:
-                        formatted_balance = f"${float(str(balance).replace(',', '').replace('$', '')):,.2f}"
-                    except:
-                        formatted_balance = 'N/A'
-                else:
-                    formatted_balance = 'N/A'
+                formatted_balance = 'N/A' if pd.isna(balance_paise) else f"${balance_paise / 100:,.2f}"
                 
                 transaction_data.append([
-                    transaction['date'],
-                    transaction['description'][:30] + "..." if len(transaction['description']) > 30 else transaction['description'],
-                    transaction['type'],
+                    date,
+                    description[:30] + "..." if len(description) > 30 else description,
+                    transaction_type,
                     formatted_amount,
                     formatted_balance
                 ])
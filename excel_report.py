@@ -0,0 +1,330 @@
+"""
+Excel report engine for Convector Bank Statement Analyzer
+Builds the report workbook in a single streaming pass with openpyxl's
+write-only mode: header styles, column widths, the logo and the charts of
+each sheet are declared before its rows are written, so a report is never
+re-opened or parsed back into memory to be styled. Transactions are written
+once, to an autofiltered 'All Transactions' sheet grouped by category, with a
+'Category Index' sheet and a defined name per category pointing at each block.
+The parts every report shares (named styles, the scaled logo, chart
+definitions) are prepared once per worker in a ReportTemplate and cloned
+into each new workbook
+"""
+
+import copy
+import os
+import re
+import threading
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.chart import Reference
+from openpyxl.drawing.image import Image as ExcelImage
+from openpyxl.styles import PatternFill, Font, Alignment, NamedStyle
+from openpyxl.utils import get_column_letter, quote_sheetname
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.hyperlink import Hyperlink
+
+from transaction_table import CATEGORY_NAMES
+
+# Company branding shown next to the Detailed Summary
+LOGO_PATH = 'static/images/logo.png'
+# Displayed size of the logo in pixels; it is stored at twice this for high-DPI screens
+LOGO_SIZE = 80
+COMPANY_TITLE = "E-Faws Tech Pvt Limited"
+COMPANY_SUBTITLE = "Bank Statement Analyzer"
+
+# Report header cells: white bold text on blue, centered
+HEADER_FILL = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+HEADER_FONT = Font(color='FFFFFF', bold=True)
+HEADER_ALIGNMENT = Alignment(horizontal='center')
+NEGATIVE_FONT = Font(color='FF0000')
+LINK_FONT = Font(color='0563C1', underline='single')
+TITLE_FONT = Font(bold=True, size=10, color='800080')
+TITLE_ALIGNMENT = Alignment(horizontal='left')
+
+# Named styles every report registers, by name
+HEADER_STYLE = 'Report Header'
+NEGATIVE_STYLE = 'Negative Amount'
+LINK_STYLE = 'Category Link'
+TITLE_STYLE = 'Company Title'
+
+# Widths of the transaction list columns
+RECORD_COLUMN_WIDTHS = {'Category': 20, 'date': 12, 'description': 50, 'amount': 14, 'type': 10, 'balance': 14}
+
+# Consolidated transaction list and its per-category index
+ALL_TRANSACTIONS_SHEET = 'All Transactions'
+CATEGORY_INDEX_SHEET = 'Category Index'
+CATEGORY_INDEX_COLUMNS = ['Category', 'Transactions', 'First Row', 'Last Row']
+
+# Characters Excel does not allow in sheet names
+INVALID_SHEET_CHARACTERS = '/\\?*[]:'
+
+
+def sheet_name_for(category):
+    """Return the sheet name of a category: invalid characters replaced and cut to Excel's 31 characters"""
+    for character in INVALID_SHEET_CHARACTERS:
+        category = category.replace(character, ' ')
+    return category[:31]
+
+
+def category_view_name(category):
+    """Return the defined name of a category's block of rows, e.g. 'Txn_EMI_Loan_Repayments'"""
+    return 'Txn_' + re.sub(r'\W+', '_', category).strip('_')
+
+
+def sheet_reference(title, column, min_row, max_row):
+    """Reference a column range of a sheet by name, so charts can be declared before the sheet is written"""
+    letter = get_column_letter(column)
+    return Reference(range_string=f"{quote_sheetname(title)}!${letter}${min_row}:${letter}${max_row}")
+
+
+class ReportTemplate:
+    """
+    The styled skeleton shared by every report of a worker
+
+    Prepared on first use: the logo is decoded and scaled once, and chart
+    definitions are built once per key. Each report gets its own copies, as
+    openpyxl binds styles, images and charts to a single workbook.
+    """
+
+    def __init__(self, logo_path=LOGO_PATH):
+        self.logo_path = logo_path
+        self._logo = None
+        self._prepared = False
+        self._charts = {}
+        self._lock = threading.Lock()
+
+    def prepare(self):
+        """Decode and scale the logo, if that has not been done yet"""
+        if self._prepared:
+            return
+        with self._lock:
+            if not self._prepared:
+                self._logo = self._load_logo()
+                self._prepared = True
+
+    def _load_logo(self):
+        if not os.path.exists(self.logo_path):
+            print(f"Note: Logo file not found at {self.logo_path}")
+            return None
+        try:
+            from PIL import Image
+            with Image.open(self.logo_path) as image:
+                image.thumbnail((LOGO_SIZE * 2, LOGO_SIZE * 2))
+                data = BytesIO()
+                image.save(data, format='PNG', optimize=True)
+            return data.getvalue()
+        except Exception as e:
+            print(f"Warning: Could not load logo for Excel reports: {e}")
+            return None
+
+    def named_styles(self):
+        """Return fresh named styles for one workbook, built from the shared style parts"""
+        return [
+            NamedStyle(name=HEADER_STYLE, fill=HEADER_FILL, font=HEADER_FONT, alignment=HEADER_ALIGNMENT),
+            NamedStyle(name=NEGATIVE_STYLE, font=NEGATIVE_FONT),
+            NamedStyle(name=LINK_STYLE, font=LINK_FONT),
+            NamedStyle(name=TITLE_STYLE, font=TITLE_FONT, alignment=TITLE_ALIGNMENT),
+        ]
+
+    def logo_image(self):
+        """Return a new image of the scaled logo, or None if there is no logo"""
+        self.prepare()
+        if self._logo is None:
+            return None
+        logo = ExcelImage(BytesIO(self._logo))
+        logo.width = LOGO_SIZE
+        logo.height = LOGO_SIZE
+        return logo
+
+    def charts(self, key, build):
+        """
+        Return copies of the charts declared for a key, building them on first use
+
+        Args:
+            key: Identifies the charts, including anything their ranges depend on
+            build (callable): Returns the (chart, anchor cell) pairs
+
+        Returns:
+            list: (chart, anchor cell) pairs owned by the caller
+        """
+        with self._lock:
+            if key not in self._charts:
+                self._charts[key] = build()
+            return copy.deepcopy(self._charts[key])
+
+    def new_report(self, filename):
+        """Start a report workbook from this template"""
+        return ExcelReport(filename, self)
+
+
+class ExcelReport:
+    """
+    A report workbook written sheet by sheet in one pass
+
+    Each add_sheet call writes a complete sheet; rows are streamed to disk as
+    they are added, and nothing is read back before the file is saved.
+    """
+
+    def __init__(self, filename, template=None):
+        self.filename = filename
+        self.template = template or report_template
+        self.template.prepare()
+        self.workbook = Workbook(write_only=True)
+        for style in self.template.named_styles():
+            self.workbook.add_named_style(style)
+
+    def _styled_cell(self, sheet, value, style):
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.style = style
+        return cell
+
+    def _header_cell(self, sheet, value):
+        return self._styled_cell(sheet, value, HEADER_STYLE)
+
+    def _negative_cell(self, sheet, value):
+        return self._styled_cell(sheet, value, NEGATIVE_STYLE)
+
+    def add_sheet(self, title, columns, rows=(), widths=None, filled_header=True,
+                  highlight_negative=False, charts=(), branded=False, autofilter=False):
+        """
+        Write one sheet: a header row, then the data rows
+
+        Args:
+            title (str): Sheet name
+            columns (list): Header names
+            rows (iterable): Tuples of cell values, one per row
+            widths (dict): Column name to width
+            filled_header (bool): Give the header the report's blue fill and white text
+            highlight_negative (bool): Show negative numbers in red
+            charts (list): (chart, anchor cell) pairs to place on the sheet
+            branded (bool): Put the company logo and title beside the table
+            autofilter (bool): Freeze the header row and add filter buttons to it
+
+        Returns:
+            The written worksheet
+        """
+        sheet = self.workbook.create_sheet(title)
+        # Widths must be declared before the first row is streamed
+        for index, column in enumerate(columns, start=1):
+            if widths and column in widths:
+                sheet.column_dimensions[get_column_letter(index)].width = widths[column]
+        if autofilter:
+            sheet.freeze_panes = 'A2'
+
+        branding = self._branding(sheet, len(columns)) if branded else {}
+        header = [self._header_cell(sheet, column) for column in columns] if filled_header else list(columns)
+        sheet.append(header + branding.get(0, []))
+        written = 0
+        for written, row in enumerate(rows, start=1):
+            row = list(row)
+            if highlight_negative:
+                row = [self._negative_cell(sheet, value)
+                       if isinstance(value, (int, float)) and not isinstance(value, bool) and value < 0 else value
+                       for value in row]
+            sheet.append(row + branding.get(written, []))
+        # The subtitle still needs its row beside a table with no data rows
+        if written == 0 and 1 in branding:
+            sheet.append([None] * len(columns) + branding[1])
+        if autofilter and columns:
+            sheet.auto_filter.ref = f"A1:{get_column_letter(len(columns))}{written + 1}"
+
+        for chart, anchor in charts:
+            sheet.add_chart(chart, anchor)
+        return sheet
+
+    def add_frame(self, title, frame, **options):
+        """Write a DataFrame as a sheet, with empty cells for missing values"""
+        values = frame.astype(object).where(frame.notna(), None)
+        return self.add_sheet(title, list(frame.columns), values.itertuples(index=False, name=None), **options)
+
+    def add_category_views(self, table):
+        """
+        Write every transaction once, grouped by category, plus an index of the category blocks
+
+        The 'Category Index' sheet links each category to its first row in the
+        'All Transactions' sheet, and each non-empty block also gets a defined
+        name (see category_view_name) for the Name Box.
+
+        Args:
+            table (TransactionTable): Categorized transactions
+        """
+        table = table.sorted_by_category()
+        codes = table.frame['category'].to_numpy()
+        counts = np.bincount(codes[codes >= 0], minlength=len(CATEGORY_NAMES))
+        frame = table.record_frame()
+        # Code -1 (uncategorized) picks the last name
+        frame.insert(0, 'Category', np.array(CATEGORY_NAMES + ['Uncategorized'], dtype=object)[codes])
+        last_column = get_column_letter(len(frame.columns))
+
+        index_sheet = self.workbook.create_sheet(CATEGORY_INDEX_SHEET)
+        index_sheet.column_dimensions['A'].width = RECORD_COLUMN_WIDTHS['Category']
+        index_sheet.append([self._header_cell(index_sheet, column) for column in CATEGORY_INDEX_COLUMNS])
+        # Uncategorized rows sort first; the blocks follow them
+        first_row = 2 + int((codes < 0).sum())
+        for index_row, (category, count) in enumerate(zip(CATEGORY_NAMES, counts.tolist()), start=2):
+            if count == 0:
+                index_sheet.append([category, 0, None, None])
+                continue
+            last_row = first_row + count - 1
+            link = self._styled_cell(index_sheet, category, LINK_STYLE)
+            link.hyperlink = Hyperlink(ref=f"A{index_row}",
+                                       location=f"{quote_sheetname(ALL_TRANSACTIONS_SHEET)}!A{first_row}")
+            index_sheet.append([link, count, first_row, last_row])
+            name = category_view_name(category)
+            self.workbook.defined_names[name] = DefinedName(
+                name, attr_text=f"{quote_sheetname(ALL_TRANSACTIONS_SHEET)}!$A${first_row}:${last_column}${last_row}")
+            first_row = last_row + 1
+
+        return self.add_frame(ALL_TRANSACTIONS_SHEET, frame, widths=RECORD_COLUMN_WIDTHS, autofilter=True)
+
+    def _branding(self, sheet, width):
+        """Place the logo at column N and return the title cells of rows 1 and 2, by row offset"""
+        logo = self.template.logo_image()
+        if logo is None:
+            return {}
+        sheet.add_image(logo, 'N1')
+
+        def title_cells(text):
+            # Title goes in column O, the one after the logo
+            return [None] * max(0, 14 - width) + [self._styled_cell(sheet, text, TITLE_STYLE)]
+
+        return {0: title_cells(COMPANY_TITLE), 1: title_cells(COMPANY_SUBTITLE)}
+
+    def save(self):
+        """Finish the workbook and write it to its file"""
+        self.workbook.save(self.filename)
+
+
+def read_category_view(filename, category):
+    """
+    Read one category's transactions from a report written with add_category_views
+
+    Only the category's block of the 'All Transactions' sheet is parsed.
+
+    Args:
+        filename (str): Report workbook
+        category (str): Category name
+
+    Returns:
+        pd.DataFrame: date, description, amount, type and balance of each transaction
+
+    Raises:
+        ValueError: If the report has no category index (older report layout)
+    """
+    with pd.ExcelFile(filename) as workbook:
+        index = workbook.parse(CATEGORY_INDEX_SHEET)
+        block = index[index['Category'] == category]
+        count = int(block['Transactions'].iloc[0]) if not block.empty else 0
+        if count == 0:
+            return pd.DataFrame(columns=['date', 'description', 'amount', 'type', 'balance'])
+        first_row = int(block['First Row'].iloc[0])
+        frame = workbook.parse(ALL_TRANSACTIONS_SHEET, skiprows=range(1, first_row - 1), nrows=count)
+    return frame.drop(columns='Category')
+
+
+report_template = ReportTemplate()
@@ -0,0 +1,120 @@
+"""
+Background job queue for Convector Bank Statement Analyzer
+Runs long statement analyses on a local worker pool and tracks their progress
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+
+class Job:
+    """A single unit of background work owned by one user"""
+
+    def __init__(self, user_id, description=''):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.description = description
+        self.status = JOB_QUEUED
+        self.progress = 0
+        self.stage = 'Queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def update(self, progress=None, stage=None):
+        """Report progress (0-100) and the name of the current stage"""
+        if progress is not None:
+            self.progress = max(0, min(100, int(progress)))
+        if stage is not None:
+            self.stage = stage
+
+    @property
+    def finished(self):
+        return self.status in (JOB_COMPLETED, JOB_FAILED)
+
+    def to_dict(self):
+        """Return the public status of the job as a JSON-serializable dict"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'stage': self.stage,
+            'description': self.description,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """
+    In-process job queue backed by a thread pool
+
+    Jobs live in memory for the lifetime of the worker process. Finished jobs
+    are dropped after `retention_seconds` so the registry cannot grow forever.
+    """
+
+    def __init__(self, max_workers=2, retention_seconds=3600):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='convector-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user_id, func, *args, description='', **kwargs):
+        """
+        Queue `func(job, *args, **kwargs)` for background execution
+
+        Args:
+            user_id: Owner of the job, checked when the status is requested
+            func (callable): Work function; receives the Job as first argument
+            description (str): Short human readable label for the job
+
+        Returns:
+            Job: The queued job
+        """
+        self._prune()
+        job = Job(user_id, description)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        """Return the job with the given id, or None if it is unknown or expired"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, func, args, kwargs):
+        job.status = JOB_RUNNING
+        job.update(stage='Processing')
+        try:
+            job.result = func(job, *args, **kwargs)
+            job.update(progress=100, stage='Completed')
+            status = JOB_COMPLETED
+        except Exception as e:
+            print(f"Error running job {job.id}: {e}")
+            traceback.print_exc()
+            job.error = str(e)
+            job.update(stage='Failed')
+            status = JOB_FAILED
+        # Record the finish time before publishing the final status, so pruning never sees a
+        # finished job without one
+        job.finished_at = time.time()
+        job.status = status
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
@@ -37,6 +37,31 @@ CREATE TABLE IF NOT EXISTS bank_statement_analyses (
     file_name VARCHAR(255) NOT NULL,
     excel_file_path VARCHAR(500) NOT NULL,
     pdf_file_path VARCHAR(500),
+    content_hash CHAR(64),
+    data_file_path VARCHAR(500),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Create content hash index so repeat uploads can reuse earlier analysis artifacts
+CREATE TABLE IF NOT EXISTS statement_content_index (
+    user_id INT NOT NULL,
+    content_hash CHAR(64) NOT NULL,
+    result_file_path VARCHAR(500) NOT NULL,
+    excel_file_path VARCHAR(500) NOT NULL,
+    pdf_file_path VARCHAR(500),
+    transaction_count INT DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, content_hash),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Create per-user category overrides, keyed by normalized description
+CREATE TABLE IF NOT EXISTS category_overrides (
+    user_id INT NOT NULL,
+    description_key VARCHAR(255) NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, description_key),
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
@@ -92,6 +117,7 @@ CREATE INDEX idx_subscriptions_user_id ON subscriptions(user_id);
 CREATE INDEX idx_subscriptions_end_date ON subscriptions(end_date);
 CREATE INDEX idx_analyses_user_id ON bank_statement_analyses(user_id);
 CREATE INDEX idx_analyses_date ON bank_statement_analyses(analysis_date);
+CREATE INDEX idx_analyses_content_hash ON bank_statement_analyses(content_hash);
 CREATE INDEX idx_notifications_user_id ON notifications(user_id);
 CREATE INDEX idx_notifications_created_at ON notifications(created_at);
 CREATE INDEX idx_communication_user_id ON communication_history(user_id);
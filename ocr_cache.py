@@ -0,0 +1,82 @@
+"""
+OCR result cache for Convector Bank Statement Analyzer
+Stores OCR text on disk keyed by a hash of the normalized image band and the OCR
+settings, evicting the least recently used entries when the cache grows too large
+"""
+
+import hashlib
+import os
+
+from disk_lru import DiskLru
+
+# Bump when normalization changes in a way the image hash would not capture
+CACHE_FORMAT_VERSION = 1
+
+
+class OcrCache:
+    """
+    On-disk OCR text cache with size-based LRU eviction
+
+    Entries are plain text files sharded by the first two characters of their
+    key. A file's modification time records its last use, so the least
+    recently used entries are evicted first once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lru = DiskLru(directory, max_bytes)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def make_key(self, mode, size, data, settings):
+        """
+        Build the cache key of one image band
+
+        Args:
+            mode (str): PIL image mode of the band
+            size (tuple): Band width and height in pixels
+            data (bytes): Raw pixel data of the band
+            settings (tuple): OCR settings that affect the output (language, config, engine version)
+
+        Returns:
+            str: Hex digest identifying the band and settings
+        """
+        digest = hashlib.sha256()
+        digest.update(repr((CACHE_FORMAT_VERSION, mode, size, settings)).encode('utf-8'))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached text for a key, or None on a miss"""
+        if not self.enabled:
+            return None
+        f = self._lru.open(self._path(key), 'r', encoding='utf-8')
+        if f is None:
+            self.misses += 1
+            return None
+        with f:
+            text = f.read()
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        """Store the text for a key, evicting old entries if the cache is over its size limit"""
+        if not self.enabled:
+            return
+
+        def write(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+
+        try:
+            self._lru.store(self._path(key), write)
+        except OSError as e:
+            print(f"Warning: Could not write OCR cache entry: {e}")
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
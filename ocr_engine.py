@@ -0,0 +1,228 @@
+"""
+OCR engine for Convector Bank Statement Analyzer
+Normalizes statement images (downscaling over-sized photos to a target DPI),
+splits multi-frame images into frames and tall pages into horizontal bands, and
+runs tesseract on the pieces concurrently on the shared process pool. Results are
+cached on disk so re-uploads and retries of the same scan skip tesseract
+"""
+
+import io
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+from ocr_cache import OcrCache
+from process_pool import PROCESS_WORKERS, get_process_pool, reset_process_pool
+
+# Try to import OCR libraries
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+try:
+    from PIL import Image, ImageSequence
+except ImportError:
+    Image = None
+    ImageSequence = None
+
+# Tesseract is most accurate around 300 DPI; larger phone photos only cost time
+OCR_TARGET_DPI = int(os.environ.get('OCR_TARGET_DPI', 300))
+
+# Width of a statement page in inches (A4), used when an image carries no DPI
+PAGE_WIDTH_INCHES = 8.27
+
+# Pages taller than this (in pixels, after downscaling) are split into bands
+OCR_BAND_HEIGHT = int(os.environ.get('OCR_BAND_HEIGHT', 1200))
+
+# Bands are cut on a blank row found within this many pixels of the target cut
+BAND_SEARCH_MARGIN = 150
+
+# Average row brightness (0-255) above which a row counts as blank paper
+BLANK_ROW_BRIGHTNESS = 245
+
+OCR_LANG = os.environ.get('OCR_LANG', 'eng')
+OCR_CONFIG = os.environ.get('OCR_CONFIG', '')
+
+# OCR results are cached on disk by image content; set OCR_CACHE_MAX_MB=0 to disable
+OCR_CACHE_DIR = os.environ.get('OCR_CACHE_DIR', os.path.join('uploads', 'ocr_cache'))
+OCR_CACHE_MAX_MB = int(os.environ.get('OCR_CACHE_MAX_MB', 256))
+ocr_cache = OcrCache(OCR_CACHE_DIR, OCR_CACHE_MAX_MB * 1024 * 1024)
+
+_tesseract_version = None
+
+
+def ocr_available():
+    """Return True if both pytesseract and Pillow are importable"""
+    return pytesseract is not None and Image is not None
+
+
+def estimate_dpi(image):
+    """
+    Return the image DPI from its metadata, or estimate it from a page width
+
+    Phone cameras tag photos 72 or 96 DPI whatever their size, which would make
+    a 4000 pixel wide photo a 55 inch page. A tag is only trusted when it does
+    not imply a page wider than PAGE_WIDTH_INCHES.
+    """
+    width_dpi = image.width / PAGE_WIDTH_INCHES
+    dpi = image.info.get('dpi')
+    if dpi and dpi[0] and dpi[0] > 1:
+        return max(float(dpi[0]), width_dpi)
+    return width_dpi
+
+
+def normalize_image(image, target_dpi=OCR_TARGET_DPI):
+    """
+    Prepare one image frame for OCR
+
+    Converts the frame to grayscale and downscales it when its resolution is
+    above `target_dpi`. Images at or below the target are never upscaled.
+
+    Returns:
+        PIL.Image.Image: The normalized grayscale image
+    """
+    image = image.convert('L')
+    scale = target_dpi / estimate_dpi(image)
+    if scale < 1:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+    return image
+
+
+def find_band_cuts(image, band_height=OCR_BAND_HEIGHT, margin=BAND_SEARCH_MARGIN):
+    """
+    Choose the rows at which a tall page is cut into bands
+
+    Each cut is placed on the blank row closest to the ideal cut position so
+    that lines of text are not split between two bands.
+
+    Returns:
+        list: Row offsets, starting with 0 and ending with the image height
+    """
+    height = image.height
+    if height <= band_height:
+        return [0, height]
+
+    # Average brightness of each row, computed by squashing the image to one column
+    row_brightness = list(image.convert('L').resize((1, height), Image.BOX).getdata())
+
+    cuts = [0]
+    while height - cuts[-1] > band_height:
+        target = cuts[-1] + band_height
+        low = max(cuts[-1] + 1, target - margin)
+        high = min(height - 1, target + margin)
+        blank_rows = [row for row in range(low, high + 1) if row_brightness[row] >= BLANK_ROW_BRIGHTNESS]
+        cuts.append(min(blank_rows, key=lambda row: abs(row - target)) if blank_rows else target)
+    cuts.append(height)
+    return cuts
+
+
+def split_into_bands(image, band_height=OCR_BAND_HEIGHT):
+    """Split a page image into horizontal bands, cut on blank rows where possible"""
+    cuts = find_band_cuts(image, band_height)
+    return [image.crop((0, top, image.width, bottom)) for top, bottom in zip(cuts, cuts[1:])]
+
+
+def prepare_ocr_tasks(image, target_dpi=OCR_TARGET_DPI, band_height=OCR_BAND_HEIGHT):
+    """
+    Turn an image (possibly multi-frame) into OCR work items in reading order
+
+    Returns:
+        list: (mode, size, raw bytes) tuples, cheap to send to pool workers
+    """
+    tasks = []
+    for frame in ImageSequence.Iterator(image):
+        normalized = normalize_image(frame, target_dpi)
+        for band in split_into_bands(normalized, band_height):
+            tasks.append((band.mode, band.size, band.tobytes()))
+    return tasks
+
+
+def ocr_task(task, lang=OCR_LANG, config=OCR_CONFIG):
+    """
+    Run tesseract on one prepared band
+
+    Runs inside pool workers. Tesseract's own threading is limited to one
+    thread per process because the pool already keeps every core busy.
+    """
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+    mode, size, data = task
+    return pytesseract.image_to_string(Image.frombytes(mode, size, data), lang=lang, config=config)
+
+
+def ocr_settings():
+    """Return the OCR settings that affect tesseract's output, used in cache keys"""
+    global _tesseract_version
+    if _tesseract_version is None:
+        try:
+            _tesseract_version = str(pytesseract.get_tesseract_version())
+        except Exception:
+            _tesseract_version = 'unknown'
+    return (OCR_LANG, OCR_CONFIG, _tesseract_version)
+
+
+def run_ocr_tasks(tasks):
+    """
+    OCR prepared bands, skipping tesseract for bands already in the OCR cache
+
+    Cache misses run in parallel when there is more than one of them.
+
+    Returns:
+        list: Text of each band, in the order of `tasks`
+    """
+    settings = ocr_settings()
+    keys = [ocr_cache.make_key(mode, size, data, settings) for mode, size, data in tasks]
+    texts = [ocr_cache.get(key) for key in keys]
+    missing = [index for index, text in enumerate(texts) if text is None]
+
+    for index, text in zip(missing, _ocr_uncached([tasks[index] for index in missing])):
+        texts[index] = text
+        ocr_cache.put(keys[index], text)
+    return texts
+
+
+def _ocr_uncached(tasks):
+    if len(tasks) <= 1 or PROCESS_WORKERS <= 1:
+        for task in tasks:
+            yield ocr_task(task)
+        return
+
+    done = 0
+    try:
+        pool = get_process_pool()
+        futures = [pool.submit(ocr_task, task) for task in tasks]
+        for future in futures:
+            text = future.result()
+            done += 1
+            yield text
+    except BrokenProcessPool as e:
+        print(f"Parallel OCR failed, falling back to sequential: {e}")
+        reset_process_pool()
+        for task in tasks[done:]:
+            yield ocr_task(task)
+
+
+def iter_image_text(source):
+    """
+    Yield OCR text for an image file, band by band in reading order
+
+    Args:
+        source: Path or binary file object of the image
+
+    Yields:
+        str: Text of each band
+    """
+    with Image.open(source) as image:
+        tasks = prepare_ocr_tasks(image)
+    for text in run_ocr_tasks(tasks):
+        yield text
+
+
+def ocr_image_file(source):
+    """Return the OCR text of an image file, with bands joined in reading order"""
+    return "\n".join(iter_image_text(source))
+
+
+def ocr_image_bytes(data):
+    """Return the OCR text of an encoded image held in memory"""
+    return ocr_image_file(io.BytesIO(data))
@@ -0,0 +1,104 @@
+"""
+PDF text extraction for Convector Bank Statement Analyzer
+Extracts page text sequentially for short statements and splits long statements
+into page ranges that are extracted concurrently on the shared process pool.
+Pages are yielded as they become available so parsing can start early
+"""
+
+import os
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+
+import PyPDF2
+
+from process_pool import PROCESS_WORKERS, get_process_pool, reset_process_pool
+
+# Statements shorter than this are not worth the inter-process overhead
+PARALLEL_MIN_PAGES = int(os.environ.get('PARALLEL_PDF_MIN_PAGES', 16))
+
+# Each worker task handles this many pages at most
+PAGES_PER_TASK = int(os.environ.get('PARALLEL_PDF_PAGES_PER_TASK', 8))
+
+
+def count_pdf_pages(filepath):
+    """Return the number of pages in a PDF file"""
+    with open(filepath, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def extract_page_range(filepath, start, end):
+    """
+    Extract the text of pages [start, end) from a PDF file
+
+    Runs inside pool workers, so it opens its own reader on the file.
+
+    Returns:
+        list: One text string per page, in page order
+    """
+    with open(filepath, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [(pdf_reader.pages[index].extract_text() or '') for index in range(start, end)]
+
+
+def extract_page_images(filepath, index):
+    """Return the encoded bytes of every image embedded in one PDF page"""
+    with open(filepath, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [image.data for image in pdf_reader.pages[index].images]
+
+
+def split_page_ranges(page_count, pages_per_task=PAGES_PER_TASK, workers=PROCESS_WORKERS):
+    """Split pages into contiguous (start, end) ranges, at least one per worker when possible"""
+    task_size = max(1, min(pages_per_task, -(-page_count // max(1, workers))))
+    return [(start, min(start + task_size, page_count)) for start in range(0, page_count, task_size)]
+
+
+def iter_pdf_pages(filepath, parallel=None):
+    """
+    Yield the text of every page of a PDF file in page order
+
+    In parallel mode at most two page ranges per worker are in flight at once,
+    so memory stays bounded by a few ranges however long the statement is.
+
+    Args:
+        filepath (str): Path to the PDF file
+        parallel (bool): Force (True) or disable (False) parallel extraction;
+            None picks parallel mode for statements of PARALLEL_MIN_PAGES or more
+
+    Yields:
+        str: Text of each page
+    """
+    page_count = count_pdf_pages(filepath)
+    if parallel is None:
+        parallel = page_count >= PARALLEL_MIN_PAGES and PROCESS_WORKERS > 1
+
+    if not parallel or page_count <= 1:
+        with open(filepath, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page in pdf_reader.pages:
+                yield page.extract_text() or ''
+        return
+
+    ranges = deque(split_page_ranges(page_count))
+    next_page = 0
+    try:
+        pool = get_process_pool()
+        in_flight = deque()
+        while ranges or in_flight:
+            while ranges and len(in_flight) < 2 * PROCESS_WORKERS:
+                start, end = ranges.popleft()
+                in_flight.append(pool.submit(extract_page_range, filepath, start, end))
+            for page in in_flight.popleft().result():
+                next_page += 1
+                yield page
+    except BrokenProcessPool as e:
+        print(f"Parallel PDF extraction failed, falling back to sequential: {e}")
+        reset_process_pool()
+        # Resume after the pages that were already delivered
+        for page in extract_page_range(filepath, next_page, page_count):
+            yield page
+
+
+def extract_pdf_pages(filepath, parallel=None):
+    """Extract the text of every page of a PDF file as a list, in page order"""
+    return list(iter_pdf_pages(filepath, parallel=parallel))
@@ -0,0 +1,50 @@
+"""
+Shared process pool for Convector Bank Statement Analyzer
+CPU-heavy stages (PDF text extraction, OCR) fan out over this pool instead of
+running on the single thread that handles the job
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+PROCESS_WORKERS = int(os.environ.get('PROCESS_WORKERS', os.cpu_count() or 1))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """
+    Return the process pool shared by this worker process, creating it on first use
+
+    The pool is created lazily so that gunicorn can fork workers before any
+    child processes exist, and it is recreated if the current process is a
+    fork of the one that created it.
+
+    Returns:
+        ProcessPoolExecutor: The shared pool
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # Jobs run on threads, and forking a threaded process is unsafe, so
+            # workers are started from a clean forkserver where available
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+            else:
+                context = multiprocessing.get_context()
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS, mp_context=context)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def reset_process_pool():
+    """Discard a broken pool so the next call to get_process_pool starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
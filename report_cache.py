@@ -0,0 +1,104 @@
+"""
+Report artifact cache for Convector Bank Statement Analyzer
+Excel and PDF reports are rendered from an analysis' persisted transactions on
+the first download and kept on disk keyed by analysis and rules version, so a
+report is built at most once per rulebook and only if someone asks for it
+"""
+
+import os
+import re
+import shutil
+import threading
+
+from disk_lru import DiskLru
+
+
+class ReportCache:
+    """
+    On-disk cache of rendered reports with size-based LRU eviction
+
+    Artifacts live in one folder per analysis, named by rules version and kind
+    (e.g. 'xlsx', 'pdf'). Rendering a newer rules version removes the older
+    artifacts of that kind. The least recently used artifacts are evicted
+    first once `max_bytes` is exceeded. Concurrent requests for the same
+    artifact render it only once.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._render_locks = {}
+        self._lru = DiskLru(directory, max_bytes)
+
+    def path(self, analysis_key, rules_version, kind):
+        """Return where an artifact is kept"""
+        version = re.sub(r'[^\w.-]', '_', str(rules_version))
+        return os.path.join(self._folder(analysis_key), f"{version}.{kind}")
+
+    def open_or_render(self, analysis_key, rules_version, kind, render):
+        """
+        Open an artifact for reading, rendering it first if it is not cached
+
+        The artifact is opened before the cache can evict it, so the returned
+        file stays readable even if the artifact is evicted meanwhile.
+
+        Args:
+            analysis_key: Analysis id (or another unique key) the artifact belongs to
+            rules_version (str): Version of the categorization rules the artifact reflects
+            kind (str): Artifact kind, used as the file extension
+            render (callable): Writes the artifact to the file path it is given
+
+        Returns:
+            file: The artifact, open in binary mode; the caller closes it
+        """
+        path = self.path(analysis_key, rules_version, kind)
+        f = self._lru.open(path)
+        if f is not None:
+            self.hits += 1
+            return f
+
+        with self._lock:
+            render_lock = self._render_locks.setdefault(path, threading.Lock())
+        try:
+            with render_lock:
+                # Another request may have rendered it while this one waited
+                f = self._lru.open(path)
+                if f is not None:
+                    self.hits += 1
+                    return f
+                self.misses += 1
+                f = self._lru.store(path, render, 'rb')
+        finally:
+            with self._lock:
+                self._render_locks.pop(path, None)
+
+        # Artifacts of the same kind for older rules versions are stale now
+        try:
+            stale = [entry.path for entry in os.scandir(os.path.dirname(path))
+                     if entry.path != path and entry.name.endswith(f".{kind}")]
+        except OSError:
+            stale = []
+        for stale_path in stale:
+            self._lru.discard(stale_path)
+        return f
+
+    def remove(self, analysis_key):
+        """Delete every cached artifact of an analysis"""
+        shutil.rmtree(self._folder(analysis_key), ignore_errors=True)
+        self._lru.forget_size()
+
+    def stats(self):
+        """Return the cache's hit counters"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'max_bytes': self.max_bytes
+        }
+
+    def _folder(self, analysis_key):
+        return os.path.join(self.directory, re.sub(r'[^\w.-]', '_', str(analysis_key)))
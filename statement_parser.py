@@ -0,0 +1,540 @@
+"""
+Statement parser for Convector Bank Statement Analyzer
+Turns extracted statement text into transactions incrementally: extractors yield
+text chunks (usually one per page), the parser consumes them line by line and
+yields transactions, so peak memory is bounded by a page rather than the document.
+Single-line statements are matched by a tokenizer that runs in linear time, and a
+per-document time budget guards against anything pathological getting through
+"""
+
+import os
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+# All patterns are compiled once at import; every line shape starts with a date
+DATE = r'\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4}'
+AMOUNT = r'[\d,]+\.?\d{0,2}'
+
+# Each single-line shape is: date, whitespace, description (any text without a
+# '$'), whitespace, then a tail of amounts. Tails never contain whitespace
+# inside an amount, so they are matched at word starts only:
+# Shape 1: Date, Description, Amount, Balance (common format)
+AMOUNT_BALANCE_TAIL_RE = re.compile(rf'\$?({AMOUNT})\s+\$?({AMOUNT})')
+
+# Shape 2: Date, Description, Debit, Credit, Balance
+DEBIT_CREDIT_BALANCE_TAIL_RE = re.compile(rf'\(?\$?({AMOUNT})\)?\s+\(?\$?({AMOUNT})\)?\s+\$?({AMOUNT})')
+
+# Shape 3: Generic pattern for transactions
+AMOUNT_TAIL_RE = re.compile(rf'\(?\$?({AMOUNT})\)?')
+
+DATE_RE = re.compile(DATE)
+DATE_LINE_RE = DATE_RE
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Zero-width match at every position where a date starts, overlapping ones included
+DATE_ANCHOR_RE = re.compile(f'(?={DATE})')
+
+MONEY_RE = re.compile(r'[\d,]+\.?\d{0,2}')
+NON_AMOUNT_RE = re.compile(r'[^\d\.]')
+NON_SIGNED_AMOUNT_RE = re.compile(r'[^\d\.\(\)]')
+
+# Parsing a document may take at most this many seconds (0 disables the limit)
+PARSE_TIME_BUDGET = float(os.environ.get('PARSE_TIME_BUDGET', 60))
+
+# How many date positions are scanned between time budget checks
+BUDGET_CHECK_INTERVAL = 256
+
+# Names of the line shapes the parser recognizes, reported by StatementParser.shape
+SHAPE_BLOCK = 'block'
+SHAPE_AMOUNT_BALANCE = 'date_description_amount_balance'
+SHAPE_DEBIT_CREDIT_BALANCE = 'date_description_debit_credit_balance'
+SHAPE_AMOUNT = 'date_description_amount'
+
+# A structured transaction block is five lines: date, description, type, amount, balance
+BLOCK_SIZE = 5
+
+
+class BlockParser:
+    """Recognizes five-line transaction blocks in a stream of lines"""
+
+    def __init__(self):
+        self.window = deque()
+
+    def feed(self, line):
+        """Add the next line and return a transaction if one was completed, else None"""
+        self.window.append(line)
+        transaction = None
+        while len(self.window) >= BLOCK_SIZE:
+            matched, transaction = self._parse_block()
+            if matched:
+                self.window.clear()
+            else:
+                self.window.popleft()
+        return transaction
+
+    def _parse_block(self):
+        """Try to read a block at the head of the window; return (matched, transaction)"""
+        line = self.window[0].strip()
+
+        # Look for transaction date pattern
+        if not DATE_LINE_RE.match(line):
+            return False, None
+
+        # Check if this looks like a transaction block
+        # Date should be followed by description, type, amount, balance
+        try:
+            date = line.strip()
+            description = self.window[1].strip()
+            trans_type = self.window[2].strip()
+            amount_raw = self.window[3].strip()
+            balance_raw = self.window[4].strip()
+
+            # Validate that this is actually a transaction
+            # Check if type is Credit or Debit and amount looks like money
+            if trans_type in ['Credit', 'Debit'] and MONEY_RE.search(amount_raw):
+                # Clean up amount and balance
+                amount = NON_AMOUNT_RE.sub('', amount_raw) if amount_raw else '0'
+                balance = NON_AMOUNT_RE.sub('', balance_raw) if balance_raw else '0'
+
+                # Handle parentheses for debits
+                if '(' in amount_raw and ')' in amount_raw:
+                    trans_type = 'Debit'
+                    amount = amount.replace('(', '').replace(')', '')
+
+                if float(amount) > 0:
+                    return True, {
+                        'date': date,
+                        'description': description,
+                        'amount': amount,
+                        'balance': balance,
+                        'type': trans_type
+                    }
+
+                # Move to next potential transaction
+                return True, None
+        except (IndexError, ValueError):
+            # Not a valid transaction block, continue
+            pass
+
+        return False, None
+
+
+def _pattern1_transaction(groups):
+    date, description, amount, balance = groups
+    # Clean up amount and balance
+    amount = NON_AMOUNT_RE.sub('', amount) if amount else '0'
+    balance = NON_AMOUNT_RE.sub('', balance) if balance else '0'
+
+    if not (amount and float(amount) > 0):
+        return None
+
+    # Determine transaction type based on context
+    desc_lower = description.lower()
+    if 'deposit' in desc_lower or 'credited' in desc_lower or 'cr' in desc_lower or 'salary' in desc_lower:
+        trans_type = 'Credit'
+    elif 'withdrawal' in desc_lower or 'debited' in desc_lower or 'dr' in desc_lower or 'atm' in desc_lower:
+        trans_type = 'Debit'
+    else:
+        # Default heuristic
+        trans_type = 'Credit' if 'cr' in desc_lower else 'Debit'
+
+    return {
+        'date': date,
+        'description': description.strip(),
+        'amount': amount,
+        'balance': balance,
+        'type': trans_type
+    }
+
+
+def _pattern2_transaction(groups):
+    date, description, debit, credit, balance = groups
+    # Clean up values
+    debit = NON_SIGNED_AMOUNT_RE.sub('', debit) if debit else '0'
+    credit = NON_SIGNED_AMOUNT_RE.sub('', credit) if credit else '0'
+    balance = NON_AMOUNT_RE.sub('', balance) if balance else '0'
+
+    # Remove parentheses and handle negative values
+    if '(' in debit and ')' in debit:
+        debit = debit.replace('(', '').replace(')', '')
+        trans_type = 'Debit'
+        amount = debit
+    elif '(' in credit and ')' in credit:
+        credit = credit.replace('(', '').replace(')', '')
+        trans_type = 'Credit'
+        amount = credit
+    elif credit and float(credit) > 0:
+        trans_type = 'Credit'
+        amount = credit
+    elif debit and float(debit) > 0:
+        trans_type = 'Debit'
+        amount = debit
+    else:
+        trans_type = 'Debit'
+        amount = '0'
+
+    return {
+        'date': date,
+        'description': description.strip(),
+        'amount': amount,
+        'balance': balance,
+        'type': trans_type
+    }
+
+
+def _pattern3_transaction(groups):
+    date, description, amount = groups
+    # Clean up amount
+    amount = NON_AMOUNT_RE.sub('', amount) if amount else '0'
+
+    if not (amount and float(amount) > 0):
+        return None
+
+    # Determine transaction type based on description
+    desc_lower = description.lower()
+    if 'deposit' in desc_lower or 'credited' in desc_lower or 'cr' in desc_lower or 'salary' in desc_lower:
+        trans_type = 'Credit'
+    elif 'interest' in desc_lower:
+        trans_type = 'Interest'
+    elif 'transfer' in desc_lower or 'trf' in desc_lower or 'wire' in desc_lower:
+        trans_type = 'Transfers'
+    elif 'loan' in desc_lower or 'mortgage' in desc_lower:
+        trans_type = 'Loans'
+    elif 'fee' in desc_lower or 'charge' in desc_lower or 'commission' in desc_lower or 'service' in desc_lower:
+        trans_type = 'Fees'
+    elif 'withdrawal' in desc_lower or 'atm' in desc_lower or 'cash' in desc_lower:
+        trans_type = 'Cash'
+    elif 'investment' in desc_lower or 'stock' in desc_lower or 'mutual fund' in desc_lower or 'shares' in desc_lower:
+        trans_type = 'Investments'
+    elif 'refund' in desc_lower or 'returned' in desc_lower or 'credit' in desc_lower:
+        trans_type = 'Refunds'
+    elif 'insurance' in desc_lower or 'premium' in desc_lower:
+        trans_type = 'Insurance'
+    elif 'tax' in desc_lower or 'irs' in desc_lower or 'revenue' in desc_lower:
+        trans_type = 'Taxes'
+    elif 'payment' in desc_lower or 'pay' in desc_lower or 'bill' in desc_lower or 'credit card' in desc_lower or 'grocery' in desc_lower or 'electricity' in desc_lower or 'store' in desc_lower:
+        trans_type = 'Payments'
+    elif 'debit' in desc_lower or 'debited' in desc_lower:
+        trans_type = 'Withdrawals'
+    else:
+        trans_type = 'Debit'
+
+    return {
+        'date': date,
+        'description': description.strip(),
+        'amount': amount,
+        'balance': '0',  # No balance available
+        'type': trans_type
+    }
+
+
+# Single-line shapes in priority order: (name, tail pattern, match groups to transaction)
+LINE_SHAPES = (
+    (SHAPE_AMOUNT_BALANCE, AMOUNT_BALANCE_TAIL_RE, _pattern1_transaction),
+    (SHAPE_DEBIT_CREDIT_BALANCE, DEBIT_CREDIT_BALANCE_TAIL_RE, _pattern2_transaction),
+    (SHAPE_AMOUNT, AMOUNT_TAIL_RE, _pattern3_transaction),
+)
+
+# Zero-width matches at every word start where a shape's tail begins
+TAIL_FINDERS = tuple(re.compile(rf'(?<=\s)(?={tail.pattern})') for _, tail, _ in LINE_SHAPES)
+
+
+class ParseBudgetExceeded(Exception):
+    """Raised when parsing a document takes longer than its time budget"""
+
+
+class ParseBudget:
+    """
+    Tracks the time spent parsing one document
+
+    Only time inside `with budget:` blocks counts, so time spent extracting
+    the next page (OCR, PDF decoding) is not charged to the parser.
+    """
+
+    def __init__(self, seconds=PARSE_TIME_BUDGET):
+        self.seconds = seconds
+        self.spent = 0.0
+        self._started = None
+
+    def __enter__(self):
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.spent += time.monotonic() - self._started
+        self._started = None
+
+    def check(self):
+        """Raise ParseBudgetExceeded if the budget has been used up"""
+        if not self.seconds:
+            return
+        elapsed = self.spent
+        if self._started is not None:
+            elapsed += time.monotonic() - self._started
+        if elapsed > self.seconds:
+            raise ParseBudgetExceeded(
+                f"Parsing the statement took longer than {self.seconds:g} seconds; "
+                "the file may be corrupt or in an unsupported layout"
+            )
+
+
+class LineTokenizer:
+    """
+    Matches single-line shapes in one chunk of text in linear time
+
+    A shape's description is lazy and may span anything but '$', so matching
+    it with a backtracking regex rescans the rest of the chunk from every
+    date. Instead the word starts where each shape's tail can begin are found
+    once per chunk, and a match at a date is the first such tail after the
+    description start, found by binary search. Results are the same as
+    re.findall with the equivalent single regex.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.dollars = [index for index, char in enumerate(text) if char == '$'] if '$' in text else []
+        self._tail_starts = {}
+        self._word_ends = {}
+
+    def tail_starts(self, shape_index):
+        """Return the sorted positions at which the shape's tail matches after whitespace"""
+        starts = self._tail_starts.get(shape_index)
+        if starts is None:
+            starts = [match.start() for match in TAIL_FINDERS[shape_index].finditer(self.text)]
+            self._tail_starts[shape_index] = starts
+        return starts
+
+    def match_line(self, start, shape_index):
+        """
+        Match a shape at a date position
+
+        Returns:
+            tuple: (match groups, end position), or None if the shape does not match
+        """
+        text = self.text
+        date = DATE_RE.match(text, start)
+        if not date:
+            return None
+        gap = WHITESPACE_RE.match(text, date.end())
+        if not gap:
+            return None
+        description_start = gap.end()
+        tail_pattern = LINE_SHAPES[shape_index][1]
+
+        # The description ends at the whitespace before the first tail after it
+        starts = self.tail_starts(shape_index)
+        index = bisect_right(starts, description_start)
+        if index < len(starts):
+            tail_start = starts[index]
+            description_end = self._word_end_before(tail_start)
+            if not self._has_dollar(description_start, description_end):
+                tail = tail_pattern.match(text, tail_start)
+                return (date.group(), text[description_start:description_end]) + tail.groups(), tail.end()
+
+        # Otherwise the description may be empty when the tail directly follows
+        # a gap of at least two whitespace characters
+        if gap.end() - gap.start() >= 2:
+            tail = tail_pattern.match(text, description_start)
+            if tail:
+                return (date.group(), '') + tail.groups(), tail.end()
+        return None
+
+    def _word_end_before(self, position):
+        end = self._word_ends.get(position)
+        if end is None:
+            end = position
+            while end > 0 and self.text[end - 1].isspace():
+                end -= 1
+            self._word_ends[position] = end
+        return end
+
+    def _has_dollar(self, start, end):
+        index = bisect_left(self.dollars, start)
+        return index < len(self.dollars) and self.dollars[index] < end
+
+
+class FallbackParser:
+    """
+    Matches the single-line shapes chunk by chunk in one pass
+
+    Every shape starts with a date, so the chunk is scanned once for date
+    positions and each shape is only tried there, resuming after its previous
+    match like re.findall would. A shape only counts if no higher-priority
+    shape matches anywhere in the document, so it stops being tried as soon
+    as a higher-priority shape has produced a transaction; a chunk without
+    dates costs a single scan.
+    """
+
+    def __init__(self, shape_indices=None):
+        self.results = tuple([] for _ in LINE_SHAPES)
+        # Positions in LINE_SHAPES of the shapes to try, in priority order
+        self.shape_indices = tuple(range(len(LINE_SHAPES))) if shape_indices is None else tuple(shape_indices)
+
+    def feed(self, chunk, budget=None):
+        if not self.shape_indices:
+            return
+        tokenizer = LineTokenizer(chunk)
+        resume_at = [0] * len(LINE_SHAPES)
+        for count, anchor in enumerate(DATE_ANCHOR_RE.finditer(chunk)):
+            if budget is not None and count % BUDGET_CHECK_INTERVAL == 0:
+                budget.check()
+            start = anchor.start()
+            for index in self.shape_indices:
+                build = LINE_SHAPES[index][2]
+                if start >= resume_at[index]:
+                    found = tokenizer.match_line(start, index)
+                    if found:
+                        groups, resume_at[index] = found
+                        transaction = build(groups)
+                        if transaction is not None:
+                            self.results[index].append(transaction)
+                if self.results[index]:
+                    break
+
+    def winner(self):
+        """Return (shape name, transactions) of the highest-priority shape that matched"""
+        for (shape, _, _), results in zip(LINE_SHAPES, self.results):
+            if results:
+                return shape, results
+        return None, []
+
+    def transactions(self):
+        """Return the results of the highest-priority shape that matched"""
+        return self.winner()[1]
+
+
+class StatementParser:
+    """
+    Parses transactions from a stream of text chunks
+
+    After parsing, `shape` names the line shape the statement matched
+    (one of the SHAPE_* constants), or None if it matched none.
+
+    A `preferred_shape`, e.g. the shape earlier statements with the same
+    layout matched, makes the parser skip the shapes ranked below it. The
+    shapes ranked above it are still tried in the same pass, so a statement
+    that matches a better shape is not held to a worse cached one. If none
+    of them finds anything, the document is parsed again with every shape,
+    and `used_preferred` is False afterwards.
+    """
+
+    def __init__(self, time_budget=PARSE_TIME_BUDGET, preferred_shape=None):
+        self.time_budget = time_budget
+        self.preferred_shape = preferred_shape
+        self.shape = None
+        self.used_preferred = False
+        self._saved = None
+
+    def parse(self, chunks):
+        """
+        Parse transactions from a stream of text chunks
+
+        The document is ''.join(chunks); chunks may end in the middle of a line.
+        Structured five-line blocks are yielded as each chunk is parsed. If the
+        whole document contains no such blocks, the single-line shape results
+        are yielded at the end instead. Those shapes are matched per chunk, so
+        chunks should follow natural boundaries such as pages. Duplicates (same
+        date, description and amount) are dropped.
+
+        Args:
+            chunks: Iterable of text chunks, e.g. one string per PDF page
+
+        Yields:
+            dict: Transactions with date, description, amount, balance and type
+
+        Raises:
+            ParseBudgetExceeded: If parsing takes longer than the time budget
+        """
+        budget = ParseBudget(self.time_budget)
+        self.shape = None
+        self.used_preferred = False
+
+        if self.preferred_shape is None:
+            yield from self._parse(chunks, budget, None)
+            return
+
+        # Keep the text until the preferred shape has matched, in case it does not.
+        # Single-line shapes only yield at the end, so the text is released as soon as
+        # a chunk matches rather than when the first transaction is yielded.
+        self._saved = []
+
+        def saving(chunks):
+            for chunk in chunks:
+                if self._saved is not None:
+                    self._saved.append(chunk)
+                yield chunk
+
+        def release():
+            self._saved = None
+
+        # Blocks rank above every single-line shape, so they are always looked for
+        shape_names = [shape for shape, _, _ in LINE_SHAPES]
+        if self.preferred_shape in shape_names:
+            shape_indices = list(range(shape_names.index(self.preferred_shape) + 1))
+        else:
+            shape_indices = []
+        for transaction in self._parse(saving(chunks), budget, shape_indices, release):
+            self.used_preferred = True
+            yield transaction
+
+        saved, self._saved = self._saved, None
+        if not self.used_preferred:
+            yield from self._parse(saved or [], budget, None)
+
+    def _parse(self, chunks, budget, shape_indices, on_match=None):
+        block_parser = BlockParser()
+        fallback_parser = FallbackParser(shape_indices)
+        found_blocks = False
+        seen = set()
+
+        def is_new(transaction):
+            key = (transaction['date'], transaction['description'], transaction['amount'])
+            if key in seen:
+                return False
+            seen.add(key)
+            return True
+
+        carry = ''
+        for chunk in chunks:
+            completed = []
+            with budget:
+                # The fallback is only needed while no structured block has been found
+                if not found_blocks:
+                    fallback_parser.feed(chunk, budget)
+
+                lines = (carry + chunk).split('\n')
+                carry = lines.pop()
+                for count, line in enumerate(lines):
+                    if count % BUDGET_CHECK_INTERVAL == 0:
+                        budget.check()
+                    transaction = block_parser.feed(line)
+                    if transaction is not None:
+                        found_blocks = True
+                        self.shape = SHAPE_BLOCK
+                        if is_new(transaction):
+                            completed.append(transaction)
+            if on_match is not None and (found_blocks or any(fallback_parser.results)):
+                on_match()
+                on_match = None
+            yield from completed
+
+        transaction = block_parser.feed(carry)
+        if transaction is not None:
+            found_blocks = True
+            self.shape = SHAPE_BLOCK
+            if is_new(transaction):
+                yield transaction
+
+        # If no transactions found with the structured approach, use the single-line shapes
+        if not found_blocks:
+            self.shape, transactions = fallback_parser.winner()
+            for transaction in transactions:
+                if is_new(transaction):
+                    yield transaction
+
+
+def iter_transactions(chunks, time_budget=PARSE_TIME_BUDGET):
+    """Parse transactions from a stream of text chunks; see StatementParser.parse"""
+    return StatementParser(time_budget).parse(chunks)
@@ -0,0 +1,156 @@
+"""
+Structured statement formats for Convector Bank Statement Analyzer
+Reads OFX/QFX and SWIFT MT940 exports straight into transactions. These formats
+carry exact dates, signed amounts and descriptions, so they skip text extraction
+and the regex heuristics entirely
+"""
+
+import re
+from datetime import datetime
+
+from tabular_ingest import DATE_FORMAT
+
+# OFX v1 is SGML with optional closing tags, OFX v2 is XML; one regex reads both
+OFX_TRANSACTION_PATTERN = re.compile(r'<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>)|(?=</BANKTRANLIST>))',
+                                     re.IGNORECASE | re.DOTALL)
+OFX_FIELD_PATTERN = re.compile(r'<([A-Z0-9.]+)>([^<\r\n]*)', re.IGNORECASE)
+
+# MT940 fields start with a tag such as :61: or :86: at the beginning of a line
+MT940_FIELD_PATTERN = re.compile(r'^:(\d{2}[A-Z]?):', re.MULTILINE)
+
+# :61: value date (YYMMDD), optional entry date (MMDD), mark (C, D, RC, RD),
+# optional funds code, amount with a decimal comma, then type code and reference
+MT940_LINE_PATTERN = re.compile(r'^(\d{6})(\d{4})?(RC|RD|C|D)([A-Z])?(\d+(?:,\d*)?)[NFS][A-Z0-9]{3}([^\n]*)')
+
+# :60F:/:60M: opening balance, e.g. C240101INR1234,56
+MT940_BALANCE_PATTERN = re.compile(r'^([CD])(\d{6})([A-Z]{3})(\d+(?:,\d*)?)')
+
+
+def read_statement_text(filepath):
+    """Read a text statement file, accepting UTF-8 (with or without BOM) or Windows-1252"""
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('cp1252', errors='replace')
+
+
+def parse_ofx_transactions(text):
+    """
+    Parse the transactions of an OFX/QFX statement
+
+    Args:
+        text (str): OFX document, SGML (v1) or XML (v2)
+
+    Returns:
+        list: Transactions with date, description, amount, balance and type
+    """
+    transactions = []
+    for match in OFX_TRANSACTION_PATTERN.finditer(text):
+        fields = {name.upper(): value.strip() for name, value in OFX_FIELD_PATTERN.findall(match.group(1))}
+        try:
+            amount = float(fields.get('TRNAMT', '').replace(',', ''))
+            date = datetime.strptime(fields.get('DTPOSTED', '')[:8], '%Y%m%d').strftime(DATE_FORMAT)
+        except ValueError:
+            continue
+        if amount == 0:
+            continue
+
+        name = fields.get('NAME', '')
+        memo = fields.get('MEMO', '')
+        description = f"{name} {memo}" if name and memo and memo != name else (name or memo)
+
+        transactions.append({
+            'date': date,
+            'description': description or fields.get('TRNTYPE', ''),
+            'amount': f"{abs(amount):.2f}",
+            'balance': '0',  # OFX only reports the balance at the end of the statement
+            'type': 'Credit' if amount > 0 else 'Debit'
+        })
+    return transactions
+
+
+def iter_mt940_fields(text):
+    """Yield (tag, value) pairs of an MT940 document, with multi-line values joined"""
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    matches = list(MT940_FIELD_PATTERN.finditer(text))
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(text)
+        value = text[match.end():end]
+        # Drop the end-of-message marker and any SWIFT trailer block
+        value = re.split(r'^-\}?\s*$', value, maxsplit=1, flags=re.MULTILINE)[0]
+        yield match.group(1), value.strip('\n')
+
+
+def _mt940_amount(raw):
+    return float(raw.replace(',', '.'))
+
+
+def parse_mt940_transactions(text):
+    """
+    Parse the transactions of a SWIFT MT940 statement
+
+    Each :61: statement line becomes a transaction, described by the :86:
+    field that follows it (or its own reference when there is none). Balances
+    are carried forward from the :60F: opening balance of each statement.
+
+    Returns:
+        list: Transactions with date, description, amount, balance and type
+    """
+    transactions = []
+    balance = None
+    current = None
+    for tag, value in iter_mt940_fields(text):
+        if tag == '86':
+            description = ' '.join(line.strip() for line in value.split('\n') if line.strip())
+            if current is not None and description:
+                current['description'] = description
+            current = None
+            continue
+        current = None
+        if tag in ('60F', '60M'):
+            match = MT940_BALANCE_PATTERN.match(value.strip())
+            if match:
+                balance = _mt940_amount(match.group(4))
+                if match.group(1) == 'D':
+                    balance = -balance
+        elif tag == '61':
+            match = MT940_LINE_PATTERN.match(value.strip())
+            if not match:
+                continue
+            value_date, _, mark, _, raw_amount, reference = match.groups()
+            try:
+                date = datetime.strptime(value_date, '%y%m%d').strftime(DATE_FORMAT)
+            except ValueError:
+                continue
+            amount = _mt940_amount(raw_amount)
+            # A reversed debit (RD) puts money back, a reversed credit (RC) takes it out
+            is_credit = mark in ('C', 'RD')
+            if balance is not None:
+                balance += amount if is_credit else -amount
+            current = {
+                'date': date,
+                'description': reference.split('//')[0].strip(),
+                'amount': f"{amount:.2f}",
+                'balance': f"{balance:.2f}" if balance is not None else '0',
+                'type': 'Credit' if is_credit else 'Debit'
+            }
+            transactions.append(current)
+    return [transaction for transaction in transactions if float(transaction['amount']) > 0]
+
+
+def extract_transactions_from_ofx(filepath):
+    """Read transactions from an OFX/QFX file, or None if it holds no transaction list"""
+    text = read_statement_text(filepath)
+    if not re.search(r'<BANKTRANLIST>', text, re.IGNORECASE):
+        return None
+    return parse_ofx_transactions(text)
+
+
+def extract_transactions_from_mt940(filepath):
+    """Read transactions from an MT940 file, or None if it holds no statement lines"""
+    text = read_statement_text(filepath)
+    if not re.search(r'^:61:', text, re.MULTILINE):
+        return None
+    return parse_mt940_transactions(text)
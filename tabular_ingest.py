@@ -0,0 +1,378 @@
+"""
+Tabular statement ingestion for Convector Bank Statement Analyzer
+Builds transactions straight from spreadsheet, CSV and DOCX table columns instead of
+flattening them to text and regex-parsing it back: the header row is located, the date,
+description, debit, credit, amount, type and balance columns are detected from
+their labels, and transactions are built from whole columns at once. XLSX sheets and
+CSV files are streamed row by row in chunks so memory stays flat however long the sheet is
+"""
+
+import csv
+import re
+from itertools import chain, islice
+
+import pandas as pd
+
+try:
+    from openpyxl import load_workbook
+except ImportError:
+    load_workbook = None
+
+try:
+    import docx
+except ImportError:
+    docx = None
+
+# Bank exports often start with a few rows of account details before the header
+HEADER_SEARCH_ROWS = 30
+
+DATE_FORMAT = '%d/%m/%Y'
+
+# Rows handed to build_transactions at a time when streaming an XLSX sheet or CSV file
+EXCEL_CHUNK_ROWS = 5000
+
+CSV_DELIMITERS = ',;\t|'
+CSV_SNIFF_BYTES = 64 * 1024
+
+TYPE_LABELS = {'type', 'dr/cr', 'cr/dr', 'debit/credit', 'credit/debit', 'transaction type', 'txn type'}
+DESCRIPTION_KEYWORDS = ('description', 'narration', 'particulars', 'details', 'remarks')
+
+
+def normalize_label(value):
+    """Lowercase a header cell and collapse punctuation and whitespace"""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ''
+    label = re.sub(r'[^a-z/ ]+', ' ', str(value).lower())
+    label = re.sub(r'\s*/\s*', '/', label)
+    return re.sub(r'\s+', ' ', label).strip()
+
+
+def classify_label(label):
+    """Return the column role a normalized header label stands for, or None"""
+    if not label:
+        return None
+    if 'balance' in label:
+        return 'balance'
+    if label in TYPE_LABELS:
+        return 'type'
+    if 'debit' in label or 'withdrawal' in label or label == 'dr':
+        return 'debit'
+    if 'credit' in label or 'deposit' in label or label == 'cr':
+        return 'credit'
+    if 'amount' in label or label.endswith('amt'):
+        return 'amount'
+    if 'date' in label or label == 'dt' or label.endswith(' dt'):
+        return 'date'
+    if any(keyword in label for keyword in DESCRIPTION_KEYWORDS):
+        return 'description'
+    return None
+
+
+def detect_columns(header_row):
+    """
+    Map column roles to column positions for one candidate header row
+
+    The first column of each role wins, so a transaction date is preferred over
+    a value date that follows it.
+
+    Returns:
+        dict: Role name to column index
+    """
+    columns = {}
+    for index, value in enumerate(header_row):
+        role = classify_label(normalize_label(value))
+        if role and role not in columns:
+            columns[role] = index
+    return columns
+
+
+def is_statement_header(columns):
+    """A usable header names the date, the description and at least one money column"""
+    has_money = 'debit' in columns or 'credit' in columns or 'amount' in columns
+    return 'date' in columns and 'description' in columns and has_money
+
+
+def find_header(rows, search_rows=HEADER_SEARCH_ROWS):
+    """
+    Locate the header row among the first rows of a sheet
+
+    Args:
+        rows: Iterable of row value sequences
+
+    Returns:
+        tuple: (header row index, column map), or (None, None) if no header was found
+    """
+    for index, row in enumerate(rows):
+        if index >= search_rows:
+            break
+        columns = detect_columns(row)
+        if is_statement_header(columns):
+            return index, columns
+    return None, None
+
+
+def to_numbers(series):
+    """Convert a column of money values to floats; '(100)', '100-' and '100 Dr' count as negative"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    text = series.astype(str).str.strip().str.lower()
+    negative = (text.str.startswith('(') | text.str.startswith('-') | text.str.endswith('-')
+                | text.str.endswith('dr'))
+    cleaned = text.str.replace(r'[^\d.]', '', regex=True)
+    numbers = pd.to_numeric(cleaned, errors='coerce')
+    return numbers.where(~negative, -numbers)
+
+
+def format_dates(series):
+    """Render a date column as strings, formatting real date cells as dd/mm/yyyy"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime(DATE_FORMAT).fillna('')
+    def render(value):
+        if pd.isna(value):
+            return ''
+        if hasattr(value, 'strftime'):
+            return value.strftime(DATE_FORMAT)
+        return str(value).strip()
+    return series.map(render)
+
+
+def build_transactions(frame, columns):
+    """
+    Build transactions from the data rows of a sheet in bulk
+
+    Args:
+        frame (pd.DataFrame): Data rows with positional columns
+        columns (dict): Column map from detect_columns
+
+    Returns:
+        list: Transactions with date, description, amount, balance and type
+    """
+    if frame.empty:
+        return []
+
+    def column(role):
+        return frame.iloc[:, columns[role]]
+
+    if 'debit' in columns or 'credit' in columns:
+        debit = to_numbers(column('debit')).abs().fillna(0) if 'debit' in columns else pd.Series(0.0, index=frame.index)
+        credit = to_numbers(column('credit')).abs().fillna(0) if 'credit' in columns else pd.Series(0.0, index=frame.index)
+        is_credit = credit > 0
+        amount = credit.where(is_credit, debit)
+    else:
+        signed = to_numbers(column('amount'))
+        if 'type' in columns:
+            is_credit = column('type').astype(str).str.strip().str.lower().str.startswith('c')
+        else:
+            is_credit = signed > 0
+        amount = signed.abs()
+
+    if 'balance' in columns:
+        balance = to_numbers(column('balance')).map(lambda value: '0' if pd.isna(value) else f"{value:.2f}")
+    else:
+        balance = pd.Series('0', index=frame.index)
+
+    result = pd.DataFrame({
+        'date': format_dates(column('date')),
+        'description': column('description').fillna('').astype(str).str.strip(),
+        'amount': amount,
+        'balance': balance,
+        'type': is_credit.map({True: 'Credit', False: 'Debit'})
+    })
+
+    # Rows without a date or a positive amount are totals, notes or blank lines
+    result = result[(result['date'] != '') & (result['amount'] > 0)]
+    result = result.assign(amount=result['amount'].map(lambda value: f"{value:.2f}"))
+    return result.to_dict('records')
+
+
+def transactions_from_dataframe(df):
+    """
+    Build transactions from a sheet read with header=None
+
+    Returns:
+        list: Transactions, or None if the sheet has no recognizable statement header
+    """
+    header_index, columns = find_header(df.head(HEADER_SEARCH_ROWS).itertuples(index=False, name=None))
+    if header_index is None:
+        return None
+    return build_transactions(df.iloc[header_index + 1:], columns)
+
+
+def extract_transactions_from_excel(filepath):
+    """
+    Read transactions directly from the first sheet of an XLS/XLSX statement
+
+    Returns:
+        list: Transactions, or None if the layout is not recognized and the
+            caller should fall back to text extraction
+    """
+    transactions = open_excel_transactions(filepath)
+    return None if transactions is None else list(transactions)
+
+
+def open_excel_transactions(filepath, chunk_rows=EXCEL_CHUNK_ROWS):
+    """
+    Start reading transactions from the first sheet of an XLS/XLSX statement
+
+    XLSX files are streamed with openpyxl's read-only mode; legacy XLS files
+    are read whole with pandas.
+
+    Returns:
+        iterator: Transactions, or None if the layout is not recognized and the
+            caller should fall back to text extraction
+    """
+    if filepath.lower().endswith('.xlsx') and load_workbook is not None:
+        return iter_xlsx_transactions(filepath, chunk_rows)
+    transactions = transactions_from_dataframe(pd.read_excel(filepath, header=None))
+    return None if transactions is None else iter(transactions)
+
+
+def iter_xlsx_transactions(filepath, chunk_rows=EXCEL_CHUNK_ROWS):
+    """
+    Stream transactions from an XLSX sheet without loading the whole workbook
+
+    The header is searched for in the first rows; the data rows that follow
+    are read lazily and built into transactions `chunk_rows` rows at a time.
+
+    Returns:
+        iterator: Transactions, or None if the sheet has no recognizable statement header
+    """
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        # Exporters often write a wrong sheet dimension, which would truncate rows
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        head = list(islice(rows, HEADER_SEARCH_ROWS))
+        header_index, columns = find_header(head)
+    except Exception:
+        workbook.close()
+        raise
+    if header_index is None:
+        workbook.close()
+        return None
+    return _iter_row_chunks(chain(head[header_index + 1:], rows), columns, chunk_rows, workbook.close)
+
+
+def open_csv_transactions(filepath, chunk_rows=EXCEL_CHUNK_ROWS):
+    """
+    Stream transactions from a CSV statement export
+
+    The delimiter is sniffed from the start of the file, then rows are read
+    lazily and built into transactions `chunk_rows` rows at a time.
+
+    Returns:
+        iterator: Transactions, or None if the file has no recognizable statement header
+    """
+    f = open(filepath, 'r', encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        sample = f.read(CSV_SNIFF_BYTES)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+        except csv.Error:
+            dialect = csv.excel
+        rows = csv.reader(f, dialect)
+        head = list(islice(rows, HEADER_SEARCH_ROWS))
+        header_index, columns = find_header(head)
+    except Exception:
+        f.close()
+        raise
+    if header_index is None:
+        f.close()
+        return None
+    return _iter_row_chunks(chain(head[header_index + 1:], rows), columns, chunk_rows, f.close)
+
+
+def _iter_row_chunks(rows, columns, chunk_rows, close):
+    # Streamed rows can be ragged; pad or trim them to the mapped columns.
+    # A chunk that fails to build is retried row by row and its bad rows are
+    # skipped. A read error ends the stream, or is raised if nothing was read
+    # yet, so the caller can still fall back to text extraction.
+    width = max(columns.values()) + 1
+    started = False
+    try:
+        while True:
+            chunk = []
+            read_error = None
+            try:
+                for row in islice(rows, chunk_rows):
+                    chunk.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            except Exception as e:
+                if not started and not chunk:
+                    raise
+                read_error = e
+            if chunk:
+                started = True
+                try:
+                    transactions = build_transactions(pd.DataFrame(chunk), columns)
+                except Exception:
+                    transactions = []
+                    for row in chunk:
+                        try:
+                            transactions.extend(build_transactions(pd.DataFrame([row]), columns))
+                        except Exception as e:
+                            print(f"Warning: Skipped malformed statement row {row!r}: {e}")
+                yield from transactions
+            if read_error is not None:
+                print(f"Warning: Stopped reading statement rows after an unreadable row: {read_error}")
+                break
+            if not chunk:
+                break
+    finally:
+        close()
+
+
+def iter_docx_table_rows(table):
+    """Yield the cell texts of each row of a DOCX table"""
+    for row in table.rows:
+        yield [cell.text.strip() for cell in row.cells]
+
+
+def transactions_from_tables(tables):
+    """
+    Build transactions from the tables of a document
+
+    A table without its own header that has as many columns as the last
+    recognized one is read as its continuation, since Word splits long tables
+    across pages.
+
+    Args:
+        tables: Iterable of tables, each a list of rows of cell values
+
+    Returns:
+        list: Transactions, or None if no table has a recognizable statement header
+    """
+    transactions = None
+    columns = None
+    width = None
+    for rows in tables:
+        if not rows:
+            continue
+        header_index, table_columns = find_header(rows)
+        if header_index is not None:
+            columns, width = table_columns, len(rows[header_index])
+            data_rows = rows[header_index + 1:]
+        elif columns is not None and len(rows[0]) == width:
+            data_rows = rows
+        else:
+            continue
+        if transactions is None:
+            transactions = []
+        if data_rows:
+            transactions.extend(build_transactions(pd.DataFrame(data_rows), columns))
+    return transactions
+
+
+def extract_transactions_from_docx(filepath):
+    """
+    Read transactions directly from the tables of a DOCX statement
+
+    Returns:
+        list: Transactions, or None if python-docx is missing or no table has a
+            recognizable layout and the caller should fall back to text extraction
+    """
+    if docx is None:
+        return None
+    document = docx.Document(filepath)
+    return transactions_from_tables(list(iter_docx_table_rows(table)) for table in document.tables)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for bank layout fingerprinting and the layout registry
+"""
+
+import sys
+sys.path.append('.')  # Add current directory to path
+
+from bank_layouts import identify_bank, fingerprint_layout, LayoutRegistry
+from statement_parser import StatementParser, SHAPE_AMOUNT_BALANCE, SHAPE_AMOUNT, SHAPE_BLOCK
+
+def create_statement_page(transactions):
+    """First page of a single-line statement with a bank header and column labels"""
+    lines = [
+        "HDFC BANK LIMITED",
+        "Branch: MG Road  IFSC: HDFC0001234",
+        "Statement of account",
+        "Date Narration Chq./Ref.No. Value Dt Withdrawal Amt. Deposit Amt. Closing Balance",
+    ]
+    lines.extend(transactions)
+    return "\n".join(lines) + "\n"
+
+def test_identify_bank():
+    """The header identifies the bank before the user's hint does"""
+    assert identify_bank("IFSC: ICIC0000123") == 'icici'
+    assert identify_bank("Kotak Mahindra Bank Ltd") == 'kotak'
+    assert identify_bank("Account statement", bank_name="State Bank of India") == 'sbi'
+    assert identify_bank("Axis Bank statement", bank_name="HDFC") == 'axis'
+    # Bank names must appear as whole words
+    assert identify_bank("Possibility of rain") is None
+    print("✓ Banks identified")
+
+def test_fingerprint_ignores_transactions():
+    """Two statements with the same layout share a fingerprint; transaction lines naming other banks do not matter"""
+    first = fingerprint_layout(create_statement_page(["01/01/2024 NEFT FROM SBI 500.00 1500.00"]))
+    second = fingerprint_layout(create_statement_page(["05/02/2024 UPI AXIS BANK 20.00 980.00"]))
+    assert first == second
+    assert first[0] == 'hdfc'
+    assert first[1][0] == 'date' and 'debit' in first[1] and 'balance' in first[1]
+    assert fingerprint_layout("Some unrelated text\n") is None
+    assert fingerprint_layout("Some unrelated text\n", bank_name="ICICI Bank") == ('icici', (), False)
+    print("✓ Layout fingerprints stable")
+
+def test_registry_remembers_and_evicts():
+    """The registry returns remembered shapes and forgets the least recently used"""
+    registry = LayoutRegistry(max_entries=2)
+    registry.remember('a', SHAPE_BLOCK)
+    registry.remember('b', SHAPE_AMOUNT_BALANCE)
+    assert registry.lookup('a') == SHAPE_BLOCK
+    registry.remember('c', SHAPE_BLOCK)
+    assert registry.lookup('b') is None
+    assert registry.lookup('a') == SHAPE_BLOCK
+    registry.remember('a', None)
+    assert registry.lookup('a') is None
+    assert registry.hits == 2
+    print("✓ Layout registry working")
+
+def test_preferred_shape_falls_back():
+    """A cached shape is tried alone, and a miss re-parses with every shape"""
+    text = create_statement_page(["01/01/2024 Salary Credit 3500.00 3500.00"])
+    expected = list(StatementParser().parse([text]))
+
+    parser = StatementParser(preferred_shape=SHAPE_AMOUNT_BALANCE)
+    assert list(parser.parse([text])) == expected
+    assert parser.used_preferred and parser.shape == SHAPE_AMOUNT_BALANCE
+
+    parser = StatementParser(preferred_shape=SHAPE_BLOCK)
+    assert list(parser.parse(iter([text]))) == expected
+    assert not parser.used_preferred and parser.shape == SHAPE_AMOUNT_BALANCE
+    print("✓ Preferred shape falls back to a full parse")
+
+def test_better_shape_replaces_cached_one():
+    """A cached lower-priority shape does not hide a higher-priority match, and the cache is corrected"""
+    text = create_statement_page(["01/01/2024 Salary Credit 3500.00 3500.00", "02/01/2024 ATM WDL 500.00 3000.00"])
+    expected = list(StatementParser().parse([text]))
+    assert [t['balance'] for t in expected] == ['3500.00', '3000.00']
+
+    registry = LayoutRegistry(max_entries=4)
+    registry.remember('hdfc', SHAPE_AMOUNT)
+    parser = StatementParser(preferred_shape=registry.lookup('hdfc'))
+    assert list(parser.parse([text])) == expected
+    assert parser.used_preferred and parser.shape == SHAPE_AMOUNT_BALANCE
+    registry.remember('hdfc', parser.shape)
+    assert registry.lookup('hdfc') == SHAPE_AMOUNT_BALANCE
+    print("✓ Better shape replaces the cached one")
+
+def test_preferred_shape_releases_text():
+    """Once a single-line shape matches, earlier pages are no longer kept for a fallback"""
+    pages = [create_statement_page([f"0{day}/01/2024 Salary Credit {day}00.00 {day}00.00"]) for day in range(1, 4)]
+    parser = StatementParser(preferred_shape=SHAPE_AMOUNT_BALANCE)
+    kept = []
+
+    def stream():
+        for page in pages:
+            kept.append(None if parser._saved is None else len(parser._saved))
+            yield page
+
+    transactions = list(parser.parse(stream()))
+    assert len(transactions) == 3 and parser.used_preferred
+    # The first page matched, so the text was dropped before the second page arrived
+    assert kept == [0, None, None]
+    print("✓ Preferred shape releases matched text")
+
+if __name__ == "__main__":
+    print("Convector Bank Layout Test")
+    print("=" * 30)
+
+    test_identify_bank()
+    test_fingerprint_ignores_transactions()
+    test_registry_remembers_and_evicts()
+    test_preferred_shape_falls_back()
+    test_better_shape_replaces_cached_one()
+    test_preferred_shape_releases_text()
+
+    print("\nTest completed.")
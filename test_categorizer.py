@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test script for the compiled categorization engine
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+sys.path.append('.')  # Add current directory to path
+
+import pandas as pd
+
+import categorizer
+from categorizer import (CategoryEngine, CategoryRule, KeywordScanner, RulebookWatcher, CategoryMemo,
+                         parse_rulebook, normalize_description, categorize_descriptions, build_override_index,
+                         CATEGORY_RULES_FILE)
+from transaction_table import CATEGORY_NAMES
+
+EXPECTED_CATEGORIES = {
+    'Salary credit ACME': 'Deposits',
+    'ATM cash deposit': 'ATM Deposits',
+    'ATM WDL MG ROAD': 'ATM Withdrawals',
+    'ATM/CR/1234': 'ATM Deposits',
+    'Interest paid': 'Interest',
+    'Online transfer to savings': 'Transfers',
+    'UPI transfer to friend': 'UPI Transfers',
+    'Home loan disbursal': 'Loans',
+    'Loan EMI April': 'EMI/Loan Repayments',
+    'SMS charges': 'Fees',
+    'Cash withdrawal': 'Withdrawals',
+    'Mutual fund SIP': 'Investments',
+    'Amazon refund': 'Refunds',
+    'LIC premium': 'Insurance',
+    'Income tax': 'Deposits',
+    'GST TAX': 'Taxes',
+    'BIL/Electricity bill payment': 'Utility Bills',
+    'Bill payment': 'Other',
+    'NEFT to landlord': 'NEFT/RTGS',
+    'Cash handling': 'Cash',
+    'Debit card POS': 'Withdrawals',
+    'Grocery store': 'Other',
+    '': 'Other',
+}
+
+def load_engine():
+    """Compile the shipped rulebook"""
+    with open(CATEGORY_RULES_FILE, 'r', encoding='utf-8') as f:
+        return parse_rulebook(f.read(), CATEGORY_NAMES)
+
+def test_engine_categories():
+    """Priorities, exclusions and required keywords pick the same categories as the rulebook"""
+    engine = load_engine()
+    for description, category in EXPECTED_CATEGORIES.items():
+        assert engine.categorize(description) == category, description
+    print("✓ Descriptions categorized")
+
+def test_scanner_finds_overlapping_keywords():
+    """Keywords inside other keywords are found, with and without pyahocorasick"""
+    automaton = categorizer.ahocorasick
+    try:
+        for module in (automaton, None):
+            categorizer.ahocorasick = module
+            scanner = KeywordScanner(['loan', 'loan emi', 'emi', 'pay', 'payment'])
+            found = scanner.scan('home loan emi payment')
+            assert found == scanner.mask(['loan', 'loan emi', 'emi', 'pay', 'payment'])
+            assert scanner.scan('nothing here') == 0
+
+            engine = CategoryEngine([CategoryRule('Bills', ['pay'], none_of=['loan'])], default='Misc')
+            assert engine.categorize('Payment') == 'Bills'
+            assert engine.categorize('Loan payment') == 'Misc'
+    finally:
+        categorizer.ahocorasick = automaton
+    print("✓ Overlapping keywords found")
+
+def test_batch_matches_single():
+    """Vectorized batch categorization agrees with one-at-a-time categorization"""
+    descriptions = pd.Series(list(EXPECTED_CATEGORIES) * 3 + [None], index=range(100, 170))
+    automaton = categorizer.ahocorasick
+    try:
+        for module in (automaton, None):
+            categorizer.ahocorasick = module
+            engine = load_engine()
+            result = engine.categorize_series(descriptions)
+            assert list(result.index) == list(descriptions.index)
+            assert list(result) == [engine.categorize(description) for description in descriptions.fillna('')]
+            assert engine.categorize_series(pd.Series([], dtype=object)).empty
+    finally:
+        categorizer.ahocorasick = automaton
+
+    # Rulebooks with more keywords than fit one 63-bit word
+    rules = [CategoryRule(f'Category {index}', [f'kw{index:03d}x']) for index in range(150)]
+    engine = CategoryEngine(rules)
+    descriptions = pd.Series(['kw149x', 'kw070x and kw120x', 'kw000x', 'none'])
+    assert list(engine.categorize_series(descriptions)) == ['Category 149', 'Category 70', 'Category 0', 'Other']
+    print("✓ Batch categorization matches")
+
+def test_rulebook_hot_reload():
+    """A changed rulebook file is recompiled; a broken one leaves the previous rules in place"""
+    rulebook = {'version': 1, 'rules': [{'category': 'Fees', 'any_of': ['fee']}]}
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'rules.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rulebook, f)
+        watcher = RulebookWatcher(path, CATEGORY_NAMES, check_interval=0)
+        first = watcher.engine()
+        assert first.categorize('Annual fee') == 'Fees' and first.version.startswith('1-')
+        assert watcher.engine() is first
+
+        rulebook = {'version': 2, 'rules': [{'category': 'Cash', 'any_of': ['fee']}]}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rulebook, f)
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        second = watcher.engine()
+        assert second.categorize('Annual fee') == 'Cash' and second.version.startswith('2-')
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"rules": [{"category": "Groceries", "any_of": ["store"]}]}')
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 2 * 10 ** 9))
+        assert watcher.engine() is second
+
+    try:
+        parse_rulebook('{"rules": [{"category": "Fees", "any_of": ["Fee"]}]}')
+        assert False, "uppercase keywords must be rejected"
+    except ValueError:
+        pass
+    print("✓ Rulebook hot reload")
+
+def test_memo_skips_repeated_merchants():
+    """Descriptions differing only in reference numbers and dates share one memo entry"""
+    assert normalize_description('UPI/DR/412345/SWIGGY/12-01-2024') == 'upi/dr/#/swiggy/#-#-#'
+    engine = load_engine()
+    memo = CategoryMemo(max_entries=2)
+    descriptions = pd.Series(['UPI/DR/1111/SWIGGY', 'UPI/DR/2222/SWIGGY', 'ATM WDL 0001', 'NEFT CR 99'])
+    expected = [engine.categorize(description) for description in descriptions]
+
+    assert list(categorize_descriptions(engine, descriptions, memo)) == expected
+    assert (memo.hits, memo.misses) == (0, 3)
+    assert list(categorize_descriptions(engine, descriptions, memo, batch=False)) == expected
+    # Only the two most recent merchants are kept
+    assert (memo.hits, memo.misses) == (2, 4)
+    assert memo.stats()['entries'] == 2 and memo.hit_rate == 2 / 6
+
+    # A different rulebook version does not reuse the entries
+    other = parse_rulebook('{"version": 9, "rules": [{"category": "Cash", "any_of": ["atm"]}]}')
+    assert categorize_descriptions(other, descriptions, memo).iloc[2] == 'Cash'
+
+    try:
+        parse_rulebook('{"rules": [{"category": "Fees", "any_of": ["fee2024"]}]}')
+        assert False, "keywords with digits must be rejected"
+    except ValueError:
+        pass
+    print("✓ Category memo")
+
+def test_overrides_checked_before_rules():
+    """A user's overrides win over the rules, for every reference number, and stay out of the shared memo"""
+    engine = load_engine()
+    overrides = build_override_index([('UPI/DR/1111/SWIGGY', 'Fees')], CATEGORY_NAMES)
+    assert overrides == {'upi/dr/#/swiggy': 'Fees'}
+    memo = CategoryMemo()
+    descriptions = pd.Series(['UPI/DR/2222/SWIGGY', 'UPI/DR/3333/ZOMATO'])
+
+    result = categorize_descriptions(engine, descriptions, memo, overrides=overrides)
+    assert list(result) == ['Fees', 'UPI Transfers']
+    assert memo.stats()['entries'] == 1
+    assert list(categorize_descriptions(engine, descriptions, memo)) == ['UPI Transfers', 'UPI Transfers']
+
+    try:
+        build_override_index([('Rent', 'Groceries')], CATEGORY_NAMES)
+        assert False, "unknown categories must be rejected"
+    except ValueError:
+        pass
+    print("✓ Category overrides")
+
+if __name__ == "__main__":
+    print("Convector Categorizer Test")
+    print("=" * 30)
+
+    test_engine_categories()
+    test_scanner_finds_overlapping_keywords()
+    test_batch_matches_single()
+    test_rulebook_hot_reload()
+    test_memo_skips_repeated_merchants()
+    test_overrides_checked_before_rules()
+
+    print("\nTest completed.")
@@ -11,6 +11,7 @@ sys.path.append('.')  # Add current directory to path
 
 # Import functions from app.py
 from app import categorize_transactions, create_excel_report
+from excel_report import read_category_view
 
 def create_sample_transactions():
     """Create sample transactions for testing"""
@@ -106,6 +107,7 @@ def test_enhanced_excel_report():
         'UPI Transfers', 'ATM Deposits', 'ATM Withdrawals', 'Utility Bills',
         'EMI/Loan Repayments', 'NEFT/RTGS', 'Other'
     ]
+    required_sheets = ['Detailed Summary', 'Category Index', 'All Transactions']
     
     print("\nCategory breakdown:")
     for category in expected_categories:
@@ -131,20 +133,19 @@ def test_enhanced_excel_report():
                 print(f"Excel file contains {len(sheets)} sheets: {sheets}")
                 
                 # Check for required sheets
-                required_sheets = ['Enhanced Summary', 'Detailed Summary']
                 for sheet in required_sheets:
                     if sheet in sheets:
                         print(f"  ✓ {sheet} sheet found")
                     else:
                         print(f"  ✗ {sheet} sheet missing")
                 
-                # Check category sheets
-                category_sheets = [cat for cat in expected_categories if len(categories.get(cat, [])) > 0]
-                for sheet in category_sheets:
-                    if sheet in sheets:
-                        print(f"  ✓ {sheet} sheet found")
+                # Check category views
+                for category in expected_categories:
+                    view = read_category_view(filename, category)
+                    if len(view) == len(categories.get(category, [])):
+                        print(f"  ✓ {category} view has {len(view)} transactions")
                     else:
-                        print(f"  ✗ {sheet} sheet missing")
+                        print(f"  ✗ {category} view has {len(view)} transactions")
                         
             except Exception as e:
                 print(f"Error reading Excel file: {e}")
@@ -155,6 +156,16 @@ def test_enhanced_excel_report():
         print(f"Error creating Excel report: {e}")
         return False
     
+    # Outside the try blocks above, so that a mismatch fails the test
+    sheets = pd.ExcelFile(filename).sheet_names
+    assert all(sheet in sheets for sheet in required_sheets)
+    assert not any(sheet.endswith(' Details') for sheet in sheets)
+    # Every transaction is listed once, in the consolidated sheet
+    assert len(pd.read_excel(filename, sheet_name='All Transactions')) == len(transactions)
+    for category in expected_categories:
+        view = read_category_view(filename, category)
+        assert list(view['description']) == [t['description'] for t in categories.get(category, [])]
+    
     return True
 
 if __name__ == "__main__":
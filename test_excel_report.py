@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-pass Excel report engine
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append('.')  # Add current directory to path
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.chart import BarChart
+
+from excel_report import (ExcelReport, ReportTemplate, sheet_name_for, sheet_reference, read_category_view,
+                          category_view_name, HEADER_FILL, LOGO_SIZE)
+from transaction_table import TransactionTable
+
+def test_sheet_names():
+    """Category names become valid Excel sheet names"""
+    assert sheet_name_for('EMI/Loan Repayments') == 'EMI Loan Repayments'
+    assert sheet_name_for('A' * 40) == 'A' * 31
+    print("✓ Sheet names sanitized")
+
+def test_report_written_in_one_pass():
+    """Headers, widths, negative amounts, branding and charts are all in the saved file"""
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, 'report.xlsx')
+        report = ExcelReport(filename)
+
+        chart = BarChart()
+        chart.add_data(sheet_reference('Totals', 2, 1, 3), titles_from_data=True)
+        chart.set_categories(sheet_reference('Totals', 1, 2, 3))
+        report.add_sheet('Totals', ['Category', 'Net'], [('Fees', -10.5), ('Deposits', 20)],
+                         highlight_negative=True, charts=[(chart, 'D2')], branded=True)
+        report.add_frame('Deposits', pd.DataFrame({'date': ['01/01/2024'], 'description': [None]}),
+                         widths={'description': 50}, filled_header=False)
+        report.save()
+
+        workbook = load_workbook(filename)
+        assert workbook.sheetnames == ['Totals', 'Deposits']
+        totals = workbook['Totals']
+        assert totals['A1'].fill.fgColor.rgb == HEADER_FILL.fgColor.rgb and totals['A1'].font.b
+        assert totals['B2'].value == -10.5 and totals['B2'].font.color.rgb == '00FF0000'
+        assert totals['B3'].font.color.rgb != '00FF0000'
+        assert len(totals._charts) == 1
+        if os.path.exists('static/images/logo.png'):
+            assert totals['O1'].value == 'E-Faws Tech Pvt Limited' and len(totals._images) == 1
+
+        deposits = workbook['Deposits']
+        assert deposits.column_dimensions['B'].width == 50
+        assert not deposits['A1'].font.b
+        assert deposits['B2'].value is None
+    print("✓ Report written in one pass")
+
+def test_category_views():
+    """Transactions are written once, grouped by category, and each category reads back on its own"""
+    table = TransactionTable.from_categories({
+        'Fees': [{'date': '01/01/2024', 'description': 'Fee', 'amount': '10', 'balance': '90', 'type': 'Debit'}],
+        'Deposits': [
+            {'date': '02/01/2024', 'description': 'Salary', 'amount': '100', 'balance': '100', 'type': 'Credit'},
+            {'date': '03/01/2024', 'description': 'Bonus', 'amount': '5', 'balance': 'N/A', 'type': 'Credit'},
+        ],
+    })
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, 'report.xlsx')
+        report = ExcelReport(filename)
+        report.add_category_views(table)
+        report.save()
+
+        workbook = load_workbook(filename)
+        assert workbook.sheetnames == ['Category Index', 'All Transactions']
+        transactions = workbook['All Transactions']
+        assert [row[0] for row in transactions.iter_rows(min_row=2, values_only=True)] == ['Deposits', 'Deposits', 'Fees']
+        assert transactions.auto_filter.ref == 'A1:F4' and transactions.freeze_panes == 'A2'
+        assert workbook.defined_names[category_view_name('Deposits')].attr_text == "'All Transactions'!$A$2:$F$3"
+        assert workbook['Category Index']['A2'].hyperlink.location == "'All Transactions'!A2"
+        assert category_view_name('EMI/Loan Repayments') == 'Txn_EMI_Loan_Repayments'
+
+        assert list(read_category_view(filename, 'Deposits')['description']) == ['Salary', 'Bonus']
+        assert list(read_category_view(filename, 'Fees')['type']) == ['Debit']
+        assert read_category_view(filename, 'Loans').empty
+    print("✓ Category views")
+
+def test_template_prepared_once():
+    """The logo is scaled and the charts are built once, then copied into every report"""
+    template = ReportTemplate()
+    builds = []
+
+    def build():
+        builds.append(1)
+        chart = BarChart()
+        chart.add_data(sheet_reference('Totals', 2, 1, 3), titles_from_data=True)
+        return [(chart, 'D2')]
+
+    first = template.charts('Totals', build)
+    second = template.charts('Totals', build)
+    assert len(builds) == 1 and first[0][0] is not second[0][0]
+
+    with tempfile.TemporaryDirectory() as folder:
+        for name in ('first.xlsx', 'second.xlsx'):
+            report = template.new_report(os.path.join(folder, name))
+            report.add_sheet('Totals', ['Category', 'Net'], [('Fees', -1)], highlight_negative=True,
+                             charts=template.charts('Totals', build), branded=True)
+            report.save()
+        workbook = load_workbook(os.path.join(folder, 'second.xlsx'))
+        assert workbook['Totals']['A1'].style == 'Report Header'
+        assert workbook['Totals']['B2'].font.color.rgb == '00FF0000'
+        assert len(workbook['Totals']._charts) == 1
+
+    assert len(builds) == 1
+    logo = template.logo_image()
+    if logo is not None:
+        assert (logo.width, logo.height) == (LOGO_SIZE, LOGO_SIZE)
+        assert logo.ref is not template.logo_image().ref
+    print("✓ Template prepared once")
+
+if __name__ == "__main__":
+    print("Convector Excel Report Test")
+    print("=" * 30)
+
+    test_sheet_names()
+    test_report_written_in_one_pass()
+    test_category_views()
+    test_template_prepared_once()
+
+    print("\nTest completed.")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for the background job queue
+"""
+
+import time
+import sys
+sys.path.append('.')  # Add current directory to path
+
+from job_queue import JobQueue, JOB_COMPLETED, JOB_FAILED
+
+def wait_for(job, timeout=5):
+    """Wait until a job has finished or the timeout expires"""
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+def test_job_completes_with_result():
+    """A successful job reports its result and 100% progress"""
+    queue = JobQueue(max_workers=1)
+
+    def work(job, value):
+        job.update(progress=50, stage='Halfway')
+        return {'value': value * 2}
+
+    job = wait_for(queue.submit(42, work, 21, description='double'))
+    assert job.status == JOB_COMPLETED
+    # The finish time is recorded before the status is published
+    assert job.finished_at is not None
+    assert job.result == {'value': 42}
+    assert job.progress == 100
+    assert queue.get(job.id) is job
+    print("✓ Job completed with result")
+
+def test_job_failure_is_recorded():
+    """An exception inside a job marks it failed instead of crashing the worker"""
+    queue = JobQueue(max_workers=1)
+
+    def work(job):
+        raise ValueError('bad statement')
+
+    job = wait_for(queue.submit(42, work))
+    assert job.status == JOB_FAILED
+    assert job.finished_at is not None
+    assert job.error == 'bad statement'
+    assert job.to_dict()['status'] == JOB_FAILED
+    print("✓ Job failure recorded")
+
+def test_finished_jobs_expire():
+    """Finished jobs are pruned once they are older than the retention window"""
+    queue = JobQueue(max_workers=1, retention_seconds=0)
+    job = wait_for(queue.submit(42, lambda job: None))
+    time.sleep(0.01)
+    queue.submit(42, lambda job: None)
+    assert queue.get(job.id) is None
+    print("✓ Finished jobs expire")
+
+if __name__ == "__main__":
+    print("Convector Job Queue Test")
+    print("=" * 30)
+
+    test_job_completes_with_result()
+    test_job_failure_is_recorded()
+    test_finished_jobs_expire()
+
+    print("\nTest completed.")
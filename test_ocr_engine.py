@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for the OCR engine image preparation and result cache
+"""
+
+import os
+import tempfile
+import sys
+sys.path.append('.')  # Add current directory to path
+
+from PIL import Image, ImageDraw
+
+import ocr_engine
+from ocr_cache import OcrCache
+from ocr_engine import normalize_image, find_band_cuts, prepare_ocr_tasks
+
+def create_page(width, height, line_gap=60):
+    """Create a white page with a black bar of 'text' every `line_gap` pixels"""
+    page = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    for top in range(20, height - 20, line_gap):
+        draw.rectangle((20, top, width - 20, top + 20), fill=0)
+    return page
+
+def test_large_photo_is_downscaled():
+    """Images above the target DPI are downscaled, smaller ones are left alone"""
+    photo = Image.new('RGB', (4000, 6000), 'white')
+    photo.info['dpi'] = (600, 600)
+    normalized = normalize_image(photo, target_dpi=300)
+    assert normalized.size == (2000, 3000)
+    assert normalized.mode == 'L'
+
+    small = Image.new('RGB', (800, 1000), 'white')
+    small.info['dpi'] = (150, 150)
+    assert normalize_image(small, target_dpi=300).size == (800, 1000)
+    print("✓ Over-sized images downscaled")
+
+def test_camera_dpi_tag_is_not_trusted():
+    """A large photo tagged with a camera's nominal 72 DPI is downscaled like an untagged one"""
+    untagged = Image.new('RGB', (4000, 3000), 'white')
+    tagged = Image.new('RGB', (4000, 3000), 'white')
+    tagged.info['dpi'] = (72, 72)
+    expected = normalize_image(untagged, target_dpi=300).size
+    assert expected == (2481, 1861)
+    assert normalize_image(tagged, target_dpi=300).size == expected
+    print("✓ Camera DPI tags ignored")
+
+def test_bands_are_cut_on_blank_rows():
+    """Tall pages are cut into bands only on rows without ink"""
+    page = create_page(400, 3000)
+    cuts = find_band_cuts(page, band_height=1000, margin=100)
+    assert cuts[0] == 0 and cuts[-1] == 3000
+    assert all(bottom - top <= 1100 for top, bottom in zip(cuts, cuts[1:]))
+    for cut in cuts[1:-1]:
+        assert page.getpixel((200, cut)) == 255
+    print("✓ Bands cut on blank rows")
+
+def test_multi_frame_images_become_separate_tasks():
+    """Every frame of a multi-frame image is OCR'd separately"""
+    frames = [create_page(300, 400, line_gap=gap) for gap in (40, 60, 80)]
+    filepath = os.path.join(tempfile.mkdtemp(), 'frames.gif')
+    frames[0].save(filepath, save_all=True, append_images=frames[1:])
+    with Image.open(filepath) as image:
+        tasks = prepare_ocr_tasks(image, target_dpi=300, band_height=1000)
+    assert len(tasks) == 3
+    print("✓ Multi-frame images split into frames")
+
+def test_cached_bands_skip_tesseract():
+    """A second OCR run of the same image is served from the cache"""
+    calls = []
+    original_cache, original_task = ocr_engine.ocr_cache, ocr_engine.ocr_task
+    original_workers = ocr_engine.PROCESS_WORKERS
+    ocr_engine.PROCESS_WORKERS = 1
+    ocr_engine.ocr_cache = OcrCache(tempfile.mkdtemp(), 1024 * 1024)
+    ocr_engine.ocr_task = lambda task: calls.append(task) or f"band {task[1]}"
+    try:
+        tasks = prepare_ocr_tasks(create_page(400, 2500), target_dpi=300, band_height=1000)
+        first = ocr_engine.run_ocr_tasks(tasks)
+        second = ocr_engine.run_ocr_tasks(tasks)
+    finally:
+        ocr_engine.ocr_cache, ocr_engine.ocr_task = original_cache, original_task
+        ocr_engine.PROCESS_WORKERS = original_workers
+    assert first == second
+    assert len(calls) == len(tasks)
+    print("✓ Cached bands skip tesseract")
+
+def test_cache_evicts_least_recently_used():
+    """The cache stays under its size limit by evicting the oldest entries"""
+    cache = OcrCache(tempfile.mkdtemp(), 1000)
+    keys = [cache.make_key('L', (1, 1), bytes([index]), ('eng',)) for index in range(5)]
+    for index, key in enumerate(keys):
+        cache.put(key, 'x' * 300)
+        os.utime(cache._path(key), (index, index))
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[-1]) == 'x' * 300
+    assert cache._lru._scan_size() <= 1000
+    print("✓ Cache evicts least recently used entries")
+
+if __name__ == "__main__":
+    print("Convector OCR Engine Test")
+    print("=" * 30)
+
+    test_large_photo_is_downscaled()
+    test_camera_dpi_tag_is_not_trusted()
+    test_bands_are_cut_on_blank_rows()
+    test_multi_frame_images_become_separate_tasks()
+    test_cached_bands_skip_tesseract()
+    test_cache_evicts_least_recently_used()
+
+    print("\nTest completed.")
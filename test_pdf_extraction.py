@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test script for parallel PDF text extraction
+"""
+
+import os
+import tempfile
+import sys
+sys.path.append('.')  # Add current directory to path
+
+from reportlab.pdfgen import canvas
+
+from pdf_extraction import extract_pdf_pages, split_page_ranges
+
+def create_sample_pdf(page_count):
+    """Create a PDF with one numbered transaction line per page"""
+    filepath = os.path.join(tempfile.mkdtemp(), 'statement.pdf')
+    pdf = canvas.Canvas(filepath)
+    for page in range(page_count):
+        pdf.drawString(50, 800, f'01/01/2024 Page {page} UPI Transfer 100.00 5000.00')
+        pdf.showPage()
+    pdf.save()
+    return filepath
+
+def test_page_ranges_cover_every_page_once():
+    """Page ranges are contiguous, ordered and cover the whole document"""
+    ranges = split_page_ranges(37, pages_per_task=8, workers=4)
+    pages = [page for start, end in ranges for page in range(start, end)]
+    assert pages == list(range(37))
+    assert all(end - start <= 8 for start, end in ranges)
+    print("✓ Page ranges cover every page once")
+
+def test_parallel_matches_sequential():
+    """Parallel extraction returns the same pages in the same order"""
+    filepath = create_sample_pdf(12)
+    sequential = extract_pdf_pages(filepath, parallel=False)
+    parallel = extract_pdf_pages(filepath, parallel=True)
+    assert len(sequential) == 12
+    assert parallel == sequential
+    assert 'Page 11' in parallel[11]
+    print("✓ Parallel extraction matches sequential extraction")
+
+if __name__ == "__main__":
+    print("Convector PDF Extraction Test")
+    print("=" * 30)
+
+    test_page_ranges_cover_every_page_once()
+    test_parallel_matches_sequential()
+
+    print("\nTest completed.")
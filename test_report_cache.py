@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the on-demand report cache
+"""
+
+import os
+import tempfile
+import threading
+import sys
+sys.path.append('.')  # Add current directory to path
+
+from report_cache import ReportCache
+
+def writer(content, calls):
+    """Return a render function that writes `content` and counts its calls"""
+    def render(path):
+        calls.append(path)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    return render
+
+def read(cache, analysis_key, rules_version, kind, render):
+    """Open an artifact through the cache and return its content"""
+    with cache.open_or_render(analysis_key, rules_version, kind, render) as f:
+        return f.read().decode('utf-8')
+
+def test_report_rendered_once():
+    """A report is rendered on first request and served from disk afterwards, even under concurrency"""
+    cache = ReportCache(tempfile.mkdtemp(), 1024 * 1024)
+    calls = []
+    render = writer('report', calls)
+    threads = [threading.Thread(target=read, args=(cache, 7, '3-abc', 'xlsx', render)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert read(cache, 7, '3-abc', 'xlsx', render) == 'report'
+    assert len(calls) == 1 and os.path.exists(cache.path(7, '3-abc', 'xlsx'))
+    assert cache.stats()['misses'] == 1 and cache.stats()['hits'] == 4
+    folder = os.path.dirname(cache.path(7, '3-abc', 'xlsx'))
+    assert not [name for name in os.listdir(folder) if name.endswith('.tmp')]
+    print("✓ Report rendered once")
+
+def test_new_rules_version_replaces_report():
+    """Rendering for a newer rules version removes the stale report of that kind only"""
+    cache = ReportCache(tempfile.mkdtemp(), 1024 * 1024)
+    calls = []
+    read(cache, 7, '3-abc', 'xlsx', writer('old', calls))
+    read(cache, 7, '3-abc', 'pdf', writer('pdf', calls))
+    assert read(cache, 7, '4-def-u1234', 'xlsx', writer('new', calls)) == 'new'
+
+    assert not os.path.exists(cache.path(7, '3-abc', 'xlsx'))
+    assert os.path.exists(cache.path(7, '4-def-u1234', 'xlsx')) and os.path.exists(cache.path(7, '3-abc', 'pdf'))
+    cache.remove(7)
+    assert not os.path.exists(cache.path(7, '4-def-u1234', 'xlsx')) and not os.path.exists(cache.path(7, '3-abc', 'pdf'))
+
+    # A failed render leaves nothing behind
+    def broken(path):
+        raise RuntimeError("render failed")
+    try:
+        cache.open_or_render(8, '1', 'xlsx', broken)
+        assert False, "render errors must propagate"
+    except RuntimeError:
+        pass
+    assert not os.listdir(os.path.join(cache.directory, '8'))
+    print("✓ Stale reports replaced")
+
+def test_cache_evicts_least_recently_used():
+    """The cache stays under its size limit by evicting the oldest reports, without breaking open ones"""
+    cache = ReportCache(tempfile.mkdtemp(), 1000)
+    opened = cache.open_or_render(0, '1', 'xlsx', writer('a' * 300, []))
+    os.utime(cache.path(0, '1', 'xlsx'), (0, 0))
+    for index in range(1, 5):
+        read(cache, index, '1', 'xlsx', writer('x' * 300, []))
+        os.utime(cache.path(index, '1', 'xlsx'), (index, index))
+
+    assert not os.path.exists(cache.path(0, '1', 'xlsx'))
+    assert os.path.exists(cache.path(4, '1', 'xlsx'))
+    assert cache._lru._scan_size() <= 1000
+    # A report opened before it was evicted can still be sent
+    with opened:
+        assert opened.read() == b'a' * 300
+    print("✓ Least recently used reports evicted")
+
+if __name__ == "__main__":
+    print("Convector Report Cache Test")
+    print("=" * 30)
+
+    test_report_rendered_once()
+    test_new_rules_version_replaces_report()
+    test_cache_evicts_least_recently_used()
+
+    print("\nTest completed.")
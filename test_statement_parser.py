@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming statement parser
+"""
+
+import time
+import sys
+sys.path.append('.')  # Add current directory to path
+
+from statement_parser import (iter_transactions, StatementParser, ParseBudgetExceeded,
+                              SHAPE_BLOCK, SHAPE_AMOUNT_BALANCE, SHAPE_AMOUNT)
+
+STRUCTURED_STATEMENT = "\n".join([
+    "Account Statement",
+    "01/15/2024", "Salary Deposit - January 2024", "Credit", "3,500.00", "3,500.00",
+    "01/17/2024", "ATM Cash Withdrawal", "Debit", "(200.00)", "3,300.00",
+    "01/18/2024", "Electricity Bill Payment", "Debit", "120.00", "3,180.00",
+]) + "\n"
+
+def test_structured_blocks():
+    """Five-line blocks are parsed into transactions"""
+    transactions = list(iter_transactions([STRUCTURED_STATEMENT]))
+    assert [t['description'] for t in transactions] == [
+        'Salary Deposit - January 2024', 'ATM Cash Withdrawal', 'Electricity Bill Payment'
+    ]
+    assert transactions[0]['amount'] == '3500.00'
+    assert transactions[1]['type'] == 'Debit'
+    print("✓ Structured blocks parsed")
+
+def test_chunking_does_not_change_result():
+    """Splitting the document into chunks, even mid-line, gives the same transactions"""
+    whole = list(iter_transactions([STRUCTURED_STATEMENT]))
+    for size in (1, 7, 30):
+        chunks = [STRUCTURED_STATEMENT[i:i + size] for i in range(0, len(STRUCTURED_STATEMENT), size)]
+        assert list(iter_transactions(chunks)) == whole
+    print("✓ Chunked parsing matches whole-document parsing")
+
+def test_transactions_stream_before_input_ends():
+    """Transactions are yielded while later pages are still being produced"""
+    produced = []
+
+    def pages():
+        for page in STRUCTURED_STATEMENT.split("01/17/2024"):
+            produced.append(page)
+            yield page if len(produced) == 1 else "01/17/2024" + page
+
+    first = next(iter_transactions(pages()))
+    assert first['description'] == 'Salary Deposit - January 2024'
+    assert len(produced) < 3
+    print("✓ Transactions stream before extraction finishes")
+
+def test_regex_fallback():
+    """Single-line statements fall back to the regex patterns"""
+    text = "01/15/2024 Salary Credit 3500.00 3500.00\n01/16/2024 Grocery Store 85.30 3414.70\n"
+    transactions = list(iter_transactions([text]))
+    assert len(transactions) == 2
+    assert transactions[0]['type'] == 'Credit'
+    assert transactions[1]['balance'] == '3414.70'
+    print("✓ Regex fallback working")
+
+def test_matched_shape_is_reported():
+    """The parser reports which line shape the statement matched"""
+    cases = [
+        (STRUCTURED_STATEMENT, SHAPE_BLOCK),
+        ("01/15/2024 Salary Credit 3500.00 3500.00\n", SHAPE_AMOUNT_BALANCE),
+        ("01/15/2024 Interest 12.50 $\n", SHAPE_AMOUNT),
+        ("No transactions on this page\n", None),
+    ]
+    for text, shape in cases:
+        parser = StatementParser()
+        list(parser.parse([text]))
+        assert parser.shape == shape, (text, parser.shape)
+    print("✓ Matched shape reported")
+
+def test_pathological_text_parses_in_linear_time():
+    """Many dates with no complete amount tail used to backtrack for minutes"""
+    text = "01/01/2024 ref 12 abc " * 8000
+    started = time.monotonic()
+    transactions = list(iter_transactions([text]))
+    assert time.monotonic() - started < 5
+    assert len(transactions) == 1
+    print("✓ Pathological text parsed quickly")
+
+def test_time_budget():
+    """Parsing stops once the budget is spent, but waiting for pages is not charged"""
+    text = "01/01/2024 ref 12 abc " * 80000
+    try:
+        list(iter_transactions([text], time_budget=0.01))
+        assert False, "Expected the time budget to be exceeded"
+    except ParseBudgetExceeded:
+        pass
+
+    def slow_pages():
+        for _ in range(3):
+            time.sleep(0.05)
+            yield "Nothing to see here\n"
+
+    assert list(iter_transactions(slow_pages(), time_budget=0.1)) == []
+    print("✓ Parse time budget enforced")
+
+if __name__ == "__main__":
+    print("Convector Statement Parser Test")
+    print("=" * 30)
+
+    test_structured_blocks()
+    test_chunking_does_not_change_result()
+    test_transactions_stream_before_input_ends()
+    test_regex_fallback()
+    test_matched_shape_is_reported()
+    test_pathological_text_parses_in_linear_time()
+    test_time_budget()
+
+    print("\nTest completed.")
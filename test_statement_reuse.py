@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for reusing the parsed result of repeat uploads
+"""
+
+import os
+import tempfile
+import sys
+sys.path.append('.')  # Add current directory to path
+
+import app
+from job_queue import Job
+from report_cache import ReportCache
+
+TRANSACTIONS = [
+    {'date': '05/02/2024', 'description': 'Salary credit', 'amount': '1000.00', 'balance': '1000.00', 'type': 'Credit'},
+    {'date': '13/02/2024', 'description': 'ATM WDL', 'amount': '200.00', 'balance': '800.00', 'type': 'Debit'},
+]
+
+def test_repeat_upload_skips_extraction():
+    """A second upload of the same bytes points at the first upload's result instead of extracting again"""
+    index = {}
+    extractions = []
+    saved = []
+
+    def extract(filepath, bank_name):
+        extractions.append(filepath)
+        return iter(TRANSACTIONS)
+
+    def remember(user_id, content_hash, result_file_path, excel_file_path, pdf_file_path, transaction_count):
+        index[(user_id, content_hash)] = {'result_file_path': result_file_path, 'excel_file_path': excel_file_path,
+                                          'pdf_file_path': pdf_file_path, 'transaction_count': transaction_count}
+
+    def save(*args):
+        saved.append(args)
+        return len(saved)
+
+    stubs = {
+        'iter_file_transactions': extract,
+        'find_indexed_statement': lambda user_id, content_hash: index.get((user_id, content_hash)),
+        'index_statement_content': remember,
+        'save_analysis_to_db': save,
+        'load_category_overrides': lambda user_id: {},
+    }
+    folder = tempfile.mkdtemp()
+    originals = {name: getattr(app, name) for name in list(stubs) + ['RESULTS_FOLDER', 'report_cache']}
+    try:
+        for name, stub in stubs.items():
+            setattr(app, name, stub)
+        app.RESULTS_FOLDER = folder
+        app.report_cache = ReportCache(os.path.join(folder, 'reports'), 1024 * 1024)
+
+        results = []
+        for user_id, upload in ((7, 'first.csv'), (7, 'second.csv'), (8, 'other.csv')):
+            filepath = os.path.join(folder, upload)
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write('statement')
+            job = Job(user_id, upload)
+            results.append(app.process_bank_statement(job, user_id, 'Asha', 'HDFC Bank', '1', upload, filepath, 'abc123'))
+
+        first, second, other = results
+        assert extractions == [os.path.join(folder, 'first.csv'), os.path.join(folder, 'other.csv')]
+        # Another user's upload of the same bytes gets its own result file
+        assert os.path.basename(first['analysis']['data_file_path']) == '7_abc123.json'
+        assert other['analysis']['data_file_path'] != first['analysis']['data_file_path']
+        assert not [name for name in os.listdir(folder) if name.endswith('.tmp')]
+        assert not first['reused'] and second['reused']
+        assert second['transaction_count'] == first['transaction_count'] == 2
+        assert second['analysis']['data_file_path'] == first['analysis']['data_file_path']
+        assert os.path.exists(first['analysis']['data_file_path'])
+        assert saved[1][-1] == first['analysis']['data_file_path']
+        # The Excel report the upload page downloads is built by the job, not the download request
+        for result in (first, second):
+            cached = os.listdir(os.path.join(folder, 'reports', str(result['analysis']['id'])))
+            assert [name for name in cached if name.endswith('.xlsx')]
+        # The second copy of the bytes is not kept
+        assert not os.path.exists(os.path.join(folder, 'second.csv'))
+    finally:
+        for name, original in originals.items():
+            setattr(app, name, original)
+    print("✓ Repeat upload reuses the parsed result")
+
+if __name__ == "__main__":
+    print("Convector Statement Reuse Test")
+    print("=" * 30)
+
+    test_repeat_upload_skips_extraction()
+
+    print("\nTest completed.")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for the OFX/QFX and MT940 statement readers
+"""
+
+import os
+import tempfile
+import sys
+sys.path.append('.')  # Add current directory to path
+
+from structured_statements import (parse_ofx_transactions, parse_mt940_transactions,
+                                   extract_transactions_from_ofx, extract_transactions_from_mt940)
+
+SAMPLE_OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS>
+<BANKTRANLIST>
+<DTSTART>20240101
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240105120000.000[+5.30:IST]
+<TRNAMT>45000.00
+<FITID>1001
+<NAME>ACME PAYROLL
+<MEMO>SALARY JAN
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240107
+<TRNAMT>-1,250.50
+<FITID>1002
+<NAME>GROCERY STORE
+</BANKTRANLIST>
+</STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+SAMPLE_OFX_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20240210</DTPOSTED><TRNAMT>-500.00</TRNAMT><FITID>1</FITID><MEMO>ATM WDL</MEMO></STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+SAMPLE_MT940 = """{1:F01BANKINBBAXXX0000000000}{2:O9401200240101BANKINBBAXXX00000000002401011200N}{4:
+:20:STMT240131
+:25:1234567890
+:28C:1/1
+:60F:C240101INR10000,00
+:61:2401050105C45000,00NTRFNONREF//B1
+:86:NEFT-ACME PAYROLL-SALARY
+JAN 2024
+:61:240107D1250,5NCHGNONREF
+:86:SMS ALERT CHARGES
+:61:240109RD200,NMSCREVERSAL
+:62F:C240131INR53949,50
+-}
+"""
+
+def test_ofx_sgml():
+    """OFX v1 statements with unclosed tags are parsed"""
+    transactions = parse_ofx_transactions(SAMPLE_OFX_SGML)
+    assert transactions == [
+        {'date': '05/01/2024', 'description': 'ACME PAYROLL SALARY JAN', 'amount': '45000.00', 'balance': '0', 'type': 'Credit'},
+        {'date': '07/01/2024', 'description': 'GROCERY STORE', 'amount': '1250.50', 'balance': '0', 'type': 'Debit'},
+    ]
+    print("✓ OFX SGML parsed")
+
+def test_ofx_xml():
+    """OFX v2 (XML) statements are parsed"""
+    transactions = parse_ofx_transactions(SAMPLE_OFX_XML)
+    assert transactions == [
+        {'date': '10/02/2024', 'description': 'ATM WDL', 'amount': '500.00', 'balance': '0', 'type': 'Debit'}
+    ]
+    print("✓ OFX XML parsed")
+
+def test_mt940():
+    """MT940 statement lines carry their :86: details and a running balance"""
+    transactions = parse_mt940_transactions(SAMPLE_MT940)
+    assert transactions == [
+        {'date': '05/01/2024', 'description': 'NEFT-ACME PAYROLL-SALARY JAN 2024', 'amount': '45000.00', 'balance': '55000.00', 'type': 'Credit'},
+        {'date': '07/01/2024', 'description': 'SMS ALERT CHARGES', 'amount': '1250.50', 'balance': '53749.50', 'type': 'Debit'},
+        {'date': '09/01/2024', 'description': 'REVERSAL', 'amount': '200.00', 'balance': '53949.50', 'type': 'Credit'},
+    ]
+    print("✓ MT940 parsed")
+
+def test_unrecognized_files_return_none():
+    """Files without a transaction list fall back to text extraction"""
+    directory = tempfile.mkdtemp()
+    filepath = os.path.join(directory, 'statement.ofx')
+    with open(filepath, 'w') as f:
+        f.write('OFXHEADER:100\n<OFX></OFX>\n')
+    assert extract_transactions_from_ofx(filepath) is None
+
+    filepath = os.path.join(directory, 'statement.sta')
+    with open(filepath, 'w') as f:
+        f.write(':20:EMPTY\n:25:1234\n')
+    assert extract_transactions_from_mt940(filepath) is None
+    print("✓ Unrecognized files detected")
+
+if __name__ == "__main__":
+    print("Convector Structured Statement Test")
+    print("=" * 30)
+
+    test_ofx_sgml()
+    test_ofx_xml()
+    test_mt940()
+    test_unrecognized_files_return_none()
+
+    print("\nTest completed.")
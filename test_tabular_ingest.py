@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test script for native spreadsheet statement ingestion
+"""
+
+import os
+import tempfile
+from datetime import datetime
+import sys
+sys.path.append('.')  # Add current directory to path
+
+import pandas as pd
+
+from tabular_ingest import (transactions_from_dataframe, extract_transactions_from_excel, iter_xlsx_transactions,
+                            transactions_from_tables, extract_transactions_from_docx, open_csv_transactions,
+                            _iter_row_chunks)
+
+def create_sample_rows():
+    """Rows of a typical bank export: account details, header, transactions and a total line"""
+    return [
+        ['E-Faws Demo Bank', None, None, None, None, None],
+        ['Account Number: 1234567890', None, None, None, None, None],
+        ['Date', 'Narration', 'Chq./Ref.No.', 'Withdrawal Amt.', 'Deposit Amt.', 'Closing Balance'],
+        [datetime(2024, 1, 15), 'SALARY CREDIT JAN', 'REF1', None, '50,000.00', 50000],
+        ['16/01/2024', 'UPI-GROCERY STORE', 'REF2', 250.5, None, 49749.5],
+        [None, 'Total', None, 250.5, 50000, None],
+    ]
+
+def test_debit_credit_columns():
+    """Debit and credit columns become typed transactions and summary rows are skipped"""
+    transactions = transactions_from_dataframe(pd.DataFrame(create_sample_rows()))
+    assert transactions == [
+        {'date': '15/01/2024', 'description': 'SALARY CREDIT JAN', 'amount': '50000.00', 'balance': '50000.00', 'type': 'Credit'},
+        {'date': '16/01/2024', 'description': 'UPI-GROCERY STORE', 'amount': '250.50', 'balance': '49749.50', 'type': 'Debit'},
+    ]
+    print("✓ Debit and credit columns parsed")
+
+def test_amount_with_type_column():
+    """A single amount column is split into credits and debits by the Dr/Cr column"""
+    rows = [
+        ['Txn Date', 'Description', 'Amount', 'Dr/Cr', 'Balance'],
+        ['01/02/2024', 'ATM WDL', '500', 'DR', '1,000 Cr'],
+        ['02/02/2024', 'NEFT IN', '700', 'CR', '1,700 Cr'],
+    ]
+    transactions = transactions_from_dataframe(pd.DataFrame(rows))
+    assert [t['type'] for t in transactions] == ['Debit', 'Credit']
+    assert [t['amount'] for t in transactions] == ['500.00', '700.00']
+    print("✓ Amount and type columns parsed")
+
+def test_unrecognized_layout_returns_none():
+    """Sheets without a statement header fall back to text extraction"""
+    rows = [['Name', 'Value'], ['foo', 1]]
+    assert transactions_from_dataframe(pd.DataFrame(rows)) is None
+    print("✓ Unrecognized layout detected")
+
+def test_excel_file_round_trip():
+    """An XLSX statement is read without going through text"""
+    filepath = os.path.join(tempfile.mkdtemp(), 'statement.xlsx')
+    pd.DataFrame(create_sample_rows()).to_excel(filepath, header=False, index=False)
+    transactions = extract_transactions_from_excel(filepath)
+    assert len(transactions) == 2
+    assert transactions[1]['description'] == 'UPI-GROCERY STORE'
+    print("✓ XLSX statement read directly")
+
+def test_xlsx_streaming_chunks():
+    """Streaming an XLSX sheet in small chunks gives the same transactions as one pass"""
+    filepath = os.path.join(tempfile.mkdtemp(), 'long_statement.xlsx')
+    rows = create_sample_rows()[:3]
+    for day in range(1, 29):
+        rows.append([datetime(2024, 2, day), f'UPI-SHOP {day}', None, day * 10, None, None])
+    pd.DataFrame(rows).to_excel(filepath, header=False, index=False)
+
+    streamed = list(iter_xlsx_transactions(filepath, chunk_rows=5))
+    assert streamed == list(iter_xlsx_transactions(filepath, chunk_rows=1000))
+    assert len(streamed) == 28
+    assert streamed[-1] == {'date': '28/02/2024', 'description': 'UPI-SHOP 28', 'amount': '280.00', 'balance': '0', 'type': 'Debit'}
+    print("✓ XLSX sheet streamed in chunks")
+
+def test_xlsx_streaming_unrecognized_layout():
+    """Streaming reports an unrecognized layout before reading any data rows"""
+    filepath = os.path.join(tempfile.mkdtemp(), 'other.xlsx')
+    pd.DataFrame([['Name', 'Value'], ['foo', 1]]).to_excel(filepath, header=False, index=False)
+    assert iter_xlsx_transactions(filepath) is None
+    print("✓ Unrecognized XLSX layout detected")
+
+def test_tables_with_continuation():
+    """A table split across pages keeps the column map of its first part"""
+    first = [
+        ['Date', 'Particulars', 'Debit', 'Credit', 'Balance'],
+        ['01/03/2024', 'NEFT SALARY', '', '40,000.00', '40,000.00'],
+    ]
+    continuation = [['02/03/2024', 'POS GROCERY', '1,200.00', '', '38,800.00']]
+    unrelated = [['Branch', 'Main Road']]
+    transactions = transactions_from_tables([unrelated, first, continuation])
+    assert [t['description'] for t in transactions] == ['NEFT SALARY', 'POS GROCERY']
+    assert [t['type'] for t in transactions] == ['Credit', 'Debit']
+    assert transactions_from_tables([unrelated]) is None
+    print("✓ Document tables parsed")
+
+def test_docx_tables():
+    """Transactions are read from the tables of a DOCX statement"""
+    import docx
+    document = docx.Document()
+    document.add_paragraph('Account Statement')
+    table = document.add_table(rows=0, cols=4)
+    for cells in [['Txn Date', 'Narration', 'Amount', 'Dr/Cr'], ['05/03/2024', 'ATM WDL', '2,000.00', 'Dr']]:
+        row = table.add_row()
+        for cell, value in zip(row.cells, cells):
+            cell.text = value
+    filepath = os.path.join(tempfile.mkdtemp(), 'statement.docx')
+    document.save(filepath)
+
+    assert extract_transactions_from_docx(filepath) == [
+        {'date': '05/03/2024', 'description': 'ATM WDL', 'amount': '2000.00', 'balance': '0', 'type': 'Debit'}
+    ]
+    print("✓ DOCX tables read directly")
+
+def test_csv_export():
+    """A semicolon-separated CSV export is streamed straight into transactions"""
+    filepath = os.path.join(tempfile.mkdtemp(), 'statement.csv')
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write('Account;1234567890\n')
+        f.write('Value Date;Description;Debit;Credit;Balance\n')
+        f.write('01/04/2024;"SALARY; APRIL";;55000.00;55000.00\n')
+        f.write('03/04/2024;ELECTRICITY BILL;1800.00;;53200.00\n')
+
+    transactions = list(open_csv_transactions(filepath, chunk_rows=1))
+    assert [t['description'] for t in transactions] == ['SALARY; APRIL', 'ELECTRICITY BILL']
+    assert [t['type'] for t in transactions] == ['Credit', 'Debit']
+    assert transactions[1]['balance'] == '53200.00'
+    print("✓ CSV export read directly")
+
+def test_stream_skips_malformed_rows():
+    """Rows that fail to build are skipped and a read error after the first rows ends the stream"""
+    class BadCell:
+        def __str__(self):
+            raise ValueError('unreadable cell')
+
+    columns = {'date': 0, 'description': 1, 'amount': 2}
+
+    def rows():
+        yield ('01/04/2024', 'SALARY', '55000.00')
+        yield ('02/04/2024', BadCell(), '10.00')
+        yield ('03/04/2024', 'ELECTRICITY BILL', '-1800.00')
+        raise ValueError('corrupt sheet')
+
+    closed = []
+    transactions = list(_iter_row_chunks(rows(), columns, 2, lambda: closed.append(True)))
+    assert [t['description'] for t in transactions] == ['SALARY', 'ELECTRICITY BILL']
+    assert closed == [True]
+    print("✓ Malformed rows skipped")
+
+def test_stream_error_falls_back_to_text():
+    """A direct read that fails before its first row falls back to text extraction"""
+    import app
+
+    def broken_reader(filepath):
+        raise ValueError('bad header')
+        yield
+
+    filepath = os.path.join(tempfile.mkdtemp(), 'statement.csv')
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write('01/04/2024 SALARY APRIL 55000.00 55000.00\n')
+        f.write('03/04/2024 ELECTRICITY BILL 1800.00 53200.00\n')
+
+    original = app.DIRECT_TRANSACTION_READERS['.csv']
+    app.DIRECT_TRANSACTION_READERS['.csv'] = broken_reader
+    try:
+        transactions = list(app.iter_file_transactions(filepath))
+    finally:
+        app.DIRECT_TRANSACTION_READERS['.csv'] = original
+    assert [t['description'] for t in transactions] == ['SALARY APRIL', 'ELECTRICITY BILL']
+    print("✓ Early read errors fall back to text extraction")
+
+if __name__ == "__main__":
+    print("Convector Tabular Ingestion Test")
+    print("=" * 30)
+
+    test_debit_credit_columns()
+    test_amount_with_type_column()
+    test_unrecognized_layout_returns_none()
+    test_excel_file_round_trip()
+    test_xlsx_streaming_chunks()
+    test_xlsx_streaming_unrecognized_layout()
+    test_tables_with_continuation()
+    test_docx_tables()
+    test_csv_export()
+    test_stream_skips_malformed_rows()
+    test_stream_error_falls_back_to_text()
+
+    print("\nTest completed.")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared statement totals
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append('.')  # Add current directory to path
+
+import pandas as pd
+
+from transaction_table import TransactionTable, CATEGORY_NAMES
+from transaction_summary import StatementSummary, summarize
+
+def create_test_table():
+    """A categorized table with credits, debits and a transaction of another type"""
+    return TransactionTable.from_categories({
+        'Deposits': [
+            {'date': '01/01/2024', 'description': 'Salary', 'amount': '3500.10', 'balance': '0', 'type': 'Credit'},
+            {'date': '02/01/2024', 'description': 'Bonus', 'amount': '0.20', 'balance': '0', 'type': 'Credit'},
+        ],
+        'Fees': [
+            {'date': '03/01/2024', 'description': 'Service fee', 'amount': '10.05', 'balance': '0', 'type': 'Debit'},
+            {'date': '04/01/2024', 'description': 'Fee reversal', 'amount': '2.00', 'balance': '0', 'type': 'Credit'},
+        ],
+        'Interest': [
+            {'date': '05/01/2024', 'description': 'Interest', 'amount': '1.50', 'balance': '0', 'type': 'Interest'},
+        ],
+    })
+
+def test_summarize_totals():
+    """Every category is totalled in one pass; only credits and debits count toward the cashflow"""
+    summary = summarize(create_test_table())
+    assert list(summary.categories) == CATEGORY_NAMES
+    assert summary.categories['Deposits'] == {'count': 2, 'total': 3500.3, 'credit': 3500.3, 'debit': 0.0, 'net': 3500.3}
+    assert summary.categories['Fees'] == {'count': 2, 'total': 12.05, 'credit': 2.0, 'debit': 10.05, 'net': -8.05}
+    assert summary.categories['Interest'] == {'count': 1, 'total': 1.5, 'credit': 0.0, 'debit': 0.0, 'net': 0.0}
+    assert summary.categories['Loans']['count'] == 0
+    assert (summary.total_count, summary.total_credit, summary.total_debit) == (5, 3502.3, 10.05)
+    assert summary.net_cashflow == 3492.25
+    assert summarize(TransactionTable.from_records([])).total_count == 0
+    print("✓ Totals summarized")
+
+def test_summary_round_trip():
+    """A summary survives the JSON file and the report's Detailed Summary sheet"""
+    summary = summarize(create_test_table())
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'report.summary.json')
+        summary.save(path)
+        assert StatementSummary.load(path).to_dict() == summary.to_dict()
+
+    sheet = pd.DataFrame(summary.detailed_summary_rows())
+    assert sheet.iloc[-1]['Category'] == 'TOTAL'
+    assert StatementSummary.from_detailed_summary(sheet).to_dict() == summary.to_dict()
+    print("✓ Summary round trip")
+
+if __name__ == "__main__":
+    print("Convector Transaction Summary Test")
+    print("=" * 30)
+
+    test_summarize_totals()
+    test_summary_round_trip()
+
+    print("\nTest completed.")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar transaction table
+"""
+
+import sys
+sys.path.append('.')  # Add current directory to path
+
+import pandas as pd
+
+from transaction_table import TransactionTable, CATEGORY_NAMES, as_transaction_table
+
+def create_test_transactions():
+    """Parsed transactions as the statement parsers produce them"""
+    return [
+        {'date': '01/15/2024', 'description': 'Salary Deposit', 'amount': '3,500.00', 'balance': '3,500.00', 'type': 'Credit'},
+        {'date': '16-01-2024', 'description': 'Grocery Store', 'amount': '85.3', 'balance': 'N/A', 'type': 'Debit'},
+        {'date': 'Jan 20', 'description': 'Interest Earned', 'amount': '15.25', 'balance': '0', 'type': 'Interest'},
+    ]
+
+def test_typed_columns():
+    """Amounts and balances become integer paise and dates are parsed"""
+    table = TransactionTable.from_records(create_test_transactions())
+    frame = table.frame
+    assert list(frame['amount_paise']) == [350000, 8530, 1525]
+    assert frame['amount_paise'].dtype == 'int64'
+    assert frame['balance_paise'][0] == 350000 and pd.isna(frame['balance_paise'][1])
+    assert frame['date'][0] == pd.Timestamp(2024, 1, 15)
+    assert frame['date'][1] == pd.Timestamp(2024, 1, 16)
+    assert pd.isna(frame['date'][2])
+    assert list(table.is_credit) == [True, False, False]
+    print("✓ Typed columns built")
+
+def test_one_date_layout_per_statement():
+    """A dd/mm statement is read day-first throughout, even where the day could be a month"""
+    dates = ['05/02/2024', '13/02/2024', '20/02/2024', '01/03/2024', '']
+    transactions = [{'date': date, 'description': 'UPI', 'amount': '1.00', 'balance': '1.00', 'type': 'Debit'}
+                    for date in dates]
+    frame = TransactionTable.from_records(transactions).frame
+    assert list(frame['date'][:4]) == [pd.Timestamp(2024, 2, 5), pd.Timestamp(2024, 2, 13),
+                                       pd.Timestamp(2024, 2, 20), pd.Timestamp(2024, 3, 1)]
+    assert pd.isna(frame['date'][4])
+    assert list(frame.sort_values('date')['date_text'][:4]) == dates[:4]
+
+    # A month-first statement is recognized from a day above 12
+    transactions[1]['date'], transactions[2]['date'] = '02/13/2024', '02/20/2024'
+    frame = TransactionTable.from_records(transactions[:3]).frame
+    assert list(frame['date']) == [pd.Timestamp(2024, 5, 2), pd.Timestamp(2024, 2, 13), pd.Timestamp(2024, 2, 20)]
+    print("✓ One date layout per statement")
+
+def test_categories_round_trip():
+    """A category mapping converts to a table and back, with amounts rendered as strings"""
+    transactions = create_test_transactions()
+    table = as_transaction_table({'Deposits': transactions[:1], 'Other': transactions[1:]})
+    assert as_transaction_table(table) is table
+    assert list(table.category('Other').frame['description']) == ['Grocery Store', 'Interest Earned']
+
+    categories = table.by_category()
+    assert list(categories) == CATEGORY_NAMES
+    assert categories['Deposits'] == [{'date': '01/15/2024', 'description': 'Salary Deposit',
+                                       'amount': '3500.00', 'type': 'Credit', 'balance': '3500.00'}]
+    assert categories['Other'][0]['balance'] == 'N/A'
+    assert categories['Loans'] == []
+    print("✓ Category mapping round trip")
+
+if __name__ == "__main__":
+    print("Convector Transaction Table Test")
+    print("=" * 30)
+
+    test_typed_columns()
+    test_one_date_layout_per_statement()
+    test_categories_round_trip()
+
+    print("\nTest completed.")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming upload intake checks
+"""
+
+import io
+import os
+import tempfile
+import zipfile
+import sys
+sys.path.append('.')  # Add current directory to path
+
+from upload_intake import stream_upload_to_disk, UploadRejected
+
+def run_intake(data, extension, max_bytes=1024 * 1024):
+    """Stream bytes through the intake into a temporary file"""
+    filepath = os.path.join(tempfile.mkdtemp(), f'upload.{extension}')
+    try:
+        result = stream_upload_to_disk(io.BytesIO(data), filepath, extension, max_bytes, chunk_size=16)
+        return result, filepath
+    except UploadRejected as e:
+        assert not os.path.exists(filepath), "Rejected uploads must not leave a partial file"
+        return e, filepath
+
+def test_valid_pdf_is_accepted():
+    """A well-formed PDF is written to disk and hashed"""
+    data = b'%PDF-1.4\n' + b'0' * 100 + b'\n%%EOF\n'
+    (digest, size), filepath = run_intake(data, 'pdf')
+    assert size == len(data)
+    assert len(digest) == 64
+    with open(filepath, 'rb') as f:
+        assert f.read() == data
+    print("✓ Valid PDF accepted")
+
+def test_renamed_file_is_rejected():
+    """A PNG renamed to .pdf fails the magic byte check"""
+    error, _ = run_intake(b'\x89PNG\r\n\x1a\n' + b'0' * 100, 'pdf')
+    assert isinstance(error, UploadRejected)
+    assert error.status_code == 400
+    print("✓ Renamed file rejected")
+
+def test_truncated_pdf_is_rejected():
+    """A PDF without its %%EOF trailer is rejected"""
+    error, _ = run_intake(b'%PDF-1.4\n' + b'0' * 100, 'pdf')
+    assert isinstance(error, UploadRejected)
+    print("✓ Truncated PDF rejected")
+
+def test_oversized_file_is_rejected():
+    """Files larger than the plan limit are rejected while streaming"""
+    error, _ = run_intake(b'%PDF-1.4\n' + b'0' * 500 + b'\n%%EOF\n', 'pdf', max_bytes=100)
+    assert isinstance(error, UploadRejected)
+    assert error.status_code == 413
+    print("✓ Oversized file rejected")
+
+def test_xlsx_requires_workbook_part():
+    """A ZIP archive only passes as XLSX when it contains a workbook"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('readme.txt', 'not a workbook')
+    error, _ = run_intake(buffer.getvalue(), 'xlsx')
+    assert isinstance(error, UploadRejected)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('xl/workbook.xml', '<workbook/>')
+    (digest, size), _ = run_intake(buffer.getvalue(), 'xlsx')
+    assert size == len(buffer.getvalue())
+    print("✓ XLSX container check working")
+
+def test_text_exports_are_checked_by_content():
+    """CSV, OFX and MT940 uploads are accepted as text and rejected when binary"""
+    for data, extension in [(b'Date,Description,Amount\n01/01/2024,Salary,100\n', 'csv'),
+                            (b'OFXHEADER:100\nDATA:OFXSGML\n<OFX>\n</OFX>\n', 'ofx'),
+                            (b':20:STATEMENT\n:25:12345\n', 'mt940')]:
+        (digest, size), _ = run_intake(data, extension)
+        assert size == len(data)
+
+    for data, extension in [(b'%PDF-1.4\x00\x00binary', 'csv'), (b'Date,Amount\n', 'ofx'), (b'Date,Amount\n', 'mt940')]:
+        error, _ = run_intake(data, extension)
+        assert isinstance(error, UploadRejected)
+    print("✓ Text export checks working")
+
+if __name__ == "__main__":
+    print("Convector Upload Intake Test")
+    print("=" * 30)
+
+    test_valid_pdf_is_accepted()
+    test_renamed_file_is_rejected()
+    test_truncated_pdf_is_rejected()
+    test_oversized_file_is_rejected()
+    test_xlsx_requires_workbook_part()
+    test_text_exports_are_checked_by_content()
+
+    print("\nTest completed.")
@@ -0,0 +1,154 @@
+"""
+Statement totals for Convector Bank Statement Analyzer
+One grouped pass over the transaction table produces the per-category counts,
+credits and debits that the Excel report, the PDF statement and the analysis
+JSON API all show, so the figures are computed once and always agree
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from transaction_table import CATEGORY_NAMES
+
+# Amount kinds summed per category
+KINDS = ['credit', 'debit', 'other']
+
+
+def _rupees(paise):
+    return round(int(paise) / 100, 2)
+
+
+class StatementSummary:
+    """
+    Per-category and overall totals of a statement, in rupees
+
+    `categories` maps every name in CATEGORY_NAMES (in report order) to a dict
+    with count, total, credit, debit and net. The total of a category counts
+    every transaction; credit and debit only count 'Credit' and 'Debit' types.
+    """
+
+    def __init__(self, categories, total_count):
+        self.categories = categories
+        self.total_count = total_count
+        self.total_credit = round(sum(totals['credit'] for totals in categories.values()), 2)
+        self.total_debit = round(sum(totals['debit'] for totals in categories.values()), 2)
+
+    @property
+    def net_cashflow(self):
+        return round(self.total_credit - self.total_debit, 2)
+
+    def detailed_summary_rows(self):
+        """Rows of the 'Detailed Summary' sheet, one per category plus a TOTAL row"""
+        rows = [{
+            'Category': category,
+            'Transaction Count': totals['count'],
+            'Total Amount': totals['total'],
+            'Credit Amount': totals['credit'],
+            'Debit Amount': totals['debit'],
+            'Net Amount': totals['net']
+        } for category, totals in self.categories.items()]
+        rows.append({
+            'Category': 'TOTAL',
+            'Transaction Count': self.total_count,
+            'Total Amount': round(self.total_credit + self.total_debit, 2),
+            'Credit Amount': self.total_credit,
+            'Debit Amount': self.total_debit,
+            'Net Amount': self.net_cashflow
+        })
+        return rows
+
+    def cashflow_rows(self):
+        """Rows of the 'Cashflow Summary' sheet, one per category"""
+        return [{'Category': category, 'Credit': totals['credit'], 'Debit': totals['debit']}
+                for category, totals in self.categories.items()]
+
+    def to_dict(self):
+        """Render the summary as the analysis data API returns it"""
+        return {
+            'totalCredits': self.total_credit,
+            'totalDebits': self.total_debit,
+            'netCashflow': self.net_cashflow,
+            'totalTransactions': self.total_count,
+            'categories': {category: {
+                'count': totals['count'],
+                'total_amount': totals['total'],
+                'credit_amount': totals['credit'],
+                'debit_amount': totals['debit'],
+                'net_amount': totals['net']
+            } for category, totals in self.categories.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a summary saved with to_dict"""
+        categories = {category: {
+            'count': int(values['count']),
+            'total': float(values['total_amount']),
+            'credit': float(values['credit_amount']),
+            'debit': float(values['debit_amount']),
+            'net': float(values['net_amount'])
+        } for category, values in data['categories'].items()}
+        return cls(categories, int(data['totalTransactions']))
+
+    @classmethod
+    def from_detailed_summary(cls, df):
+        """Rebuild a summary from the 'Detailed Summary' sheet of an existing report"""
+        categories = {}
+        total_count = 0
+        for row in df.itertuples(index=False):
+            if row[0] == 'TOTAL':
+                total_count = int(row[1])
+                continue
+            categories[row[0]] = {
+                'count': int(row[1]),
+                'total': float(row[2]),
+                'credit': float(row[3]),
+                'debit': float(row[4]),
+                'net': float(row[5])
+            }
+        return cls(categories, total_count or sum(totals['count'] for totals in categories.values()))
+
+    def save(self, filepath):
+        """Write the summary as JSON"""
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, filepath):
+        """Read a summary written with save"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def summarize(table):
+    """
+    Total a categorized transaction table in a single grouped pass
+
+    Args:
+        table (TransactionTable): Transactions with category codes filled in
+
+    Returns:
+        StatementSummary: Totals for every category, including empty ones
+    """
+    frame = table.frame
+    kind = np.where(table.is_credit, 'credit', np.where(table.is_debit, 'debit', 'other'))
+    grouped = frame['amount_paise'].groupby([frame['category'], kind]).agg(['size', 'sum'])
+
+    # Category codes down the rows, amount kinds across the columns, zeros where nothing matched
+    index = pd.Index(range(len(CATEGORY_NAMES)), dtype=frame['category'].dtype)
+    counts = grouped['size'].unstack(fill_value=0).reindex(index=index, columns=KINDS, fill_value=0)
+    sums = grouped['sum'].unstack(fill_value=0).reindex(index=index, columns=KINDS, fill_value=0)
+
+    categories = {}
+    for code, category in enumerate(CATEGORY_NAMES):
+        credit, debit, other = sums.iloc[code]
+        categories[category] = {
+            'count': int(counts.iloc[code].sum()),
+            'total': _rupees(credit + debit + other),
+            'credit': _rupees(credit),
+            'debit': _rupees(debit),
+            'net': _rupees(credit - debit)
+        }
+    return StatementSummary(categories, len(table))
@@ -0,0 +1,171 @@
+"""
+Columnar transaction table for Convector Bank Statement Analyzer
+Parsed transactions are converted once into typed columns (amounts and balances
+as integer paise, dates parsed, category as a small integer code) that every
+downstream stage shares, instead of each report re-parsing amount strings
+"""
+
+import pandas as pd
+
+# Category names in report order; a transaction's category code indexes this list
+CATEGORY_NAMES = [
+    'Deposits', 'Withdrawals', 'Loans', 'Interest', 'Fees',
+    'Transfers', 'Payments', 'Cash', 'Investments', 'Refunds',
+    'Insurance', 'Taxes', 'UPI Transfers', 'ATM Deposits',
+    'ATM Withdrawals', 'Utility Bills', 'EMI/Loan Repayments',
+    'NEFT/RTGS', 'Other'
+]
+CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORY_NAMES)}
+
+# Code of transactions that have not been categorized yet
+UNCATEGORIZED = -1
+
+# Date layouts seen in statements, in order of preference. Day-first comes before
+# month-first: the ingesters write dd/mm/yyyy and Indian bank statements use it.
+DATE_FORMATS = ['%d/%m/%Y', '%m/%d/%Y', '%d/%m/%y', '%m/%d/%y', '%d-%m-%Y', '%d-%m-%y', '%Y-%m-%d', '%d.%m.%Y']
+
+# Columns of a transaction as the rest of the app passes it around
+RECORD_COLUMNS = ['date', 'description', 'amount', 'balance', 'type']
+
+
+def parse_dates(texts):
+    """
+    Parse a column of date strings; unknown layouts become NaT
+
+    One statement uses one date layout, so a layout is chosen for the whole
+    column rather than per value: the first of DATE_FORMATS that parses every
+    date. Otherwise, the layout parsing the most dates is used for those dates
+    and the rest are tried again the same way. This keeps 05/02 and 13/02 in
+    a dd/mm statement from being read with different layouts.
+    """
+    texts = texts.astype(str).str.strip()
+    dates = pd.Series(pd.NaT, index=texts.index, dtype='datetime64[ns]')
+    pending = texts[texts != '']
+    while not pending.empty:
+        best = None
+        for date_format in DATE_FORMATS:
+            parsed = pd.to_datetime(pending, format=date_format, errors='coerce').dropna()
+            if best is None or len(parsed) > len(best):
+                best = parsed
+            if len(parsed) == len(pending):
+                break
+        if best.empty:
+            break
+        dates[best.index] = best
+        pending = pending.drop(best.index)
+    return dates
+
+
+def parse_paise(texts):
+    """Parse a column of money strings such as '1,234.50' into nullable integer paise"""
+    values = pd.to_numeric(texts.astype(str).str.replace(r'[,$\s]', '', regex=True), errors='coerce')
+    return (values * 100).round().astype('Int64')
+
+
+def format_paise(paise):
+    """Render a column of integer paise as '1234.50' strings"""
+    return (paise.astype('float64') / 100).map(lambda value: f"{value:.2f}")
+
+
+class TransactionTable:
+    """
+    Transactions of one statement stored column by column
+
+    Columns of `frame`:
+        date: parsed date (NaT if the layout was not recognized)
+        date_text: date as it appeared in the statement
+        description: transaction description
+        amount_paise: amount in paise (int64)
+        balance_paise: balance in paise (nullable, missing if not parseable)
+        type: 'Credit', 'Debit' or another type label (categorical)
+        category: code into CATEGORY_NAMES, or UNCATEGORIZED (int8)
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    @classmethod
+    def from_records(cls, transactions, categories=None):
+        """
+        Build a table from parsed transaction dicts
+
+        Args:
+            transactions (list): Dicts with date, description, amount, balance and type
+            categories: Optional category name of each transaction
+        """
+        records = pd.DataFrame(list(transactions), columns=RECORD_COLUMNS)
+        frame = pd.DataFrame({
+            'date': parse_dates(records['date'].fillna('')),
+            'date_text': records['date'].fillna('').astype(str),
+            'description': records['description'].fillna('').astype(str),
+            'amount_paise': parse_paise(records['amount']).fillna(0).astype('int64'),
+            'balance_paise': parse_paise(records['balance']),
+            'type': records['type'].fillna('').astype('category'),
+            'category': pd.Series(UNCATEGORIZED, index=records.index, dtype='int8'),
+        })
+        table = cls(frame)
+        if categories is not None:
+            table = table.with_categories([CATEGORY_CODES.get(name, CATEGORY_CODES['Other']) for name in categories])
+        return table
+
+    @classmethod
+    def from_categories(cls, categories):
+        """Build a table from a category name to transaction list mapping"""
+        transactions = []
+        names = []
+        for name, category_transactions in categories.items():
+            transactions.extend(category_transactions)
+            names.extend([name] * len(category_transactions))
+        return cls.from_records(transactions, names)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def with_categories(self, codes):
+        """Return a table sharing these columns with the given category codes"""
+        frame = self.frame.copy(deep=False)
+        frame['category'] = pd.Series(codes, index=frame.index, dtype='int8')
+        return TransactionTable(frame)
+
+    @property
+    def is_credit(self):
+        return self.frame['type'] == 'Credit'
+
+    @property
+    def is_debit(self):
+        return self.frame['type'] == 'Debit'
+
+    def category(self, name):
+        """Return the sub-table of one category, in statement order"""
+        return TransactionTable(self.frame[self.frame['category'] == CATEGORY_CODES[name]])
+
+    def sorted_by_category(self):
+        """Return the table ordered by category in report order, keeping statement order within each category"""
+        return TransactionTable(self.frame.sort_values('category', kind='stable'))
+
+    def to_records(self):
+        """Render the transactions as dicts with string amounts, as the parsers produce them"""
+        return self.record_frame().to_dict('records')
+
+    def record_frame(self):
+        """Return the transactions as a DataFrame with date, description, amount, type and balance columns"""
+        balance = format_paise(self.frame['balance_paise'].fillna(0))
+        balance[self.frame['balance_paise'].isna()] = 'N/A'
+        return pd.DataFrame({
+            'date': self.frame['date_text'],
+            'description': self.frame['description'],
+            'amount': format_paise(self.frame['amount_paise']),
+            'type': self.frame['type'].astype(str),
+            'balance': balance,
+        }, columns=['date', 'description', 'amount', 'type', 'balance'])
+
+    def by_category(self):
+        """Return a category name to transaction dict list mapping, including empty categories"""
+        return {name: self.category(name).to_records() for name in CATEGORY_NAMES}
+
+
+def as_transaction_table(transactions):
+    """Accept a TransactionTable or a category name to transaction list mapping"""
+    if isinstance(transactions, TransactionTable):
+        return transactions
+    return TransactionTable.from_categories(transactions)
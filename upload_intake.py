@@ -0,0 +1,162 @@
+"""
+Upload intake for Convector Bank Statement Analyzer
+Streams uploaded statements to disk in bounded chunks, enforcing size limits and
+checking magic bytes (or the content of text exports) so renamed or corrupt files are
+rejected before any parser runs
+"""
+
+import hashlib
+import os
+import zipfile
+
+# Leading bytes of each accepted file format
+PDF_SIGNATURE = b'%PDF-'
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SIGNATURE = b'\xff\xd8\xff'
+GIF_SIGNATURES = (b'GIF87a', b'GIF89a')
+ZIP_SIGNATURE = b'PK\x03\x04'
+OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+FILE_SIGNATURES = {
+    'pdf': (PDF_SIGNATURE,),
+    'png': (PNG_SIGNATURE,),
+    'jpg': (JPEG_SIGNATURE,),
+    'jpeg': (JPEG_SIGNATURE,),
+    'gif': GIF_SIGNATURES,
+    'doc': (OLE2_SIGNATURE,),
+    'xls': (OLE2_SIGNATURE,),
+    'docx': (ZIP_SIGNATURE,),
+    'xlsx': (ZIP_SIGNATURE,),
+}
+
+# Text exports have no magic bytes; their first chunk is checked by content instead
+TEXT_FORMATS = {'csv', 'ofx', 'qfx', 'mt940', 'sta'}
+
+# Office Open XML containers must hold their main part
+ZIP_REQUIRED_MEMBERS = {
+    'docx': 'word/document.xml',
+    'xlsx': 'xl/workbook.xml',
+}
+
+# A complete PDF ends with an %%EOF marker within its last kilobyte
+PDF_TAIL_SIZE = 1024
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """Raised when an upload fails an intake check"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def sniff_matches(header, extension):
+    """
+    Check whether the first bytes of a file match its extension
+
+    Args:
+        header (bytes): Leading bytes of the file
+        extension (str): Lowercase file extension without the dot
+
+    Returns:
+        bool: True if the extension has a known signature and the header matches it
+    """
+    if extension in TEXT_FORMATS:
+        return _text_header_matches(header, extension)
+    signatures = FILE_SIGNATURES.get(extension)
+    if not signatures:
+        return False
+    return any(header.startswith(signature) for signature in signatures)
+
+
+def _text_header_matches(header, extension):
+    # Binary files (PDFs, images, Office documents) contain NUL bytes early on
+    if b'\x00' in header:
+        return False
+    if extension in ('ofx', 'qfx'):
+        upper = header.upper()
+        return b'OFXHEADER' in upper or b'<OFX>' in upper
+    if extension in ('mt940', 'sta'):
+        return b':20:' in header or b':61:' in header
+    return True
+
+
+def stream_upload_to_disk(stream, filepath, extension, max_bytes, chunk_size=CHUNK_SIZE):
+    """
+    Copy an upload stream to disk chunk by chunk while validating it
+
+    The first chunk is sniffed before anything is written, the running size is
+    checked against `max_bytes` after every chunk and the bytes are hashed on
+    the way through. A rejected upload never leaves a partial file behind.
+
+    Args:
+        stream: Readable binary stream of the uploaded file
+        filepath (str): Destination path
+        extension (str): Lowercase file extension without the dot
+        max_bytes (int): Largest accepted file size in bytes
+        chunk_size (int): Read size in bytes
+
+    Returns:
+        tuple: (SHA-256 hex digest, size in bytes)
+
+    Raises:
+        UploadRejected: If the file is empty, too large, or not the type its extension claims
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tail = b''
+
+    header = stream.read(chunk_size)
+    if not header:
+        raise UploadRejected('The uploaded file is empty')
+    if not sniff_matches(header, extension):
+        raise UploadRejected(f'The uploaded file is not a valid {extension.upper()} file')
+
+    try:
+        with open(filepath, 'wb') as out:
+            chunk = header
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(
+                        f'The uploaded file exceeds the {max_bytes // (1024 * 1024)} MB limit for your plan',
+                        status_code=413
+                    )
+                digest.update(chunk)
+                out.write(chunk)
+                tail = (tail + chunk)[-PDF_TAIL_SIZE:]
+                chunk = stream.read(chunk_size)
+
+        if extension == 'pdf' and b'%%EOF' not in tail:
+            raise UploadRejected('The uploaded PDF is truncated or corrupt')
+
+        required_member = ZIP_REQUIRED_MEMBERS.get(extension)
+        if required_member and not _zip_has_member(filepath, required_member):
+            raise UploadRejected(f'The uploaded file is not a valid {extension.upper()} file')
+    except UploadRejected:
+        _remove_quietly(filepath)
+        raise
+    except OSError:
+        _remove_quietly(filepath)
+        raise
+
+    return digest.hexdigest(), size
+
+
+def _zip_has_member(filepath, member):
+    try:
+        with zipfile.ZipFile(filepath) as archive:
+            archive.getinfo(member)
+        return True
+    except (zipfile.BadZipFile, KeyError):
+        return False
+
+
+def _remove_quietly(filepath):
+    try:
+        os.remove(filepath)
+    except OSError:
+        pass